@@ -0,0 +1,88 @@
+"""
+Benchmark da composição por quadro: tempo médio de get_frame para timelines
+com cada vez mais overlays curtos, mantendo cerca de 5 ativos por instante.
+O CompositeVideoClip do MoviePy testa todos os clipes a cada quadro; o
+IndexedCompositeVideoClip consulta o índice de intervalos, assim como as
+composições planejadas (PlannedCompositeVideoClip e NumpyCompositeVideoClip),
+com os overlays dinâmicos ou estáticos: o custo não deve crescer com N.
+
+Também compara, em uma cena 1280x720 com N camadas estáticas e um clipe em
+movimento, a composição de todas as camadas a cada quadro com a
+pré-mesclagem das estáticas (PlannedCompositeVideoClip).
+
+Uso: python benchmarks/bench_compositing.py [--sizes 100 1000 4000] [--layers 5 20 50] [--frames 48]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "packages"))
+
+from moviepy import ColorClip, CompositeVideoClip
+from video_renderer.compositing import IndexedCompositeVideoClip, PlannedCompositeVideoClip
+from video_renderer.numpy_compositing import NumpyCompositeVideoClip
+
+SIZE = (320, 180)
+
+def build_clips(count: int):
+    """Overlays de 0,5 s começando a cada 0,1 s: ~5 ativos em qualquer instante."""
+    return [
+        ColorClip(size=(40, 20), color=(255, i % 256, 0)).with_duration(0.5).with_start(i * 0.1)
+        .with_position((i * 7 % SIZE[0], i * 3 % SIZE[1]))
+        for i in range(count)
+    ]
+
+def build_scene(layers: int):
+    """Fundo, N camadas estáticas semitransparentes e um clipe que se move por cima."""
+    size = (1280, 720)
+    clips = [ColorClip(size=size, color=(20, 20, 20)).with_duration(10)]
+    for i in range(layers):
+        clips.append(ColorClip(size=(400, 300), color=(i * 5 % 256, 100, 200)).with_duration(10)
+                     .with_position((i * 17 % 880, i * 11 % 420)).with_opacity(0.8))
+    clips.append(ColorClip(size=(120, 120), color=(255, 255, 0)).with_duration(10)
+                 .with_position(lambda t: (int(t * 100), 300)))
+    return clips, [True] * (layers + 1) + [False], size
+
+def frame_time(composite, frames: int, with_mask: bool = True) -> float:
+    """Tempo médio por quadro, com quadros espalhados por toda a timeline."""
+    duration = composite.duration
+    times = [duration * (i + 0.5) / frames for i in range(frames)]
+    started = time.perf_counter()
+    for t in times:
+        composite.get_frame(t)
+        if with_mask:
+            composite.mask.get_frame(t)
+    return (time.perf_counter() - started) / frames
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 4000])
+    parser.add_argument("--layers", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--frames", type=int, default=48)
+    args = parser.parse_args()
+
+    planned_columns = [(cls, static) for cls in (PlannedCompositeVideoClip, NumpyCompositeVideoClip)
+                       for static in (False, True)]
+    names = {PlannedCompositeVideoClip: "planejado", NumpyCompositeVideoClip: "numpy"}
+    headers = [f"{names[cls]} {'est.' if static else 'din.'}" for cls, static in planned_columns]
+    print(f"{'clipes':>8} {'moviepy':>9} {'indexado':>9} " + " ".join(f"{h:>14}" for h in headers) + "  (ms/quadro)")
+    for size in args.sizes:
+        clips = build_clips(size)
+        baseline = frame_time(CompositeVideoClip(clips, size=SIZE), args.frames)
+        indexed = frame_time(IndexedCompositeVideoClip(clips, size=SIZE), args.frames)
+        background = ColorClip(size=SIZE, color=(0, 0, 0)).with_duration(clips[-1].end)
+        planned = [frame_time(cls([background] + clips, static=[True] + [static] * size, size=SIZE),
+                              args.frames, with_mask=False)
+                   for cls, static in planned_columns]
+        print(f"{size:>8} {baseline * 1e3:>9.2f} {indexed * 1e3:>9.2f} " + " ".join(f"{p * 1e3:>14.2f}" for p in planned))
+
+    print(f"\n{'estáticas':>9} {'todas (ms/quadro)':>18} {'pré-mescladas (ms/quadro)':>26}")
+    for layers in args.layers:
+        clips, static, size = build_scene(layers)
+        baseline = frame_time(IndexedCompositeVideoClip(clips, size=size), args.frames, with_mask=False)
+        planned = frame_time(PlannedCompositeVideoClip(clips, static=static, size=size), args.frames, with_mask=False)
+        print(f"{layers:>9} {baseline * 1e3:>18.2f} {planned * 1e3:>26.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark da escrita do vídeo: o write_videofile do MoviePy (composição e
+codificação alternadas) contra o FFmpegPipeWriter (fila limitada e thread de
+escrita; o ffmpeg codifica enquanto os próximos quadros são compostos), com
+os perfis de codificação disponíveis.
+
+Uso: python benchmarks/bench_encoding.py [--seconds 5] [--profiles default draft]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "packages"))
+
+from moviepy import ColorClip
+from video_renderer.encoding import ENCODER_PROFILES
+from video_renderer.numpy_compositing import NumpyCompositeVideoClip
+from video_renderer.parallel import write_frames
+
+SIZE = (1280, 720)
+FPS = 24
+
+def build_scene(seconds: float):
+    """Fundo e 10 camadas semitransparentes em movimento."""
+    clips = [ColorClip(size=SIZE, color=(20, 20, 20)).with_duration(seconds)]
+    for i in range(10):
+        clips.append(ColorClip(size=(300, 200), color=(i * 25, 120, 200)).with_duration(seconds)
+                     .with_position(lambda t, i=i: (int(t * 60 + i * 90) % 1100, i * 50)).with_opacity(0.7))
+    return NumpyCompositeVideoClip(clips, static=[True] + [False] * 10, size=SIZE)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--profiles", nargs="+", default=["default", "draft"], choices=list(ENCODER_PROFILES))
+    args = parser.parse_args()
+
+    clip = build_scene(args.seconds)
+    frames = int(clip.duration * FPS)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        started = time.perf_counter()
+        clip.write_videofile(os.path.join(tmp_dir, "moviepy.mp4"), fps=FPS, codec="libx264", audio=False, logger=None)
+        baseline = time.perf_counter() - started
+        print(f"{'escritor':>22} {'tempo (s)':>10} {'fps':>7}")
+        print(f"{'write_videofile':>22} {baseline:>10.2f} {frames / baseline:>7.1f}")
+        for name in args.profiles:
+            started = time.perf_counter()
+            write_frames(clip, os.path.join(tmp_dir, f"{name}.mp4"), FPS, 0, frames, profile=ENCODER_PROFILES[name])
+            elapsed = time.perf_counter() - started
+            print(f"{'pipe (' + name + ')':>22} {elapsed:>10.2f} {frames / elapsed:>7.1f}")
+
+if __name__ == "__main__":
+    main()
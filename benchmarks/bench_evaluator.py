@@ -0,0 +1,36 @@
+"""
+Micro-benchmark do safe_expr_eval: avaliações por segundo no caminho rápido
+aritmético contra o caminho completo do asteval.
+
+Uso: python benchmarks/bench_evaluator.py [-n ITERACOES]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "packages"))
+
+from safe_expr_eval.evaluator import evaluate, _compile_expression, _evaluate_with_asteval
+
+CASES = [
+    ("intro_end + 0.5", {"intro_end": 10}),
+    ("video_width - self_width - 40", {"video_width": 1920, "self_width": 200}),
+    ("max(track1_end, track2_end)", {"track1_end": 15, "track2_end": 30}),
+    ("(video_width - self_width) / 2", {"video_width": 1920, "self_width": 640}),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--number", type=int, default=20000, help="Avaliações por caso.")
+    args = parser.parse_args()
+
+    print(f"{'expressão':<36} {'asteval/s':>12} {'rápido/s':>12} {'ganho':>8}")
+    for expr, context in CASES:
+        compiled = _compile_expression(expr)
+        slow = timeit.timeit(lambda: _evaluate_with_asteval(compiled, expr, context), number=args.number)
+        fast = timeit.timeit(lambda: evaluate(expr, context), number=args.number)
+        print(f"{expr:<36} {args.number / slow:>12,.0f} {args.number / fast:>12,.0f} {slow / fast:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
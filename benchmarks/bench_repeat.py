@@ -0,0 +1,55 @@
+"""
+Benchmark de 'repeat': uma grade de N células escrita elemento a elemento
+(N nós por atributo no grafo) contra o mesmo layout gerado por um bloco
+'repeat' (um nó por atributo, avaliado de uma vez para todos os membros).
+
+Uso: python benchmarks/bench_repeat.py [--sizes 1000 10000 50000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "packages"))
+
+from video_model.models import Project
+from timeline_resolver.resolver import Resolver
+
+COLUMNS = 100
+
+def cell(index_expr: str) -> dict:
+    return {
+        "type": "rectangle", "width": 16, "height": 16,
+        "start": f"expr: ({index_expr}) * 0.01",
+        "end": "expr: self.start + video.duration / 2",
+        "x": f"expr: ({index_expr}) % {COLUMNS} * (self.width + 2)",
+        "y": f"expr: ({index_expr}) // {COLUMNS} * (self.height + 2)",
+        "opacity": f"expr: max(0.2, 1 - ({index_expr}) / {COLUMNS * COLUMNS})",
+    }
+
+def explicit_project(count: int) -> dict:
+    elements = [{**cell(str(i)), "name": f"cell_{i}"} for i in range(count)]
+    return {"width": 1920, "height": 1080, "duration": 10, "elements": elements}
+
+def repeat_project(count: int) -> dict:
+    elements = [{**cell("i"), "name": "cell", "repeat": count}]
+    return {"width": 1920, "height": 1080, "duration": 10, "elements": elements}
+
+def measure(build, count: int) -> float:
+    started = time.perf_counter()
+    Resolver(Project.from_dict(build(count))).resolve()
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    print(f"{'elementos':>10} {'explícitos (s)':>15} {'repeat (s)':>11} {'ganho':>7}")
+    for size in args.sizes:
+        explicit = measure(explicit_project, size)
+        repeat = measure(repeat_project, size)
+        print(f"{size:>10} {explicit:>15.3f} {repeat:>11.3f} {explicit / repeat:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
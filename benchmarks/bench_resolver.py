@@ -0,0 +1,46 @@
+"""
+Benchmark de escala do Resolver: tempo de resolve() para timelines com
+100, 1.000 e 10.000 elementos encadeados. Com o índice de elementos e a
+análise única de cada expressão, o tempo por elemento deve ficar estável.
+
+Uso: python benchmarks/bench_resolver.py [--sizes 100 1000 10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "packages"))
+
+from video_model.models import Project, RectangleElement
+from timeline_resolver.resolver import Resolver
+
+def build_project(count: int) -> Project:
+    """Cada elemento começa quando o anterior termina e se alinha pela direita do vídeo."""
+    elements = [RectangleElement(name="el0", start=0, end=1, width=100, height=50)]
+    for i in range(1, count):
+        elements.append(RectangleElement(
+            name=f"el{i}",
+            start=f"expr: el{i - 1}.end + 0.5",
+            end="expr: self.start + 1",
+            x="expr: video.width - self.width - 40",
+            y=f"expr: max(el{i - 1}.y, 10)",
+            width=100, height=50,
+        ))
+    return Project(width=1920, height=1080, duration=f"expr: el{count - 1}.end", elements=elements)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'elementos':>10} {'resolve (s)':>12} {'µs/elemento':>12}")
+    for size in args.sizes:
+        project = build_project(size)
+        started = time.perf_counter()
+        Resolver(project).resolve()
+        elapsed = time.perf_counter() - started
+        print(f"{size:>10} {elapsed:>12.3f} {elapsed / size * 1e6:>12.1f}")
+
+if __name__ == "__main__":
+    main()
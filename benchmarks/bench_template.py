@@ -0,0 +1,57 @@
+"""
+Benchmark de templates: gerar N variantes de um mesmo projeto resolvendo
+cada uma do zero (Project + Resolver.resolve) ou compilando o template uma
+vez e resolvendo todas as variantes com ProjectTemplate.bind.
+
+Uso: python benchmarks/bench_template.py [--variants 100 1000 10000] [--elements 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "packages"))
+
+from video_model.models import Project, RectangleElement, TextElement
+from timeline_resolver.resolver import Resolver
+from timeline_resolver.template import ProjectTemplate
+
+def build_project(static_elements: int, params=None) -> Project:
+    """Uma cena fixa encadeada e alguns elementos personalizados por parâmetros."""
+    elements = [RectangleElement(name="el0", start=0, end=1, width=100, height=50)]
+    for i in range(1, static_elements):
+        elements.append(RectangleElement(
+            name=f"el{i}", start=f"expr: el{i - 1}.end", end="expr: self.start + 1",
+            x="expr: video.width - self.width - 40", width=100, height=50,
+        ))
+    elements.append(TextElement(name="greeting", start=0, text='expr: "Olá, " + params.name', end="expr: video.duration"))
+    elements.append(RectangleElement(
+        name="price_bar", start="expr: el0.end", end="expr: self.start + params.seconds",
+        width="expr: params.price * 20", x="expr: (video.width - self.width) / 2", height=40,
+    ))
+    params = params or {"name": "Ana", "price": 9.9, "seconds": 3}
+    return Project(width=1920, height=1080, duration=f"expr: el{static_elements - 1}.end",
+                   elements=elements, params=dict(params))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variants", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--elements", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'variantes':>10} {'resolve (s)':>12} {'template (s)':>13} {'ganho':>7}")
+    for count in args.variants:
+        param_sets = [{"name": f"Cliente {i}", "price": 5 + i % 50, "seconds": 2 + i % 3} for i in range(count)]
+
+        started = time.perf_counter()
+        for param_set in param_sets:
+            Resolver(build_project(args.elements, param_set)).resolve()
+        resolve_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        ProjectTemplate(build_project(args.elements)).bind(param_sets)
+        template_elapsed = time.perf_counter() - started
+        print(f"{count:>10} {resolve_elapsed:>12.3f} {template_elapsed:>13.3f} {resolve_elapsed / template_elapsed:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,77 @@
 # application/main.py
 import argparse
-import yaml
 import logging
 from utils.logger import setup_logger
 
 # Importações dos pacotes do projeto
 from video_model.models import Project
 from timeline_resolver.resolver import Resolver
-from video_renderer.renderer import Renderer
+from timeline_resolver.media_cache import MediaMetadataCache
+from application.project_cache import ProjectCache, load_yaml
+from video_renderer.renderer import Renderer, COMPOSITORS
+from video_renderer.encoding import ENCODER_PROFILES
+from video_renderer.preview import PREVIEW_FPS, PREVIEW_SCALE
+from video_renderer.proxy import ProxyCache
 
-def run_pipeline(yaml_path: str, output_path: str, verbose: bool):
+def run_pipeline(
+    yaml_path: str,
+    output_path: str,
+    verbose: bool,
+    cache_dir: str = None,
+    use_cache: bool = True,
+    probe_workers: int = 1,
+    compositor: str = 'moviepy',
+    render_workers: int = 1,
+    render_threads: int = 1,
+    frame_buffer: int = None,
+    encoder: str = None,
+    encoder_threads: int = None,
+    preview: float = None,
+    proxies: bool = False,
+):
     """Orquestra o processo completo de geração de vídeo."""
     setup_logger(verbose)
 
     logging.info(f"🎬 Iniciando pipeline para '{yaml_path}'...")
     
     try:
-        logging.info("1. Carregando e validando o arquivo YAML...")
-        with open(yaml_path, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-        raw_project = Project.from_dict(data['video'])
-        logging.debug("Arquivo YAML carregado para os modelos de dados.")
+        with open(yaml_path, 'rb') as f:
+            content = f.read()
+        project_cache = ProjectCache(cache_dir) if use_cache else None
+        resolved_project = project_cache.load(content) if project_cache else None
 
-        logging.info("2. Resolvendo a timeline e expressões dinâmicas...")
-        resolver = Resolver(raw_project)
-        resolved_project = resolver.resolve()
-        logging.debug("Timeline resolvida com sucesso.")
+        if resolved_project is not None:
+            logging.info("1-2. Projeto inalterado: usando a timeline resolvida em cache.")
+        else:
+            logging.info("1. Carregando e validando o arquivo YAML...")
+            data = load_yaml(content)
+            raw_project = Project.from_dict(data['video'])
+            logging.debug("Arquivo YAML carregado para os modelos de dados.")
+
+            logging.info("2. Resolvendo a timeline e expressões dinâmicas...")
+            media_cache = MediaMetadataCache(cache_dir) if use_cache else None
+            resolver = Resolver(raw_project, media_cache=media_cache, hydration_workers=probe_workers)
+            resolved_project = resolver.resolve()
+            logging.debug("Timeline resolvida com sucesso.")
+            if project_cache is not None:
+                try:
+                    project_cache.store(content, resolved_project)
+                except Exception as e:
+                    logging.warning(f"Não foi possível gravar o cache do projeto: {e}")
 
         logging.info(f"3. Renderizando vídeo para '{output_path}'...")
         renderer = Renderer(resolved_project)
-        renderer.render_video(output_path)
+        if proxies:
+            renderer.proxies = ProxyCache(cache_dir)
+        render_options = dict(compositor=compositor, workers=render_workers, threads=render_threads,
+                              buffer_frames=frame_buffer, encoder_threads=encoder_threads)
+        # Sem perfil escolhido, cada modo usa o seu padrão ('draft' na pré-visualização).
+        if encoder is not None:
+            render_options['encoder'] = encoder
+        if preview is not None:
+            renderer.render_preview(output_path, scale=preview, **render_options)
+        else:
+            renderer.render_video(output_path, **render_options)
         
         logging.info(f"✅ Vídeo gerado com sucesso em: {output_path}")
 
@@ -43,9 +85,36 @@ def main():
     parser.add_argument("-o", "--output", default="output.mp4", help="Caminho para o arquivo de vídeo de saída.")
     # Novo argumento para o modo detalhado
     parser.add_argument("-v", "--verbose", action="store_true", help="Ativa o modo de log detalhado (DEBUG).")
+    parser.add_argument("--cache-dir", default=None, help="Diretório de cache (padrão: $VIDEO_GEN_CACHE_DIR ou ~/.cache/video_generator_suite).")
+    parser.add_argument("--no-cache", action="store_true", help="Desativa os caches persistentes (metadados de mídia e projetos resolvidos).")
+    parser.add_argument("--probe-workers", type=int, default=1, help="Arquivos de mídia lidos em paralelo na hidratação (1 = sequencial).")
+    parser.add_argument("--compositor", choices=COMPOSITORS, default="moviepy", help="Motor de composição dos quadros ('numpy' mescla em um canvas pré-alocado).")
+    parser.add_argument("--workers", type=int, default=1, help="Processos que renderizam segmentos do vídeo em paralelo (1 = sequencial).")
+    parser.add_argument("--threads", type=int, default=1, help="Threads que calculam quadros em paralelo em cada processo (1 = sequencial).")
+    parser.add_argument("--frame-buffer", type=int, default=None, help="Máximo de quadros calculados adiante do escritor (padrão: 2 por thread).")
+    parser.add_argument("--encoder", choices=ENCODER_PROFILES, default=None, help="Perfil de codificação ('draft' para rascunhos rápidos, 'final' para entrega; padrão: 'default', ou 'draft' com --preview).")
+    parser.add_argument("--encoder-threads", type=int, default=None, help="Threads do ffmpeg na codificação (padrão: automático).")
+    parser.add_argument("--preview", type=float, nargs="?", const=PREVIEW_SCALE, default=None, metavar="ESCALA",
+                        help=f"Pré-visualização rápida: projeto reduzido por ESCALA (padrão {PREVIEW_SCALE}), {PREVIEW_FPS} fps e perfil de rascunho.")
+    parser.add_argument("--proxies", action="store_true", help="Lê os vídeos de proxies MJPEG na resolução do projeto, gerados uma vez e guardados no diretório de cache.")
     
     args = parser.parse_args()
-    run_pipeline(args.yaml_file, args.output, args.verbose)
+    run_pipeline(
+        args.yaml_file,
+        args.output,
+        args.verbose,
+        cache_dir=args.cache_dir,
+        use_cache=not args.no_cache,
+        probe_workers=args.probe_workers,
+        compositor=args.compositor,
+        render_workers=args.workers,
+        render_threads=args.threads,
+        frame_buffer=args.frame_buffer,
+        encoder=args.encoder,
+        encoder_threads=args.encoder_threads,
+        preview=args.preview,
+        proxies=args.proxies,
+    )
 
 if __name__ == "__main__":
     main()
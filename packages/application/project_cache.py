@@ -0,0 +1,123 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+import safe_expr_eval
+import timeline_resolver
+import video_model
+from video_model.models import Project
+from timeline_resolver.media_cache import default_cache_dir
+
+log = logging.getLogger(__name__)
+
+# Parser em C (libyaml) quando disponível; o SafeLoader em Python puro é bem mais lento.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+def load_yaml(stream) -> Any:
+    """Equivalente a yaml.safe_load, usando o parser da libyaml quando instalado."""
+    return yaml.load(stream, Loader=YAML_LOADER)
+
+def project_assets(project: Project) -> List[str]:
+    """Arquivos usados pelo projeto: mídias, legendas e fontes."""
+    paths = set()
+    for element in project.elements:
+        path = getattr(element, 'path', None)
+        if isinstance(path, str):
+            paths.add(path)
+        font_path = (getattr(element, 'font', None) or {}).get('path')
+        if isinstance(font_path, str):
+            paths.add(font_path)
+    return sorted(paths)
+
+# Pacotes cujo código define o projeto resolvido gravado no cache.
+RESOLUTION_PACKAGES = (video_model, timeline_resolver, safe_expr_eval)
+
+@lru_cache(maxsize=None)
+def code_fingerprint() -> str:
+    """Hash das fontes do modelo e da resolução: qualquer mudança invalida o cache."""
+    digest = hashlib.sha256()
+    for package in RESOLUTION_PACKAGES:
+        package_dir = os.path.dirname(package.__file__)
+        for filename in sorted(os.listdir(package_dir)):
+            if filename.endswith('.py'):
+                digest.update(f"{package.__name__}/{filename}\0".encode('utf-8'))
+                with open(os.path.join(package_dir, filename), 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+def _fingerprint(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+class ProjectCache:
+    """
+    Cache em disco de projetos já resolvidos. A chave é o hash do conteúdo do
+    YAML (e do diretório de trabalho, base dos caminhos relativos); a entrada
+    só é usada se os arquivos referenciados pelo projeto não mudaram.
+    A chave inclui também o hash do código do modelo e da resolução, para que
+    uma versão nova do código nunca leia projetos gravados por outra.
+    Uma execução repetida pula a leitura do YAML e a resolução da timeline.
+    """
+    DIRNAME = "projects"
+    # Incrementar quando o formato da entrada (assets, projeto) mudar.
+    VERSION = 1
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = os.path.join(cache_dir or default_cache_dir(), self.DIRNAME)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, content: bytes) -> str:
+        digest = hashlib.sha256(f"{self.VERSION}\0{code_fingerprint()}\0{os.getcwd()}\0".encode('utf-8'))
+        digest.update(content)
+        return digest.hexdigest()
+
+    def _entry_path(self, content: bytes) -> str:
+        return os.path.join(self.cache_dir, f"{self.key(content)}.pickle")
+
+    def load(self, content: bytes) -> Optional[Project]:
+        """Retorna o projeto resolvido para este YAML, ou None se ausente ou desatualizado."""
+        entry_path = self._entry_path(content)
+        try:
+            with open(entry_path, 'rb') as f:
+                assets, project = pickle.load(f)
+            stale = any(_fingerprint(path) != fingerprint for path, fingerprint in assets)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            # Inclui falhas ao desserializar: classes renomeadas, slots alterados, arquivo truncado.
+            log.warning(f"Cache de projeto ilegível em '{entry_path}', ignorando: {e}")
+            self.misses += 1
+            return None
+        if stale:
+            log.debug("Cache de projeto desatualizado: arquivos de mídia foram alterados.")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return project
+
+    def store(self, content: bytes, project: Project):
+        """Grava o projeto resolvido de forma atômica, com a impressão digital dos arquivos usados."""
+        assets = [(path, _fingerprint(path)) for path in project_assets(project)]
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".project.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((assets, project), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._entry_path(content))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,80 @@
+import ast
+import numbers
+from typing import Any, Dict, FrozenSet, Optional
+
+# Operadores aceitos pelo caminho rápido. Potência fica de fora de propósito:
+# '10 ** 10 ** 10' travaria o processo, e o asteval já limita esse caso.
+_ALLOWED_BINOPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod)
+_ALLOWED_UNARYOPS = (ast.UAdd, ast.USub)
+_ALLOWED_FUNCTIONS = frozenset({'max', 'min'})
+
+class ArithmeticExpression:
+    """
+    Expressão aritmética pura compilada para um code object do Python.
+    É executada com builtins vazios e só aceita contextos numéricos.
+    """
+    __slots__ = ('code', 'names')
+
+    def __init__(self, code, names: FrozenSet[str]):
+        self.code = code
+        self.names = names
+
+    def accepts(self, context: Dict[str, Any]) -> bool:
+        """Indica se todas as variáveis usadas são números reais presentes no contexto."""
+        for name in self.names:
+            value = context.get(name)
+            if not isinstance(value, numbers.Real):
+                return False
+        return True
+
+    def __call__(self, namespace: Dict[str, Any]) -> Any:
+        return eval(self.code, {'__builtins__': {}}, namespace)
+
+def _is_whitelisted(node: ast.AST, names: set) -> bool:
+    """Percorre a árvore aceitando apenas aritmética sobre números, nomes e max/min."""
+    if isinstance(node, ast.Expression):
+        return _is_whitelisted(node.body, names)
+    if isinstance(node, ast.Constant):
+        return type(node.value) in (int, float)
+    if isinstance(node, ast.Name):
+        if node.id.startswith('_') or node.id in _ALLOWED_FUNCTIONS:
+            return False
+        names.add(node.id)
+        return True
+    if isinstance(node, ast.BinOp):
+        return (isinstance(node.op, _ALLOWED_BINOPS)
+                and _is_whitelisted(node.left, names)
+                and _is_whitelisted(node.right, names))
+    if isinstance(node, ast.UnaryOp):
+        return isinstance(node.op, _ALLOWED_UNARYOPS) and _is_whitelisted(node.operand, names)
+    if isinstance(node, ast.Call):
+        return (isinstance(node.func, ast.Name)
+                and node.func.id in _ALLOWED_FUNCTIONS
+                and not node.keywords
+                and len(node.args) > 0
+                and all(not isinstance(arg, ast.Starred) and _is_whitelisted(arg, names) for arg in node.args))
+    return False
+
+def arithmetic_from_tree(tree: ast.Expression, code=None) -> Optional[ArithmeticExpression]:
+    """
+    Versão de compile_arithmetic para uma árvore já analisada. Se o code
+    object da mesma árvore já existir, ele é reaproveitado.
+    """
+    names: set = set()
+    if not _is_whitelisted(tree, names):
+        return None
+    if code is None:
+        code = compile(tree, '<expr>', 'eval')
+    return ArithmeticExpression(code, frozenset(names))
+
+def compile_arithmetic(expression: str) -> Optional[ArithmeticExpression]:
+    """
+    Compila a expressão para o caminho rápido se ela estiver dentro da lista
+    de construções permitidas. Retorna None para qualquer outra coisa, e o
+    chamador deve recorrer ao asteval.
+    """
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError:
+        return None
+    return arithmetic_from_tree(tree)
@@ -1,41 +1,135 @@
 import ast
-from typing import Any, Dict
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, NamedTuple, Optional
 from asteval import Interpreter
 
+from .arithmetic import ArithmeticExpression, arithmetic_from_tree
+
+# Quantidade máxima de expressões distintas mantidas no cache de compilação.
+EXPRESSION_CACHE_SIZE = 4096
+
+# Mesmo limite de tamanho aplicado pelo asteval ao analisar um texto.
+MAX_EXPRESSION_LENGTH = 50000
+
+# Funções seguras expostas a todas as expressões.
+SAFE_FUNCTIONS = {'max': max, 'min': min}
+
 class InvalidExpressionError(Exception):
     """Exceção para expressões inválidas, inseguras ou que falharam na avaliação."""
     pass
 
-def evaluate(expression: str, context: Dict[str, Any] = None) -> Any:
+class CompiledExpression(NamedTuple):
+    """Resultado da validação: a AST para o asteval e, se possível, o caminho rápido."""
+    tree: ast.Module
+    arithmetic: Optional[ArithmeticExpression]
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def _compile_expression(expression: str) -> CompiledExpression:
     """
-    Avalia uma expressão matemática de forma segura usando um contexto,
-    com validação de sintaxe e de execução.
+    Valida e compila a expressão uma única vez por texto distinto.
+    Exceções não são armazenadas no cache, então expressões inválidas
+    continuam levantando o erro a cada chamada.
     """
-    if context is None:
-        context = {}
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise InvalidExpressionError(f"Expressão excede {MAX_EXPRESSION_LENGTH} caracteres.")
 
     # --- CAMADA 1: Pré-validação de Sintaxe com compile() ---
     # Bloqueia 'statements' (del, import) e erros de sintaxe grosseiros.
+    # A expressão é analisada uma única vez; a mesma árvore serve à validação,
+    # ao caminho rápido e ao asteval.
     try:
-        compile(expression, '<string>', 'eval')
+        expression_tree = ast.parse(expression, mode='eval')
+        code = compile(expression_tree, '<string>', 'eval')
     except (SyntaxError, TypeError, ValueError) as exc:
         raise InvalidExpressionError(f"Expressão ou sintaxe inválida: {exc}") from exc
 
+    for node in ast.walk(expression_tree):
+        # Funções anônimas criariam código executável a partir da expressão.
+        if isinstance(node, ast.Lambda):
+            raise InvalidExpressionError("Expressão ou sintaxe inválida: 'lambda' não é permitido.")
+
+    # O asteval executa módulos: embrulha a expressão sem analisá-la de novo.
+    tree = ast.Module(body=[ast.Expr(value=expression_tree.body)], type_ignores=[])
+    ast.copy_location(tree.body[0], expression_tree.body)
+    return CompiledExpression(tree, arithmetic_from_tree(expression_tree, code))
+
+class _InterpreterPool(threading.local):
+    """Mantém um interpretador asteval reutilizável por thread."""
+
+    def __init__(self):
+        self.interpreter = Interpreter(
+            symtable={},
+            builtins_if_trusted=False,
+            use_builtin_funcs=False
+        )
+        # Símbolos criados pelo próprio asteval, restaurados a cada avaliação.
+        self.base_symbols = dict(self.interpreter.symtable)
+
+    def acquire(self, context: Dict[str, Any]) -> Interpreter:
+        """Devolve o interpretador da thread com a tabela de símbolos reiniciada."""
+        aeval = self.interpreter
+        symtable = aeval.symtable
+        symtable.clear()
+        symtable.update(self.base_symbols)
+        symtable.update(context)
+        symtable.update(SAFE_FUNCTIONS)
+        aeval.error = []
+        aeval.error_msg = None
+        aeval.retval = None
+        aeval.code_text = []
+        aeval.start_time = time.time()
+        return aeval
+
+_pool = _InterpreterPool()
+
+def cache_info():
+    """Retorna as estatísticas (hits, misses, maxsize, currsize) do cache de expressões."""
+    return _compile_expression.cache_info()
+
+def clear_cache() -> None:
+    """Esvazia o cache de expressões compiladas e zera os contadores."""
+    _compile_expression.cache_clear()
+
+def evaluate(expression: str, context: Dict[str, Any] = None) -> Any:
+    """
+    Avalia uma expressão matemática de forma segura usando um contexto,
+    com validação de sintaxe e de execução.
+    Expressões puramente aritméticas sobre números usam o caminho rápido;
+    todo o resto é avaliado pelo asteval.
+    """
+    if context is None:
+        context = {}
+    # Verificado antes do cache: listas e dicionários não podem ser chaves do lru_cache.
+    if not isinstance(expression, str):
+        raise InvalidExpressionError(f"Expressão ou sintaxe inválida: esperado texto, recebido {type(expression).__name__}.")
+
+    compiled = _compile_expression(expression)
+
+    arithmetic = compiled.arithmetic
+    if arithmetic is not None and arithmetic.accepts(context):
+        namespace = dict(context)
+        namespace.update(SAFE_FUNCTIONS)
+        try:
+            return arithmetic(namespace)
+        except (ArithmeticError, TypeError, ValueError) as exc:
+            raise InvalidExpressionError(str(exc)) from exc
+
+    return _evaluate_with_asteval(compiled, expression, context)
+
+def _evaluate_with_asteval(compiled: CompiledExpression, expression: str, context: Dict[str, Any]) -> Any:
+    """Avalia a expressão já validada no interpretador asteval da thread."""
     # --- CAMADA 2: Avaliação Segura e Verificação de Erros com Asteval ---
-    aeval = Interpreter(
-        symtable=context.copy(),
-        builtins_if_trusted=False,
-        use_builtin_funcs=False
-    )
-    aeval.symtable.update({'max': max, 'min': min})
+    aeval = _pool.acquire(context)
 
     # A avaliação é feita, e então o buffer de erros é verificado.
-    result = aeval.eval(expression)
+    result = aeval.run(compiled.tree, expr=expression, lineno=0, with_raise=False)
 
     if aeval.error:
         # Se o asteval encontrou um erro de execução (ex: NameError, ZeroDivisionError),
         # pegamos a mensagem e levantamos nossa exceção.
         last_error = aeval.error[-1]
         raise InvalidExpressionError(last_error.msg) from last_error.exc
-            
-    return result
\ No newline at end of file
+
+    return result
@@ -0,0 +1,168 @@
+import ast
+import numbers
+from functools import lru_cache, reduce
+from typing import Any, Dict, FrozenSet
+
+import numpy as np
+
+from .evaluator import InvalidExpressionError, EXPRESSION_CACHE_SIZE, MAX_EXPRESSION_LENGTH
+
+# Nome da variável de tempo disponível nas expressões 'expr(t):'.
+TIME_VARIABLE = 't'
+
+_ALLOWED_BINOPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+_ALLOWED_UNARYOPS = (ast.UAdd, ast.USub)
+
+def _variadic(ufunc):
+    """Adapta um ufunc binário (ex: np.maximum) para aceitar N argumentos."""
+    return lambda *args: reduce(ufunc, args)
+
+# Funções disponíveis, todas elemento a elemento sobre arrays NumPy.
+VECTORIZED_FUNCTIONS = {
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+    'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan, 'atan2': np.arctan2,
+    'sqrt': np.sqrt, 'exp': np.exp, 'log': np.log,
+    'abs': np.abs, 'floor': np.floor, 'ceil': np.ceil, 'round': np.round,
+    'clip': np.clip,
+    'max': _variadic(np.maximum), 'min': _variadic(np.minimum),
+}
+VECTORIZED_CONSTANTS = {'pi': np.pi, 'e': np.e}
+
+class _FloatConstants(ast.NodeTransformer):
+    """Converte constantes inteiras em float: '10 ** 10 ** 10' estoura em vez de travar."""
+    def visit_Constant(self, node):
+        return ast.copy_location(ast.Constant(float(node.value)), node)
+
+def _as_float(value: Any) -> Any:
+    """
+    Converte inteiros (e arrays inteiros) do contexto em float, como as
+    constantes: 'a ** b ** a' com valores referenciados também estoura em vez
+    de cair na potência de inteiros sem limite do Python.
+    """
+    if isinstance(value, numbers.Integral):
+        try:
+            return float(value)
+        except OverflowError as exc:
+            raise InvalidExpressionError(f"Valor grande demais para expressão vetorizada: {value}") from exc
+    if isinstance(value, np.ndarray) and value.dtype.kind in 'iub':
+        return value.astype(float)
+    return value
+
+def _check_node(node: ast.AST, names: set):
+    if isinstance(node, ast.Expression):
+        _check_node(node.body, names)
+    elif isinstance(node, ast.Constant):
+        if type(node.value) not in (int, float):
+            raise InvalidExpressionError(f"Constante não permitida em expressão vetorizada: {node.value!r}")
+    elif isinstance(node, ast.Name):
+        if node.id.startswith('_'):
+            raise InvalidExpressionError(f"Nome não permitido em expressão vetorizada: '{node.id}'")
+        if node.id not in VECTORIZED_FUNCTIONS:
+            names.add(node.id)
+    elif isinstance(node, ast.BinOp) and isinstance(node.op, _ALLOWED_BINOPS):
+        _check_node(node.left, names)
+        _check_node(node.right, names)
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, _ALLOWED_UNARYOPS):
+        _check_node(node.operand, names)
+    elif isinstance(node, ast.Call):
+        if not (isinstance(node.func, ast.Name) and node.func.id in VECTORIZED_FUNCTIONS):
+            raise InvalidExpressionError("Apenas funções matemáticas são permitidas em expressões vetorizadas.")
+        if node.keywords or not node.args or any(isinstance(arg, ast.Starred) for arg in node.args):
+            raise InvalidExpressionError("Funções em expressões vetorizadas aceitam apenas argumentos posicionais.")
+        for arg in node.args:
+            _check_node(arg, names)
+    else:
+        raise InvalidExpressionError(
+            f"Construção '{type(node).__name__}' não é permitida em expressões vetorizadas."
+        )
+
+class VectorizedExpression:
+    """
+    Expressão compilada para operar sobre arrays NumPy: uma única chamada
+    calcula o resultado para todos os elementos dos arrays do contexto
+    (instantes de tempo, variantes de um template, ...).
+    """
+    __slots__ = ('expression', 'code', 'names')
+
+    def __init__(self, expression: str, code, names: FrozenSet[str]):
+        self.expression = expression
+        self.code = code
+        self.names = names
+
+    def evaluate(self, context: Dict[str, Any]) -> Any:
+        """Avalia com os valores (escalares ou arrays) do contexto, propagando broadcasting."""
+        namespace = dict(VECTORIZED_CONSTANTS)
+        namespace.update(context)
+        namespace.update(VECTORIZED_FUNCTIONS)
+        try:
+            with np.errstate(divide='raise', invalid='raise', over='raise'):
+                return eval(self.code, {'__builtins__': {}}, namespace)
+        except NameError as exc:
+            raise InvalidExpressionError(str(exc)) from exc
+        except (ArithmeticError, FloatingPointError, TypeError, ValueError) as exc:
+            raise InvalidExpressionError(f"Erro ao avaliar '{self.expression}': {exc}") from exc
+
+    def bind(self, context: Dict[str, Any]) -> 'TimeFunction':
+        """Fixa as variáveis do contexto e verifica se todas estão definidas."""
+        missing = self.names - set(context) - {TIME_VARIABLE} - set(VECTORIZED_CONSTANTS)
+        if missing:
+            raise InvalidExpressionError(f"name '{sorted(missing)[0]}' is not defined")
+        return TimeFunction(self, {name: _as_float(value) for name, value in context.items()})
+
+class TimeFunction:
+    """Expressão temporal com contexto fixado, pronta para ser amostrada em 't'."""
+    __slots__ = ('expression', 'context')
+
+    def __init__(self, expression: VectorizedExpression, context: Dict[str, Any]):
+        self.expression = expression
+        self.context = context
+
+    def __call__(self, t) -> np.ndarray:
+        """Avalia a expressão para um array de instantes, devolvendo um array do mesmo formato."""
+        t = np.asarray(t, dtype=float)
+        context = dict(self.context)
+        context[TIME_VARIABLE] = t
+        result = self.expression.evaluate(context)
+        try:
+            # Raízes de negativos com valores escalares viram complexos no Python.
+            if np.iscomplexobj(result):
+                raise TypeError("resultado complexo")
+            return np.broadcast_to(np.asarray(result, dtype=float), t.shape).copy()
+        except (TypeError, ValueError) as exc:
+            raise InvalidExpressionError(f"Erro ao avaliar '{self.expression.expression}': {exc}") from exc
+
+    def __repr__(self):
+        return f"TimeFunction('{self.expression.expression}')"
+
+    def __reduce__(self):
+        # Code objects não são serializáveis: recompila a partir do texto.
+        return (_restore_time_function, (self.expression.expression, self.context))
+
+def _restore_time_function(expression: str, context: Dict[str, Any]) -> TimeFunction:
+    return compile_time_expression(expression).bind(context)
+
+def compile_vectorized(expression: str) -> VectorizedExpression:
+    """
+    Valida e compila uma expressão para avaliação vetorizada com NumPy.
+    Aceita aritmética, potência, constantes 'pi'/'e' e funções matemáticas
+    elemento a elemento (sin, cos, sqrt, clip, max, min, ...).
+    """
+    # Verificado antes do cache: listas e dicionários não podem ser chaves do lru_cache.
+    if not isinstance(expression, str) or len(expression) > MAX_EXPRESSION_LENGTH:
+        raise InvalidExpressionError("Expressão vetorizada inválida.")
+    return _compile_vectorized(expression)
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def _compile_vectorized(expression: str) -> VectorizedExpression:
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError as exc:
+        raise InvalidExpressionError(f"Expressão ou sintaxe inválida: {exc}") from exc
+
+    names: set = set()
+    _check_node(tree, names)
+    tree = ast.fix_missing_locations(_FloatConstants().visit(tree))
+    return VectorizedExpression(expression, compile(tree, '<vectorized>', 'eval'), frozenset(names))
+
+# Expressões 'expr(t):' usam o mesmo compilador; 't' é fornecido na amostragem.
+compile_time_expression = compile_vectorized
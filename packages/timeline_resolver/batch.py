@@ -0,0 +1,132 @@
+import ast
+import numbers
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from safe_expr_eval.evaluator import evaluate, InvalidExpressionError, EXPRESSION_CACHE_SIZE
+from safe_expr_eval.arithmetic import compile_arithmetic
+from safe_expr_eval.vectorized import VectorizedExpression, compile_time_expression
+
+INT64_MAX = int(np.iinfo(np.int64).max)
+
+def to_column(values: List[Any]) -> np.ndarray:
+    """
+    Converte os valores de um nó em todos os itens de um lote em uma coluna:
+    int64 ou float64 quando todos são números, object nos demais casos.
+    """
+    kinds = {type(value) for value in values}
+    if kinds and kinds <= {int, float}:
+        try:
+            return np.array(values, dtype=np.int64 if kinds == {int} else float)
+        except OverflowError:
+            pass
+    # Preenchido item a item para que tuplas e listas não virem dimensões extras.
+    column = np.empty(len(values), dtype=object)
+    for index, value in enumerate(values):
+        column[index] = value
+    return column
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def vectorize(expression: str, is_time_expr: bool = False) -> Optional[VectorizedExpression]:
+    """
+    Versão vetorizada da expressão, ou None. Só a aritmética do caminho rápido
+    é vetorizada, para manter a mesma semântica do evaluate().
+    """
+    arithmetic = None if is_time_expr else compile_arithmetic(expression)
+    if arithmetic is None:
+        return None
+    return VectorizedExpression(expression, arithmetic.code, arithmetic.names)
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def _parse(expression: str) -> ast.AST:
+    return ast.parse(expression, mode='eval').body
+
+def _int_bound(node: ast.AST, bounds: Dict[str, int]) -> Optional[int]:
+    """
+    Limite de |valor| de um nó com resultado inteiro, ou None se o resultado é
+    float. Levanta OverflowError se algum inteiro intermediário puder sair do int64.
+    """
+    if isinstance(node, ast.Constant):
+        return abs(node.value) if type(node.value) is int else None
+    if isinstance(node, ast.Name):
+        return bounds.get(node.id)
+    if isinstance(node, ast.UnaryOp):
+        bound = _int_bound(node.operand, bounds)
+    elif isinstance(node, ast.BinOp):
+        left, right = _int_bound(node.left, bounds), _int_bound(node.right, bounds)
+        if left is None or right is None or isinstance(node.op, ast.Div):
+            return None
+        if isinstance(node.op, ast.Mult):
+            bound = left * right
+        elif isinstance(node.op, ast.FloorDiv):
+            bound = left
+        elif isinstance(node.op, ast.Mod):
+            bound = right
+        else:
+            bound = left + right
+    else:
+        args = [_int_bound(arg, bounds) for arg in node.args]
+        bound = None if None in args else max(args)
+    if bound is not None and bound > INT64_MAX:
+        raise OverflowError(bound)
+    return bound
+
+def fits_int64(expression: str, arrays: Dict[str, np.ndarray], scalars: Mapping[str, Any]) -> bool:
+    """
+    Indica se a forma vetorizada pode ser usada sem estourar o int64: o NumPy
+    não acusa o estouro de inteiros, enquanto o evaluate() usa os inteiros sem
+    limite do Python. O limite é calculado a partir do maior valor de cada coluna.
+    """
+    bounds = {
+        key: max(abs(int(column.min())), abs(int(column.max()))) if column.size else 0
+        for key, column in arrays.items() if column.dtype.kind == 'i'
+    }
+    if not bounds:
+        return True
+    for key, value in scalars.items():
+        if isinstance(value, numbers.Integral):
+            bounds[key] = abs(int(value))
+    try:
+        _int_bound(_parse(expression), bounds)
+    except OverflowError:
+        return False
+    return True
+
+def evaluate_batch(expression: str, is_time_expr: bool, vectorized: Optional[VectorizedExpression],
+                   arrays: Dict[str, np.ndarray], scalars: Mapping[str, Any], count: int,
+                   on_error: Callable[[int, InvalidExpressionError], Exception]) -> np.ndarray:
+    """
+    Avalia a expressão para 'count' itens de uma vez. 'arrays' traz uma coluna
+    por variável que muda de item para item e 'scalars' os valores comuns.
+    Se a forma vetorizada não se aplicar (textos, funções do asteval,
+    'expr(t):', inteiros que podem estourar o int64), avalia item a item; 'on_error(item, erro)' monta o erro do
+    item que falhou.
+    """
+    if (vectorized is not None
+            and all(column.dtype.kind in 'if' for column in arrays.values())
+            and all(isinstance(value, numbers.Real) for value in scalars.values())
+            and fits_int64(expression, arrays, scalars)):
+        try:
+            result = np.asarray(vectorized.evaluate({**scalars, **arrays}))
+        except InvalidExpressionError:
+            # Reavalia item a item para apontar qual deles falhou.
+            result = None
+        if result is not None and result.dtype.kind in 'if':
+            return np.broadcast_to(result, (count,)).copy()
+
+    array_values: List[Tuple[str, list]] = [(key, column.tolist()) for key, column in arrays.items()]
+    results = []
+    for index in range(count):
+        context = dict(scalars)
+        for key, values in array_values:
+            context[key] = values[index]
+        try:
+            if is_time_expr:
+                results.append(compile_time_expression(expression).bind(context))
+            else:
+                results.append(evaluate(expression, context))
+        except InvalidExpressionError as e:
+            raise on_error(index, e) from e
+    return to_column(results)
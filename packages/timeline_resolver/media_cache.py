@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+# Variável de ambiente que sobrescreve o diretório padrão de cache.
+CACHE_DIR_ENV = "VIDEO_GEN_CACHE_DIR"
+
+def default_cache_dir() -> str:
+    """Diretório de cache padrão: $VIDEO_GEN_CACHE_DIR ou ~/.cache/video_generator_suite."""
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(
+        os.path.expanduser("~"), ".cache", "video_generator_suite"
+    )
+
+class MediaMetadataCache:
+    """
+    Índice persistente (JSON) com os metadados de arquivos de mídia
+    (largura, altura e duração), usado pelo Resolver para hidratar o projeto
+    sem abrir os arquivos. Cada entrada é válida enquanto o tamanho e a data
+    de modificação do arquivo não mudarem.
+    """
+    INDEX_FILENAME = "media_metadata.json"
+    VERSION = 1
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.index_path = os.path.join(self.cache_dir, self.INDEX_FILENAME)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            log.warning(f"Índice de metadados ilegível em '{self.index_path}', recriando: {e}")
+            return {}
+        if data.get("version") != self.VERSION:
+            return {}
+        return data.get("entries", {})
+
+    @staticmethod
+    def _key(path: str, media_type: str) -> str:
+        return f"{media_type}:{os.path.abspath(path)}"
+
+    @staticmethod
+    def _fingerprint(path: str) -> Optional[Dict[str, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def get(self, path: str, media_type: str) -> Optional[Dict[str, Any]]:
+        """Retorna os metadados em cache, ou None se ausentes ou desatualizados."""
+        fingerprint = self._fingerprint(path)
+        with self._lock:
+            entry = self._entries.get(self._key(path, media_type))
+            if fingerprint is not None and entry is not None and entry["fingerprint"] == fingerprint:
+                self.hits += 1
+                return dict(entry["metadata"])
+            self.misses += 1
+            return None
+
+    def put(self, path: str, media_type: str, metadata: Dict[str, Any]):
+        """Registra os metadados lidos de um arquivo existente."""
+        fingerprint = self._fingerprint(path)
+        if fingerprint is None:
+            return
+        with self._lock:
+            self._entries[self._key(path, media_type)] = {"fingerprint": fingerprint, "metadata": dict(metadata)}
+            self._dirty = True
+
+    def invalidate(self, path: Optional[str] = None):
+        """Remove as entradas de um arquivo, ou todo o cache se 'path' for None."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                suffix = f":{os.path.abspath(path)}"
+                for key in [k for k in self._entries if k.endswith(suffix)]:
+                    del self._entries[key]
+            self._dirty = True
+        self.save()
+
+    def save(self):
+        """Grava o índice em disco de forma atômica, se houver alterações."""
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"version": self.VERSION, "entries": self._entries}
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".media_metadata.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(payload, f)
+                os.replace(tmp_path, self.index_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self._dirty = False
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de acertos/falhas desde a criação do objeto e tamanho do índice."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
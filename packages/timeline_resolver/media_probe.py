@@ -0,0 +1,47 @@
+from typing import Any, Dict, Optional
+
+from PIL import Image
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+def probe_image(path: str) -> Dict[str, Any]:
+    """Lê apenas o cabeçalho da imagem; os pixels não são decodificados."""
+    with Image.open(path) as img:
+        width, height = img.size
+    return {'width': width, 'height': height, 'duration': None}
+
+def probe_video(path: str) -> Dict[str, Any]:
+    """
+    Uma única leitura dos metadados pelo ffmpeg, sem decodificar quadros.
+    Reproduz o que o VideoFileClip reporta: tamanho já rotacionado e a
+    duração de vídeo ('video_duration').
+    """
+    infos = ffmpeg_parse_infos(path, decode_file=False)
+    if not infos.get('video_found'):
+        raise IOError(f"Nenhuma trilha de vídeo encontrada em '{path}'.")
+    width, height = infos.get('video_size', (1, 1))
+    if abs(infos.get('video_rotation', 0)) in (90, 270):
+        width, height = height, width
+    return {'width': width, 'height': height, 'duration': infos.get('video_duration', 0.0)}
+
+def probe_audio(path: str) -> Dict[str, Any]:
+    """Uma única leitura dos metadados pelo ffmpeg, sem decodificar amostras."""
+    infos = ffmpeg_parse_infos(path, decode_file=False)
+    if not infos.get('audio_found'):
+        raise IOError(f"Nenhuma trilha de áudio encontrada em '{path}'.")
+    return {'width': None, 'height': None, 'duration': infos['duration']}
+
+PROBES = {
+    'image': probe_image,
+    'video': probe_video,
+    'audio': probe_audio,
+}
+
+def probe_media(path: str, media_type: str) -> Optional[Dict[str, Any]]:
+    """
+    Obtém largura, altura e duração de um arquivo de mídia sem abrir um clipe.
+    Retorna None para tipos sem sonda (ex: legendas).
+    """
+    probe = PROBES.get(media_type)
+    if probe is None:
+        return None
+    return probe(path)
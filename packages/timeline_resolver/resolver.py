@@ -1,13 +1,17 @@
-import re
+import ast
 import copy
 import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from graphlib import TopologicalSorter, CycleError
-from typing import Dict, Any, List, Set, Tuple
+from typing import Dict, Any, List, NamedTuple, Optional, Set, Tuple
 
-from video_model.models import Project, BaseElement
+from video_model.models import Project, BaseElement, RepeatGroup, ANIMATABLE_ATTRIBUTES
 from safe_expr_eval.evaluator import evaluate, InvalidExpressionError
-
-from moviepy import ImageClip, VideoFileClip, AudioFileClip
+from safe_expr_eval.vectorized import compile_time_expression, TimeFunction
+from .batch import evaluate_batch, vectorize
+from .media_cache import MediaMetadataCache
+from .media_probe import probe_media
 
 class ResolverError(Exception): pass
 class CircularDependencyError(ResolverError): pass
@@ -15,19 +19,122 @@ class AttributeReferenceError(ResolverError): pass
 
 log = logging.getLogger(__name__)
 
+# Prefixos de atributos dinâmicos: constante resolvida uma vez ou função do tempo.
+EXPR_PREFIX = 'expr:'
+TIME_EXPR_PREFIX = 'expr(t):'
+
+class ParsedExpression(NamedTuple):
+    """Expressão analisada uma única vez: texto reescrito e referências encontradas."""
+    source: str
+    transformed: str
+    # Chave achatada no contexto (ex: 'self_width') -> nó do grafo (ex: 'logo.width')
+    references: Dict[str, str]
+    is_time_expr: bool
+
+def split_expression(value: Any) -> Optional[Tuple[str, bool]]:
+    """
+    Separa o texto de um atributo dinâmico do seu prefixo.
+    Retorna (expressão, é_temporal) ou None se o valor não for uma expressão.
+    """
+    if not isinstance(value, str):
+        return None
+    if value.startswith(EXPR_PREFIX):
+        return value[len(EXPR_PREFIX):].strip(), False
+    if value.startswith(TIME_EXPR_PREFIX):
+        return value[len(TIME_EXPR_PREFIX):].strip(), True
+    return None
+
+def find_references(expression: str) -> List[Tuple[int, int, str]]:
+    """
+    Referências 'dono.atributo' da expressão, como (início, fim, referência),
+    com posições em caracteres. Vêm da árvore sintática: textos entre aspas
+    ('intro.mp4', 'www.site.com') não são referências. Expressões com erro de
+    sintaxe não têm referências; o erro aparece na avaliação.
+    """
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError:
+        return []
+    # As posições do ast são em bytes UTF-8 dentro de cada linha.
+    lines = expression.splitlines(keepends=True)
+    line_starts = [0]
+    for line in lines:
+        line_starts.append(line_starts[-1] + len(line))
+
+    def offset(lineno: int, col: int) -> int:
+        return line_starts[lineno - 1] + len(lines[lineno - 1].encode('utf-8')[:col].decode('utf-8'))
+
+    references = [
+        (offset(node.lineno, node.col_offset), offset(node.end_lineno, node.end_col_offset), f"{node.value.id}.{node.attr}")
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+    ]
+    return sorted(references)
+
+class ProjectParams:
+    """Expõe o dicionário 'params' do projeto como atributos ('params.preco') para o grafo."""
+    __slots__ = ('_values',)
+
+    def __init__(self, values: Dict[str, Any]):
+        object.__setattr__(self, '_values', values)
+
+    def __getattr__(self, attr: str) -> Any:
+        try:
+            return self._values[attr]
+        except KeyError:
+            raise AttributeError(attr) from None
+
+    def __setattr__(self, attr: str, value: Any):
+        self._values[attr] = value
+
 class Resolver:
-    def __init__(self, project: Project):
+    def __init__(self, project: Project, media_cache: Optional[MediaMetadataCache] = None, hydration_workers: int = 1):
         if not isinstance(project, Project):
             raise TypeError("O objeto fornecido ao Resolver deve ser do tipo Project.")
         
         self.raw_project = project
-        self.resolved_project = copy.deepcopy(project)
+        # Cache persistente de metadados de mídia (opcional); sem ele, os arquivos são sempre abertos.
+        self.media_cache = media_cache
+        # Quantidade de arquivos de mídia lidos simultaneamente durante a hidratação.
+        self.hydration_workers = hydration_workers
+        # Cópia rasa com lista própria: os elementos são compartilhados com o projeto
+        # original e só são copiados na primeira escrita (ver _writable_element).
+        # Estruturas aninhadas (filters, font, keyframes...) continuam compartilhadas
+        # e devem ser tratadas como somente leitura.
+        self.resolved_project = copy.copy(project)
+        self.resolved_project.elements = list(project.elements)
+        self.resolved_project.params = dict(project.params)
+        self.params_owner = ProjectParams(self.resolved_project.params)
+        self._element_positions: Dict[int, int] = {id(el): i for i, el in enumerate(project.elements)}
+        self._owned_elements: Set[int] = set()
         self.graph = TopologicalSorter()
         self.resolved_values: Dict[str, Any] = {}
-        self.ref_pattern = re.compile(r'([a-zA-Z_][a-zA-Z_0-9]*\.[a-zA-Z_][a-zA-Z_0-9]*)')
+        self.expressions: Dict[str, ParsedExpression] = {}
+        # Grafo retido após resolve() para permitir atualizações incrementais
+        self.dependencies: Dict[str, Set[str]] = {}
+        self.dependents: Dict[str, Set[str]] = {}
+        self.order: List[str] = []
+        self._order_index: Dict[str, int] = {}
+        self._resolved = False
+        # Índice nome -> elemento, montado uma vez para buscas O(1)
+        self.elements_by_name: Dict[str, BaseElement] = {
+            el.name: el for el in self.resolved_project.elements if el.name
+        }
+        # Famílias geradas por 'repeat': cada atributo dinâmico é um único nó
+        # ('grade.x'), avaliado de uma vez para todos os membros.
+        self.repeats: Dict[str, RepeatGroup] = {group.name: group for group in project.repeats}
+        self._repeat_members: Dict[str, RepeatGroup] = {}
+        for group in self.repeats.values():
+            if group.name in self.elements_by_name:
+                raise ResolverError(f"O nome '{group.name}' é usado por um 'repeat' e por um elemento.")
+            for position in range(group.count):
+                self._repeat_members[group.member_name(position)] = group
+        # Valores por membro dos nós de família com expressão
+        self.repeat_columns: Dict[str, np.ndarray] = {}
 
     def resolve(self) -> Project:
         """Orquestra o processo completo de resolução da timeline."""
+        self._resolve_media_paths()
         log.info("Iniciando resolução de hidratação...")
         self._hydrate_missing_attributes()
         log.info("Iniciando resolução de dependências...")
@@ -35,171 +142,501 @@ class Resolver:
         log.debug("Grafo de dependências construído.")
         log.info("Calculando valores dinâmicos...")
         self._calculate_resolved_values()
+        self._resolved = True
         log.info("Resolução da timeline concluída.")
         return self.resolved_project
 
     def _get_node_name(self, owner_name: str, attr: str) -> str:
         return f"{owner_name}.{attr}"
     
+    def _resolve_media_paths(self):
+        """
+        Resolve caminhos definidos por expressão (ex: 'path: expr: params.clip')
+        antes da hidratação, que precisa do arquivo real. Esses caminhos só
+        podem depender de parâmetros do projeto.
+        """
+        for element in self.resolved_project.elements:
+            parsed_expression = self._parse_media_path(element)
+            if parsed_expression is None:
+                continue
+            for dependency in parsed_expression.references.values():
+                if dependency not in self.resolved_values:
+                    self._evaluate_node(dependency)
+            try:
+                path = evaluate(parsed_expression.transformed, self._build_context(parsed_expression))
+            except InvalidExpressionError as e:
+                raise ResolverError(f"Erro na expressão para '{element.name}.path': {e}") from e
+            setattr(self._writable_element(element), 'path', path)
+
+    def _parse_media_path(self, element: BaseElement) -> Optional[ParsedExpression]:
+        """Analisa o 'path' do elemento se ele for uma expressão que depende apenas de 'params'."""
+        parsed_expression = self._parse_attribute_value(element.name, 'path', getattr(element, 'path', None))
+        if parsed_expression is None:
+            return None
+        if any(not dependency.startswith('params.') for dependency in parsed_expression.references.values()):
+            raise ResolverError(f"'{element.name}.path' só pode depender de parâmetros ('params.nome').")
+        return parsed_expression
+
     def _hydrate_missing_attributes(self):
         """
         Pré-analisa os elementos de mídia e preenche width, height e media_duration
         se eles não estiverem definidos no YAML.
         """
         log.info("Hidratando projeto: lendo metadados de arquivos de mídia...")
-        for element in self.resolved_project.elements:
-            if not hasattr(element, 'path') or not element.path:
-                continue
+        media_elements = [
+            el for el in self.resolved_project.elements
+            if hasattr(el, 'path') and el.path and split_expression(el.path) is None
+        ]
+        # Cada arquivo é lido uma única vez, mesmo se usado por vários elementos.
+        sources = list(dict.fromkeys((el.path, el.type) for el in media_elements))
+        results = dict(zip(sources, self._read_all_media_metadata(sources)))
+
+        # Aplicação sequencial, na ordem do projeto: resultado e avisos determinísticos.
+        for element in media_elements:
+            metadata, error = results[(element.path, element.type)]
+            if error is not None:
+                log.warning(f"Não foi possível ler metadados do arquivo {element.path}: {error}")
+            elif metadata is not None:
+                self._apply_media_metadata(self._writable_element(element), metadata)
+
+        if self.media_cache is not None:
+            self.media_cache.save()
+            log.debug(f"Cache de metadados: {self.media_cache.stats()}")
+        log.info("Hidratação do projeto concluída.")
 
+    def _read_all_media_metadata(self, sources: List[Tuple[str, str]]) -> List[Tuple[Optional[Dict[str, Any]], Optional[Exception]]]:
+        """Lê os metadados de cada (path, tipo), em paralelo se hydration_workers > 1."""
+        def read(source):
             try:
-                clip = None
-                if element.type == 'video':
-                    clip = VideoFileClip(element.path)
-                elif element.type == 'image':
-                    clip = ImageClip(element.path)
-                elif element.type == 'audio':
-                    clip = AudioFileClip(element.path)
-                
-                if not clip:
-                    continue
-
-                if hasattr(clip, 'size'):                    
-                    element.media_width = clip.size[0]
-                    element.media_height = clip.size[1]
-                    log.debug(f"  > Elemento '{element.name}': 'media_width' e 'media_height' hidratados para {clip.size}")
-                
-                if hasattr(element, 'width') and element.width is None and hasattr(clip, 'size'):
-                    element.width = clip.size[0]
-                    log.debug(f"  > Elemento '{element.name}': 'width' hidratado para {element.width}px")
-                
-                if hasattr(element, 'height') and element.height is None and hasattr(clip, 'size'):
-                    element.height = clip.size[1]
-                    log.debug(f"  > Elemento '{element.name}': 'height' hidratado para {element.height}px")
-                
-                if hasattr(element, 'media_duration') and element.media_duration is None and hasattr(clip, 'duration'):
-                    element.media_duration = clip.duration
-                    log.debug(f"  > Elemento '{element.name}': 'media_duration' hidratado para {element.media_duration}s")
-                
-                if hasattr(clip, 'close'):
-                    clip.close()
-                    
+                return self._get_media_metadata(*source), None
             except Exception as e:
-                log.warning(f"Não foi possível ler metadados do arquivo {element.path}: {e}")
-        log.info("Hidratação do projeto concluída.")
+                return None, e
+
+        if self.hydration_workers <= 1 or len(sources) <= 1:
+            return [read(source) for source in sources]
+        with ThreadPoolExecutor(max_workers=min(self.hydration_workers, len(sources))) as executor:
+            return list(executor.map(read, sources))
+
+    def _get_media_metadata(self, path: str, media_type: str) -> Optional[Dict[str, Any]]:
+        """Consulta o cache persistente antes de ler o arquivo de mídia."""
+        if self.media_cache is not None:
+            metadata = self.media_cache.get(path, media_type)
+            if metadata is not None:
+                return metadata
+        metadata = self._read_media_metadata(path, media_type)
+        if metadata is not None and self.media_cache is not None:
+            self.media_cache.put(path, media_type, metadata)
+        return metadata
+
+    def _read_media_metadata(self, path: str, media_type: str) -> Optional[Dict[str, Any]]:
+        """Lê tamanho e duração pelo cabeçalho do arquivo, sem abrir um clipe."""
+        return probe_media(path, media_type)
+
+    def _apply_media_metadata(self, element: BaseElement, metadata: Dict[str, Any]):
+        """Preenche os atributos de mídia ainda não definidos no elemento."""
+        has_size = metadata.get('width') is not None and metadata.get('height') is not None
+        if has_size:
+            element.media_width = metadata['width']
+            element.media_height = metadata['height']
+            log.debug(f"  > Elemento '{element.name}': 'media_width' e 'media_height' hidratados para {(element.media_width, element.media_height)}")
+
+        if hasattr(element, 'width') and element.width is None and has_size:
+            element.width = metadata['width']
+            log.debug(f"  > Elemento '{element.name}': 'width' hidratado para {element.width}px")
+
+        if hasattr(element, 'height') and element.height is None and has_size:
+            element.height = metadata['height']
+            log.debug(f"  > Elemento '{element.name}': 'height' hidratado para {element.height}px")
+
+        if hasattr(element, 'media_duration') and element.media_duration is None and metadata.get('duration') is not None:
+            element.media_duration = metadata['duration']
+            log.debug(f"  > Elemento '{element.name}': 'media_duration' hidratado para {element.media_duration}s")
 
     def _build_dependency_graph(self):        
-        all_elements = {el.name: el for el in self.resolved_project.elements if el.name}
+        all_elements = self.elements_by_name
         attributes_to_scan: List[Tuple[str, object, str]] = []
         for attr in ['width', 'height', 'duration']:
             attributes_to_scan.append(('video', self.resolved_project, attr))
+        attrs_to_check = [
+            'start', 'end', 'x', 'y', 'width', 'height', 
+            'opacity', 'rotation', 'media_duration', 
+            'media_width', 'media_height', 'max_width',
+            'text', 'color'
+        ]            
         for el_name, element in all_elements.items():
-            attrs_to_check = [
-                'start', 'end', 'x', 'y', 'width', 'height', 
-                'opacity', 'rotation', 'media_duration', 
-                'media_width', 'media_height', 'max_width'
-            ]            
+            if el_name in self._repeat_members:
+                continue
             for attr in attrs_to_check:
                 attributes_to_scan.append((el_name, element, attr))
+        # Os membros de um 'repeat' compartilham os valores do YAML: basta varrer o primeiro.
+        for group in self.repeats.values():
+            if group.count:
+                for attr in attrs_to_check:
+                    attributes_to_scan.append((group.name, self.resolved_project.elements[group.first], attr))
 
         for owner_name, owner_obj, attr in attributes_to_scan:
             node_name = self._get_node_name(owner_name, attr)
             value = getattr(owner_obj, attr, None)
-            
-            if isinstance(value, str) and value.startswith('expr:'):
-                expression = value[5:].strip()
-                dependencies = self._find_dependencies(expression, owner_name)
+            parsed_expression = self._parse_attribute_value(owner_name, attr, value)
+
+            if parsed_expression:
+                self.expressions[node_name] = parsed_expression
+                dependencies = set(parsed_expression.references.values())
                 self.graph.add(node_name, *dependencies)
-            else:
-                self.graph.add(node_name)
-                self.resolved_values[node_name] = value
-
-    def _find_dependencies(self, expression: str, current_element_name: str) -> Set[str]:        
-        raw_refs = self.ref_pattern.findall(expression)
-        dependencies = set()
-        safe_functions = {'max', 'min'}
-        for ref in raw_refs:
-            if ref in safe_functions:
-                continue
-            if ref.startswith('self.'):
-                dep_name = ref.replace('self', current_element_name, 1)
-                dependencies.add(dep_name)
-            else:
-                dependencies.add(ref)
-        return dependencies
+                self._set_dependencies(node_name, dependencies)
+            # Atributos literais só entram no grafo quando alguma expressão os
+            # referencia (ver _evaluate_node): o custo acompanha o número de expressões.
+
+        if self._repeat_members:
+            for parsed_expression in list(self.expressions.values()):
+                for dependency in parsed_expression.references.values():
+                    family_node = self._link_repeat_member(dependency)
+                    if family_node:
+                        self.graph.add(dependency, family_node)
+
+    def _link_repeat_member(self, node_name: str) -> Optional[str]:
+        """
+        Uma referência a um membro ('grade_3.x') passa a depender do nó da
+        família ('grade.x') quando esse atributo é calculado por expressão.
+        Retorna o nó da família ligado, se houver.
+        """
+        owner_name, _, attr = node_name.partition('.')
+        group = self._repeat_members.get(owner_name)
+        if group is None or node_name in self.dependencies:
+            return None
+        family_node = self._get_node_name(group.name, attr)
+        if family_node not in self.expressions:
+            return None
+        self._set_dependencies(node_name, {family_node})
+        return family_node
+
+    def _parse_attribute_value(self, owner_name: str, attr: str, value: Any) -> Optional[ParsedExpression]:
+        """Analisa o valor de um atributo se ele for uma expressão; caso contrário, None."""
+        parsed = split_expression(value)
+        if not parsed:
+            return None
+        expression, is_time_expr = parsed
+        if is_time_expr and (owner_name == 'video' or attr not in ANIMATABLE_ATTRIBUTES):
+            raise ResolverError(
+                f"'{self._get_node_name(owner_name, attr)}' não pode ser animado; expressões 'expr(t):' são aceitas apenas em {', '.join(ANIMATABLE_ATTRIBUTES)}."
+            )
+        return self._parse_expression(expression, owner_name, is_time_expr)
+
+    def _set_dependencies(self, node_name: str, dependencies: Set[str]):
+        """Atualiza as arestas do nó nos dois sentidos (dependências e dependentes)."""
+        for old_dependency in self.dependencies.get(node_name, ()):
+            self.dependents[old_dependency].discard(node_name)
+        self.dependencies[node_name] = dependencies
+        for dependency in dependencies:
+            self.dependents.setdefault(dependency, set()).add(node_name)
+
+    def _parse_expression(self, expression: str, current_element_name: str, is_time_expr: bool) -> ParsedExpression:
+        """
+        Analisa a expressão em uma única passada: encontra as referências
+        (dependências) e as reescreve para chaves de contexto achatadas.
+        Ex: 'self.width' e 'video.width' viram 'self_width' e 'video_width'.
+        """
+        references: Dict[str, str] = {}
+        parts = []
+        position = 0
+        for start, end, ref in find_references(expression):
+            owner_name, attr = ref.split('.', 1)
+            if owner_name == 'self':
+                owner_name = current_element_name
+            context_key = ref.replace('.', '_')
+            references[context_key] = self._get_node_name(owner_name, attr)
+            parts += [expression[position:start], context_key]
+            position = end
+        parts.append(expression[position:])
+        return ParsedExpression(expression, "".join(parts), references, is_time_expr)
 
     def _calculate_resolved_values(self):
+        self._set_order(self.graph)
+        for node_name in self.order:
+            if node_name in self.resolved_values:
+                continue
+            self._evaluate_node(node_name)
+
+    def _set_order(self, sorter: TopologicalSorter):
+        """Guarda a ordem topológica (e a posição de cada nó) para as atualizações."""
         try:
-            sorted_nodes = list(self.graph.static_order())
+            order = list(sorter.static_order())
         except CycleError as e:
             cycle = " -> ".join(e.args[1])
             raise CircularDependencyError(f"Dependência circular detectada: {cycle}") from e
+        self.order = order
+        self._order_index = {node_name: index for index, node_name in enumerate(order)}
 
-        for node_name in sorted_nodes:
-            if node_name in self.resolved_values:
-                continue
-            
-            owner_name, attr = node_name.split('.', 1)
-            owner_obj = self._get_owner_obj(owner_name)
-            expression_str = getattr(owner_obj, attr)
-            expression = expression_str[5:].strip()
-
-            context, transformed_expression = self._build_context_and_transform_expr(expression, owner_name)
-            
-            try:
-                resolved_value = evaluate(transformed_expression, context)
-            except InvalidExpressionError as e:
-                raise ResolverError(f"Erro na expressão para '{node_name}': {e}") from e
-
+    def _evaluate_node(self, node_name: str) -> Any:
+        """Calcula o valor de um nó a partir dos valores já resolvidos das dependências."""
+        owner_name, attr = node_name.split('.', 1)
+        if owner_name in self.repeats and node_name in self.expressions:
+            return self._evaluate_repeat_node(node_name, self.repeats[owner_name])
+        owner_obj = self._get_owner_obj(owner_name)
+        parsed_expression = self.expressions.get(node_name)
+        if parsed_expression is None:
+            # Referência a um atributo que não é varrido no grafo (ex: 'musica.volume')
+            if not hasattr(owner_obj, attr):
+                raise AttributeReferenceError(f"Atributo '{node_name}' referenciado em uma expressão não existe.")
+            resolved_value = getattr(owner_obj, attr)
             self.resolved_values[node_name] = resolved_value
-            setattr(owner_obj, attr, resolved_value)
+            return resolved_value
+
+        context = self._build_context(parsed_expression)
+        
+        try:
+            if parsed_expression.is_time_expr:
+                # Compilada uma vez; o renderer amostra todos os quadros em uma única chamada.
+                resolved_value = compile_time_expression(parsed_expression.transformed).bind(context)
+            else:
+                resolved_value = evaluate(parsed_expression.transformed, context)
+        except InvalidExpressionError as e:
+            raise ResolverError(f"Erro na expressão para '{node_name}': {e}") from e
+
+        self._store_value(node_name, resolved_value)
+        return resolved_value
+
+    def _evaluate_repeat_node(self, node_name: str, group: RepeatGroup) -> np.ndarray:
+        """
+        Avalia o atributo de uma família 'repeat' para todos os membros de uma
+        vez: a variável de índice e as dependências de outras famílias viram
+        arrays, e a expressão é vetorizada sempre que possível.
+        """
+        parsed_expression = self.expressions[node_name]
+        arrays, scalars = self._split_context(parsed_expression, self.repeat_columns)
+        for context_key, column in arrays.items():
+            if len(column) != group.count:
+                raise ResolverError(
+                    f"Erro na expressão para '{node_name}': '{parsed_expression.references[context_key]}' "
+                    f"tem {len(column)} valores, mas o 'repeat' '{group.name}' tem {group.count} elementos."
+                )
+        arrays[group.index] = np.arange(group.count)
+        resolved_value = evaluate_batch(
+            parsed_expression.transformed, parsed_expression.is_time_expr,
+            vectorize(parsed_expression.transformed, parsed_expression.is_time_expr),
+            arrays, scalars, group.count,
+            lambda position, e: ResolverError(
+                f"Erro na expressão para '{node_name}' (elemento '{group.member_name(position)}'): {e}"
+            ),
+        )
+        self._store_value(node_name, resolved_value)
+        return resolved_value
+
+    def _store_value(self, node_name: str, value: Any):
+        """Registra o valor resolvido de um nó e o grava no dono (ou em todos os membros da família)."""
+        self.resolved_values[node_name] = value
+        owner_name, attr = node_name.split('.', 1)
+        group = self.repeats.get(owner_name)
+        if group is None:
+            setattr(self._writable_owner(owner_name), attr, value)
+            return
+        if isinstance(value, np.ndarray):
+            self.repeat_columns[node_name] = value
+            values = value.tolist()
+        else:
+            self.repeat_columns.pop(node_name, None)
+            values = [value] * group.count
+        elements = self.resolved_project.elements
+        for position, member_value in enumerate(values):
+            setattr(self._writable_element(elements[group.first + position]), attr, member_value)
+
+    def update(self, node_name: str, value: Any) -> Set[str]:
+        """
+        Altera um atributo já resolvido (ex: update('intro.end', 12)) e recalcula
+        apenas os nós que dependem dele, na ordem topológica retida.
+        'value' pode ser um número ou uma nova expressão ('expr: ...').
+        Retorna os nomes dos elementos (ou 'video') cujos valores mudaram; em
+        famílias 'repeat', os membros afetados ('cell_0', 'cell_3', ...).
+        Se a atualização falhar, o estado anterior é restaurado e o erro propagado.
+        """
+        if not self._resolved:
+            raise ResolverError("update() exige que resolve() tenha sido executado antes.")
+        if node_name not in self._order_index:
+            self._attach_literal_node(node_name)
+
+        owner_name, attr = node_name.split('.', 1)
+        parsed_expression = self._parse_attribute_value(owner_name, attr, value)
+        previous_expression = self.expressions.get(node_name)
+        previous_dependencies = self.dependencies.get(node_name, set())
+        old_values = {node_name: self.resolved_values.get(node_name)}
+
+        try:
+            self._replace_expression(node_name, parsed_expression)
+            if parsed_expression is not None:
+                self._evaluate_node(node_name)
+            else:
+                self._store_value(node_name, value)
+
+            for dependent in self._collect_downstream(node_name):
+                old_values[dependent] = self.resolved_values.get(dependent)
+                self._evaluate_node(dependent)
+        except ResolverError:
+            self._replace_expression(node_name, previous_expression, previous_dependencies)
+            for restored_node, old_value in old_values.items():
+                self._store_value(restored_node, old_value)
+            raise
+
+        changed_owners: Set[str] = set()
+        for changed, old_value in old_values.items():
+            changed_owners.update(self._changed_owners(changed, old_value))
+        return changed_owners
+
+    def _changed_owners(self, node_name: str, old_value: Any) -> List[str]:
+        """Elementos cujo valor do nó mudou: o dono, ou os membros alterados de uma família."""
+        owner_name = node_name.split('.', 1)[0]
+        new_value = self.resolved_values.get(node_name)
+        group = self.repeats.get(owner_name)
+        if group is None:
+            return [] if self._same_value(old_value, new_value) else [owner_name]
+
+        def per_member(value: Any) -> List[Any]:
+            return value.tolist() if isinstance(value, np.ndarray) else [value] * group.count
+
+        return [
+            group.member_name(position)
+            for position, (old, new) in enumerate(zip(per_member(old_value), per_member(new_value)))
+            if not self._same_value(old, new)
+        ]
+
+    def _attach_literal_node(self, node_name: str):
+        """Inclui no grafo um atributo literal que nenhuma expressão referenciava."""
+        owner_name, _, attr = node_name.partition('.')
+        owner_obj = self._get_owner_obj(owner_name)
+        if not attr or not hasattr(owner_obj, attr):
+            raise AttributeReferenceError(f"Atributo '{node_name}' não faz parte da timeline resolvida.")
+        self.resolved_values[node_name] = getattr(owner_obj, attr)
+        self.dependencies[node_name] = set()
+        self._order_index[node_name] = len(self.order)
+        self.order.append(node_name)
+
+    def _replace_expression(self, node_name: str, parsed_expression: Optional[ParsedExpression],
+                            dependencies: Optional[Set[str]] = None):
+        """Troca a expressão de um nó, reordenando o grafo se as arestas mudarem."""
+        if dependencies is None:
+            dependencies = set(parsed_expression.references.values()) if parsed_expression else set()
+        if parsed_expression is not None:
+            self.expressions[node_name] = parsed_expression
+        else:
+            self.expressions.pop(node_name, None)
+        if dependencies == self.dependencies.get(node_name, set()):
+            return
+
+        self._set_dependencies(node_name, dependencies)
+        for dependency in dependencies:
+            self._link_repeat_member(dependency)
+        self._set_order(TopologicalSorter(self.dependencies))
+        for dependency in dependencies:
+            if dependency not in self.resolved_values:
+                self._evaluate_node(dependency)
+
+    def _collect_downstream(self, node_name: str) -> List[str]:
+        """Todos os nós que dependem, direta ou indiretamente, do nó informado, em ordem topológica."""
+        pending = [node_name]
+        visited: Set[str] = set()
+        while pending:
+            for dependent in self.dependents.get(pending.pop(), ()):
+                if dependent not in visited:
+                    visited.add(dependent)
+                    pending.append(dependent)
+        return sorted(visited, key=self._order_index.__getitem__)
+
+    @staticmethod
+    def _same_value(old_value: Any, new_value: Any) -> bool:
+        if isinstance(old_value, np.ndarray) or isinstance(new_value, np.ndarray):
+            return (isinstance(old_value, np.ndarray) and isinstance(new_value, np.ndarray)
+                    and np.array_equal(old_value, new_value))
+        if isinstance(old_value, TimeFunction) or isinstance(new_value, TimeFunction):
+            return old_value is new_value
+        return old_value == new_value
+
+    def _writable_element(self, element: BaseElement) -> BaseElement:
+        """
+        Devolve uma versão do elemento que pertence ao projeto resolvido,
+        copiando-o (de forma rasa) na primeira escrita.
+        """
+        if id(element) in self._owned_elements:
+            return element
+        position = self._element_positions.pop(id(element))
+        clone = copy.copy(element)
+        self.resolved_project.elements[position] = clone
+        if self.elements_by_name.get(element.name) is element:
+            self.elements_by_name[element.name] = clone
+        self._element_positions[id(clone)] = position
+        self._owned_elements.add(id(clone))
+        return clone
+
+    def _writable_owner(self, owner_name: str) -> Any:
+        """Como _get_owner_obj, mas garantindo que a escrita não altere o projeto original."""
+        owner_obj = self._get_owner_obj(owner_name)
+        if owner_obj is self.resolved_project or owner_obj is self.params_owner:
+            return owner_obj
+        return self._writable_element(owner_obj)
 
     def _get_owner_obj(self, owner_name: str) -> Any:
         """Busca o objeto dono de um atributo (Project ou um BaseElement)."""
         if owner_name == 'video':
             return self.resolved_project
+        if owner_name == 'params':
+            return self.params_owner
+        group = self.repeats.get(owner_name)
+        if group is not None and group.count:
+            # Atributos literais são iguais em todos os membros: lê do primeiro.
+            return self.resolved_project.elements[group.first]
         try:
-            return next(el for el in self.resolved_project.elements if el.name == owner_name)
-        except StopIteration:
+            return self.elements_by_name[owner_name]
+        except KeyError:
             raise AttributeReferenceError(f"Elemento '{owner_name}' referenciado em uma expressão não foi encontrado.")
 
-    def _build_context_and_transform_expr(self, expression: str, current_element_name: str) -> Tuple[Dict[str, Any], str]:
+    def _split_context(self, parsed_expression: ParsedExpression,
+                       columns: Dict[str, np.ndarray]) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        Contexto para avaliação em lote: dependências presentes em 'columns'
+        (um valor por item) viram arrays; as demais usam o valor já resolvido.
+        """
+        expression = parsed_expression.source
+        arrays: Dict[str, np.ndarray] = {}
+        scalars: Dict[str, Any] = {}
+        for context_key, node_name in parsed_expression.references.items():
+            column = columns.get(node_name)
+            if column is None:
+                value = self.resolved_values[node_name]
+                check_dependency_value(node_name, expression, value)
+                scalars[context_key] = value
+                continue
+            if column.dtype == object:
+                for value in column:
+                    check_dependency_value(node_name, expression, value)
+            arrays[context_key] = column
+        return arrays, scalars
+
+    def _build_context(self, parsed_expression: ParsedExpression) -> Dict[str, Any]:
         """
-        Cria o contexto e transforma a expressão para usar chaves de contexto achatadas.
-        Ex: 'self.width' e 'video.width' são transformados para 'self_width' e 'video_width'.
+        Monta o contexto com os valores já resolvidos das dependências.
         Também verifica se alguma dependência tem o valor None.
         """
+        expression = parsed_expression.source
         context = {}
-        transformed_expression = expression
-        
-        # Encontra todas as referências originais na expressão (ex: 'self.width')
-        original_refs = self._find_raw_refs(expression)
-
-        for ref in original_refs:
-            # Converte a referência para um nome de nó concreto (ex: 'self.width' -> 'logo.width')
-            node_name = ref.replace('self', current_element_name, 1)
-            
+        for context_key, node_name in parsed_expression.references.items():
             if node_name not in self.resolved_values:
                 raise ResolverError(f"Dependência '{node_name}' não foi resolvida a tempo para a expressão '{expression}'.")
 
             resolved_value = self.resolved_values[node_name]
-            
-            # **NOVA VERIFICAÇÃO**: Garante que não estamos usando um valor Nulo em cálculos.
-            if resolved_value is None:
-                raise AttributeReferenceError(
-                    f"Atributo '{node_name}' referenciado na expressão '{expression}' não foi definido ou não tem valor."
-                )
-            
-            # Cria uma chave segura para o contexto (ex: 'self_width')
-            context_key = ref.replace('.', '_')
+            check_dependency_value(node_name, expression, resolved_value)
             context[context_key] = resolved_value
-            
-            # Substitui a referência original na expressão pela chave segura
-            transformed_expression = transformed_expression.replace(ref, context_key)
-            
-        return context, transformed_expression
-
-    def _find_raw_refs(self, expression: str) -> Set[str]:
-        """Encontra as referências brutas, incluindo 'self'."""
-        refs = self.ref_pattern.findall(expression)
-        safe_functions = {'max', 'min'}
-        return {ref for ref in refs if ref not in safe_functions}
\ No newline at end of file
+        return context
+
+def check_dependency_value(node_name: str, expression: str, value: Any):
+    """Garante que o valor de uma dependência pode ser usado em uma expressão."""
+    # Garante que não estamos usando um valor Nulo em cálculos.
+    if value is None:
+        raise AttributeReferenceError(
+            f"Atributo '{node_name}' referenciado na expressão '{expression}' não foi definido ou não tem valor."
+        )
+    if isinstance(value, TimeFunction):
+        raise AttributeReferenceError(
+            f"Atributo '{node_name}' referenciado na expressão '{expression}' varia com o tempo e não pode ser usado em outra expressão."
+        )
+    if isinstance(value, np.ndarray):
+        raise AttributeReferenceError(
+            f"Atributo '{node_name}' referenciado na expressão '{expression}' tem um valor por elemento do 'repeat'; referencie um membro (ex: '{node_name.replace('.', '_0.', 1)}')."
+        )
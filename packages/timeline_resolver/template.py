@@ -0,0 +1,170 @@
+import copy
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+from video_model.models import Project
+from safe_expr_eval.vectorized import VectorizedExpression
+from .batch import evaluate_batch, to_column, vectorize
+from .media_cache import MediaMetadataCache
+from .resolver import Resolver, ResolverError, ParsedExpression
+
+log = logging.getLogger(__name__)
+
+# Atributos preenchidos pela hidratação; variam quando o 'path' depende de parâmetros.
+HYDRATED_ATTRIBUTES = ('media_width', 'media_height', 'media_duration', 'width', 'height')
+
+class ProjectTemplate:
+    """
+    Projeto parametrizado ('params:' no YAML) compilado uma única vez.
+    Os nós que não dependem de parâmetros são resolvidos na compilação; a
+    cada lote de variantes, apenas os nós restantes são avaliados, uma vez
+    por nó e sobre arrays com os valores de todas as variantes.
+    """
+    def __init__(self, project: Project, media_cache: Optional[MediaMetadataCache] = None, hydration_workers: int = 1):
+        self.project = project
+        self._resolver = resolver = Resolver(project, media_cache=media_cache, hydration_workers=hydration_workers)
+
+        # Caminhos que dependem de parâmetros só são conhecidos (e hidratados) em bind.
+        self.path_expressions: Dict[str, ParsedExpression] = {}
+        for element in resolver.resolved_project.elements:
+            parsed_expression = resolver._parse_media_path(element)
+            if parsed_expression is None:
+                continue
+            if not element.name:
+                raise ResolverError("Elementos com 'path' parametrizado precisam de um 'name'.")
+            self.path_expressions[element.name] = parsed_expression
+
+        resolver._hydrate_missing_attributes()
+        resolver._build_dependency_graph()
+        resolver._set_order(resolver.graph)
+
+        # Atributos hidratados por variante: os não definidos no YAML (nem por expressão).
+        self.hydrated_attributes: Dict[str, List[str]] = {
+            name: [
+                attr for attr in HYDRATED_ATTRIBUTES
+                if hasattr(resolver.elements_by_name[name], attr)
+                and getattr(resolver.elements_by_name[name], attr) is None
+            ]
+            for name in self.path_expressions
+        }
+        variant: Set[str] = {
+            f"{name}.{attr}" for name, attrs in self.hydrated_attributes.items() for attr in attrs + ['path']
+        }
+        for name, parsed_expression in self.path_expressions.items():
+            for dependency in parsed_expression.references.values():
+                resolver._evaluate_node(dependency)
+
+        # Nós invariantes são resolvidos agora e compartilhados por todas as variantes.
+        self.variant_order: List[str] = []
+        for node_name in resolver.order:
+            is_param = node_name.startswith('params.')
+            if is_param:
+                # Valida a referência (o parâmetro precisa estar declarado em 'params').
+                resolver._evaluate_node(node_name)
+            if is_param or node_name in variant or resolver.dependencies.get(node_name, set()) & variant:
+                variant.add(node_name)
+                if node_name.split('.', 1)[0] in resolver.repeats:
+                    raise ResolverError(f"'{node_name}' pertence a um 'repeat' e não pode depender de parâmetros do template.")
+                if node_name in resolver.expressions:
+                    self.variant_order.append(node_name)
+            elif node_name not in resolver.resolved_values:
+                resolver._evaluate_node(node_name)
+
+        self.vectorized: Dict[str, Optional[VectorizedExpression]] = {
+            node_name: vectorize(resolver.expressions[node_name].transformed, resolver.expressions[node_name].is_time_expr)
+            for node_name in self.variant_order
+        }
+        self.base_project = resolver.resolved_project
+
+    @property
+    def param_names(self) -> List[str]:
+        return list(self.project.params)
+
+    def bind_table(self, param_sets: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Resolve um lote de variantes. Retorna uma tabela colunar: para cada nó
+        que varia ('params.nome', 'elemento.atributo'), um array com o valor
+        de cada variante, na ordem de 'param_sets'.
+        """
+        unknown = set().union(*param_sets) - set(self.project.params) if param_sets else set()
+        if unknown:
+            raise ResolverError(f"Parâmetros não declarados em 'params': {', '.join(sorted(unknown))}")
+        count = len(param_sets)
+        columns: Dict[str, np.ndarray] = {
+            f"params.{name}": to_column([param_set.get(name, default) for param_set in param_sets])
+            for name, default in self.project.params.items()
+        }
+        self._hydrate_variants(columns, count)
+        for node_name in self.variant_order:
+            columns[node_name] = self._evaluate_variant_node(
+                node_name, self._resolver.expressions[node_name], columns, count, self.vectorized[node_name]
+            )
+        return columns
+
+    def bind(self, param_sets: Sequence[Dict[str, Any]]) -> List[Project]:
+        """
+        Resolve um lote de variantes e devolve um projeto resolvido para cada uma.
+        Elementos que não dependem de parâmetros são compartilhados entre os projetos.
+        """
+        table = self.bind_table(param_sets)
+        writes: Dict[str, List[str]] = {}
+        for node_name in table:
+            owner_name, attr = node_name.split('.', 1)
+            writes.setdefault(owner_name, []).append(attr)
+        values = {node_name: column.tolist() for node_name, column in table.items()}
+        positions = {el.name: i for i, el in enumerate(self.base_project.elements) if el.name}
+
+        projects = []
+        for index in range(len(param_sets)):
+            project = copy.copy(self.base_project)
+            project.elements = list(self.base_project.elements)
+            # Valores originais do lote, sem a conversão de tipo feita nas colunas.
+            project.params = {**self.base_project.params, **param_sets[index]}
+            for owner_name, attrs in writes.items():
+                if owner_name == 'params':
+                    continue
+                if owner_name == 'video':
+                    owner = project
+                else:
+                    owner = copy.copy(project.elements[positions[owner_name]])
+                    project.elements[positions[owner_name]] = owner
+                for attr in attrs:
+                    setattr(owner, attr, values[f"{owner_name}.{attr}"][index])
+            projects.append(project)
+        return projects
+
+    def _hydrate_variants(self, columns: Dict[str, np.ndarray], count: int):
+        """Resolve os caminhos parametrizados e lê cada arquivo distinto uma única vez."""
+        resolver = self._resolver
+        for name, parsed_expression in self.path_expressions.items():
+            columns[f"{name}.path"] = self._evaluate_variant_node(f"{name}.path", parsed_expression, columns, count)
+            paths = columns[f"{name}.path"].tolist()
+
+            element = resolver.elements_by_name[name]
+            attrs = self.hydrated_attributes[name]
+            sources = list(dict.fromkeys((path, element.type) for path in paths))
+            hydrated = {}
+            for source, (metadata, error) in zip(sources, resolver._read_all_media_metadata(sources)):
+                clone = copy.copy(element)
+                if error is not None:
+                    log.warning(f"Não foi possível ler metadados do arquivo {source[0]}: {error}")
+                elif metadata is not None:
+                    resolver._apply_media_metadata(clone, metadata)
+                hydrated[source] = [getattr(clone, attr) for attr in attrs]
+            for position, attr in enumerate(attrs):
+                columns[f"{name}.{attr}"] = to_column([hydrated[(path, element.type)][position] for path in paths])
+
+        if resolver.media_cache is not None:
+            resolver.media_cache.save()
+
+    def _evaluate_variant_node(self, node_name: str, parsed_expression: ParsedExpression,
+                               columns: Dict[str, np.ndarray], count: int,
+                               vectorized: Optional[VectorizedExpression] = None) -> np.ndarray:
+        """Avalia um nó para todas as variantes: vetorizado quando possível, senão uma a uma."""
+        arrays, scalars = self._resolver._split_context(parsed_expression, columns)
+        return evaluate_batch(
+            parsed_expression.transformed, parsed_expression.is_time_expr, vectorized, arrays, scalars, count,
+            lambda index, e: ResolverError(f"Erro na expressão para '{node_name}' (variante {index}): {e}"),
+        )
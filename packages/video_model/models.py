@@ -4,7 +4,13 @@ from typing import List, Dict, Any, Union
 
 DynamicValue = Union[float, int, str]
 
-@dataclass
+# Atributos que podem variar ao longo do tempo (ex: 'expr(t): 100 + 50*sin(t)' ou 'keyframes')
+ANIMATABLE_ATTRIBUTES = ('x', 'y', 'opacity', 'rotation')
+
+# Interpolações aceitas entre um keyframe e o seguinte
+KEYFRAME_EASINGS = ('linear', 'ease', 'step')
+
+@dataclass(slots=True)
 class BaseElement:
     # Argumentos que DEVEM ser passados pela posição
     name: str
@@ -26,40 +32,42 @@ class BaseElement:
     opacity: DynamicValue = 1.0
     rotation: DynamicValue = 0
     filters: List[Dict[str, Any]] = field(default_factory=list)
+    # Ex: {'x': [{'t': 0, 'value': 0}, {'t': 1, 'value': 300, 'easing': 'ease'}]}
+    keyframes: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
 
-@dataclass
+@dataclass(slots=True)
 class ImageElement(BaseElement):
     # 'path' se torna um argumento apenas-nomeado por causa da herança
     path: str
     type: str = field(default="image", init=False)
     
-@dataclass
+@dataclass(slots=True)
 class VideoElement(BaseElement):
     path: str
     type: str = field(default="video", init=False)
     volume: DynamicValue = 1.0
     loop: bool = False
 
-@dataclass
+@dataclass(slots=True)
 class AudioElement(BaseElement):
     path: str    
     type: str = field(default="audio", init=False)
     volume: DynamicValue = 1.0
     loop: bool = False
 
-@dataclass
+@dataclass(slots=True)
 class RectangleElement(BaseElement):
     type: str = field(default="rectangle", init=False)    
     color: str = "#FFFFFF"
     corner_radius: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class TextElement(BaseElement):
     text: str
     type: str = field(default="text", init=False)    
     font: Dict[str, Any] = field(default_factory=dict)
 
-@dataclass
+@dataclass(slots=True)
 class SubtitleElement(BaseElement):
     path: str    
     type: str = field(default="subtitles", init=False)
@@ -73,7 +81,26 @@ class SubtitleElement(BaseElement):
     timing: Dict[str, Any] = field(default_factory=dict)
     word_background: Dict[str, Any] = field(default_factory=dict)
 
-@dataclass
+# Chaves aceitas no bloco 'repeat' do YAML
+REPEAT_KEYS = ("count", "index")
+
+@dataclass(slots=True)
+class RepeatGroup:
+    """
+    Família de elementos gerada por um bloco 'repeat'. Os membros ocupam
+    posições consecutivas em Project.elements (a partir de 'first') e se
+    chamam '<name>_0', '<name>_1', ...; 'index' é o nome da variável com a
+    posição do membro nas expressões (ex: 'x: expr: i * 100').
+    """
+    name: str
+    count: int
+    first: int
+    index: str = "i"
+
+    def member_name(self, position: int) -> str:
+        return f"{self.name}_{position}"
+
+@dataclass(slots=True)
 class Project:
     width: DynamicValue
     height: DynamicValue
@@ -81,25 +108,60 @@ class Project:
     _: KW_ONLY
     background_color: str = "#000000"
     elements: List[BaseElement] = field(default_factory=list)
+    # Parâmetros do template e seus valores padrão, referenciados como 'params.nome'
+    params: Dict[str, Any] = field(default_factory=dict)
+    # Famílias de elementos geradas por 'repeat' (ver RepeatGroup)
+    repeats: List[RepeatGroup] = field(default_factory=list)
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Project':
-        ELEMENT_TYPE_MAP = {
-            "image": ImageElement, "video": VideoElement, "audio": AudioElement,
-            "rectangle": RectangleElement, "text": TextElement, "subtitles": SubtitleElement
-        }
+        """
+        Cria o projeto a partir do dicionário lido do YAML. 'data' não é
+        alterado: pode ser reaproveitado sem cópia (estruturas aninhadas como
+        'filters' e 'font' são compartilhadas com os elementos).
+        """
         element_objects = []
+        repeats = []
         for el_data in data.get("elements", []):
-            el_type_str = el_data.pop("type", None)
-            
-            if not el_type_str or el_type_str not in ELEMENT_TYPE_MAP:
+            el_type_str = el_data.get("type")
+            ElementClass = ELEMENT_TYPES.get(el_type_str) if isinstance(el_type_str, str) else None
+            if ElementClass is None:
                 raise ValueError(f"Tipo de elemento desconhecido ou não especificado: {el_type_str}")
-            
-            ElementClass = ELEMENT_TYPE_MAP[el_type_str]
-            element_objects.append(ElementClass(**el_data))
+
+            el_kwargs = dict(el_data)
+            del el_kwargs["type"]
+            repeat = el_kwargs.pop("repeat", None)
+            if repeat is None:
+                element_objects.append(ElementClass(**el_kwargs))
+                continue
+
+            # 'repeat: 100' ou 'repeat: {count: 100, index: col}'
+            repeat_options = repeat if isinstance(repeat, dict) else {"count": repeat}
+            unknown = set(repeat_options) - set(REPEAT_KEYS)
+            if unknown or "count" not in repeat_options:
+                raise ValueError(
+                    f"'repeat' do elemento '{el_kwargs.get('name')}' aceita apenas {', '.join(REPEAT_KEYS)} "
+                    f"(com 'count' obrigatório): {repeat}"
+                )
+            group = RepeatGroup(name=el_kwargs.get("name"), first=len(element_objects), **repeat_options)
+            if not group.name:
+                raise ValueError("Elementos com 'repeat' precisam de um 'name'.")
+            if not isinstance(group.count, int) or group.count < 0:
+                raise ValueError(f"'repeat' do elemento '{group.name}' deve ser um inteiro não negativo: {group.count}")
+            for position in range(group.count):
+                el_kwargs["name"] = group.member_name(position)
+                element_objects.append(ElementClass(**el_kwargs))
+            repeats.append(group)
         
         project_data = {k: v for k, v in data.items() if k != "elements"}        
         
         project_data['elements'] = element_objects
+        project_data['repeats'] = repeats
         
-        return cls(**project_data)
\ No newline at end of file
+        return cls(**project_data)
+
+# Tabela de construtores usada por Project.from_dict, indexada pelo 'type' do YAML
+ELEMENT_TYPES: Dict[str, type] = {
+    "image": ImageElement, "video": VideoElement, "audio": AudioElement,
+    "rectangle": RectangleElement, "text": TextElement, "subtitles": SubtitleElement
+}
@@ -0,0 +1,103 @@
+import math
+from typing import Any, Dict, List
+
+import numpy as np
+
+from video_model.models import BaseElement, ANIMATABLE_ATTRIBUTES, KEYFRAME_EASINGS
+from safe_expr_eval.vectorized import TimeFunction
+
+class FrameTrack:
+    """
+    Valores de um atributo pré-calculados para cada quadro do elemento.
+    Durante a renderização, cada consulta é apenas um acesso por índice.
+    """
+    __slots__ = ('values', 'fps')
+
+    def __init__(self, values: np.ndarray, fps: float):
+        self.values = values
+        self.fps = fps
+
+    def __call__(self, t: float) -> float:
+        # O epsilon evita que 't = n / fps' caia no quadro anterior por arredondamento.
+        index = int(t * self.fps + 1e-6)
+        if index < 0:
+            index = 0
+        elif index >= len(self.values):
+            index = len(self.values) - 1
+        return float(self.values[index])
+
+def frame_times(duration: float, fps: float) -> np.ndarray:
+    """Instantes de cada quadro, relativos ao início do elemento."""
+    count = max(1, math.ceil(duration * fps))
+    return np.arange(count, dtype=float) / fps
+
+def sample_keyframes(keyframes: List[Dict[str, Any]], times: np.ndarray) -> np.ndarray:
+    """
+    Interpola uma lista de keyframes ({'t', 'value', 'easing'}) em todos os
+    instantes de uma vez. O 'easing' de um keyframe define como o valor chega
+    até ele a partir do anterior; antes do primeiro e depois do último o valor
+    fica constante.
+    """
+    if not keyframes:
+        raise ValueError("A lista de keyframes não pode ser vazia.")
+    key_times = np.array([float(k['t']) for k in keyframes])
+    key_values = np.array([float(k['value']) for k in keyframes])
+    if np.any(np.diff(key_times) <= 0):
+        raise ValueError("Os instantes 't' dos keyframes devem ser estritamente crescentes.")
+    easings = [k.get('easing', 'linear') for k in keyframes]
+    for easing in easings:
+        if easing not in KEYFRAME_EASINGS:
+            raise ValueError(f"Easing de keyframe desconhecido: {easing}")
+    if len(keyframes) == 1:
+        return np.full(times.shape, key_values[0])
+
+    # Índice do keyframe que encerra o segmento de cada instante.
+    end = np.clip(np.searchsorted(key_times, times, side='right'), 1, len(keyframes) - 1)
+    start = end - 1
+    progress = np.clip((times - key_times[start]) / (key_times[end] - key_times[start]), 0.0, 1.0)
+
+    easing_of_segment = np.array(easings)[end]
+    eased = np.where(easing_of_segment == 'ease', progress * progress * (3 - 2 * progress), progress)
+    eased = np.where(easing_of_segment == 'step', np.floor(progress), eased)
+    return key_values[start] + (key_values[end] - key_values[start]) * eased
+
+def build_tracks(element: BaseElement, duration: float, fps: float) -> Dict[str, FrameTrack]:
+    """
+    Amostra de uma só vez, para todos os quadros, cada atributo animado do
+    elemento ('expr(t):' ou 'keyframes'). Atributos constantes não geram trilha.
+    """
+    functions = {
+        attr: value for attr in ANIMATABLE_ATTRIBUTES
+        if isinstance(value := getattr(element, attr, None), TimeFunction)
+    }
+    keyframes = getattr(element, 'keyframes', None) or {}
+    if not functions and not keyframes:
+        return {}
+
+    for attr in keyframes:
+        if attr not in ANIMATABLE_ATTRIBUTES:
+            raise ValueError(f"Atributo '{attr}' do elemento '{element.name}' não aceita keyframes.")
+        if attr in functions:
+            raise ValueError(f"Atributo '{attr}' do elemento '{element.name}' tem 'expr(t):' e keyframes ao mesmo tempo.")
+
+    times = frame_times(duration, fps)
+    # float32 basta para pixels, graus e opacidade e ocupa metade da memória.
+    tracks = {attr: FrameTrack(function(times).astype(np.float32), fps) for attr, function in functions.items()}
+    for attr, track_keyframes in keyframes.items():
+        tracks[attr] = FrameTrack(sample_keyframes(track_keyframes, times).astype(np.float32), fps)
+    return tracks
+
+def position_function(x, y):
+    """Combina coordenadas constantes e/ou trilhas em uma posição aceita pelo MoviePy."""
+    if not callable(x) and not callable(y):
+        return (x, y)
+    get_x = x if callable(x) else (lambda t: x)
+    get_y = y if callable(y) else (lambda t: y)
+    return lambda t: (get_x(t), get_y(t))
+
+def with_animated_opacity(clip, track: FrameTrack):
+    """Multiplica a máscara do clipe pela opacidade do quadro correspondente."""
+    if clip.mask is None:
+        clip = clip.with_mask()
+    mask = clip.mask.transform(lambda get_frame, t: track(t) * get_frame(t))
+    return clip.with_mask(mask)
@@ -0,0 +1,73 @@
+import threading
+from typing import Callable, Dict, Hashable, List, Tuple
+
+# Intervalo [início, fim) da timeline em que um clipe é usado.
+Window = Tuple[float, float]
+
+def _overlaps(a: Window, b: Window) -> bool:
+    return a[0] < b[1] and b[0] < a[1]
+
+def _freeze(clip):
+    # Quadros compartilhados entre elementos: qualquer escrita acidental vira erro.
+    for image_clip in (clip, getattr(clip, 'mask', None)):
+        img = getattr(image_clip, 'img', None)
+        if img is not None and hasattr(img, 'setflags'):
+            img.setflags(write=False)
+    return clip
+
+class AssetPool:
+    """
+    Mídias abertas pelo Renderer, compartilhadas entre elementos que usam o
+    mesmo arquivo. Imagens são decodificadas (e redimensionadas) uma vez por
+    caminho e tamanho, com o quadro somente leitura. Um vídeo aberto (leitor
+    ffmpeg de quadros e de áudio) é reaproveitado por elementos cujas janelas
+    na timeline não se sobrepõem, já que cada leitor só anda bem para a frente;
+    elementos simultâneos do mesmo arquivo recebem leitores próprios.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._images: Dict[Hashable, object] = {}
+        self._videos: Dict[Hashable, List[Tuple[object, List[Window]]]] = {}
+        self.opened = 0
+        self.reused = 0
+
+    def image(self, key: Hashable, load: Callable[[], object]):
+        """Clipe de imagem para 'key' (caminho e tamanho), criado por 'load' na primeira vez."""
+        with self._lock:
+            clip = self._images.get(key)
+            if clip is None:
+                clip = self._images[key] = _freeze(load())
+                self.opened += 1
+            else:
+                self.reused += 1
+            return clip
+
+    def video(self, key: Hashable, window: Window, load: Callable[[], object]):
+        """
+        Clipe de vídeo para 'key' (caminho e resolução de decodificação) usado
+        em 'window': reaproveita um já aberto cujas janelas não tocam essa, ou
+        abre outro com 'load'.
+        """
+        with self._lock:
+            entries = self._videos.setdefault(key, [])
+            for clip, windows in entries:
+                if not any(_overlaps(window, used) for used in windows):
+                    windows.append(window)
+                    self.reused += 1
+                    return clip
+            clip = load()
+            entries.append((clip, [window]))
+            self.opened += 1
+            return clip
+
+    def release_windows(self):
+        """Libera as janelas reservadas (nova composição); os arquivos continuam abertos."""
+        with self._lock:
+            for entries in self._videos.values():
+                for _, windows in entries:
+                    windows.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Mídias abertas e reaproveitadas desde a criação do pool."""
+        with self._lock:
+            return {"opened": self.opened, "reused": self.reused}
@@ -0,0 +1,197 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+from moviepy import CompositeVideoClip
+
+class IntervalIndex:
+    """
+    Índice de intervalos [início, fim) para descobrir, a cada quadro, quais
+    itens estão ativos sem percorrer todos. A timeline é dividida em faixas
+    de duração fixa e cada faixa guarda os itens que a tocam; itens que
+    ocupariam faixas demais (fundos, trilhas sem fim) ficam em uma lista à
+    parte, conferida em toda consulta.
+    """
+    MAX_BUCKETS_PER_ITEM = 64
+
+    def __init__(self, starts: Sequence[float], ends: Sequence[Optional[float]],
+                 bucket_duration: Optional[float] = None):
+        self.starts = np.asarray(starts, dtype=float)
+        self.ends = np.array([math.inf if end is None else end for end in ends], dtype=float)
+        finite = np.isfinite(self.ends)
+        if bucket_duration is None:
+            durations = self.ends[finite] - self.starts[finite]
+            durations = durations[durations > 0]
+            bucket_duration = float(np.median(durations)) if durations.size else 1.0
+        self.bucket_duration = bucket_duration
+
+        first = np.floor(self.starts / bucket_duration).astype(np.int64)
+        last = np.where(finite, np.floor(np.where(finite, self.ends, 0) / bucket_duration), first).astype(np.int64)
+        spans = np.maximum(last - first + 1, 0)
+        is_long = ~finite | (spans > self.MAX_BUCKETS_PER_ITEM)
+        self.long_items = np.flatnonzero(is_long)
+
+        # Pares (faixa, item) ordenados por faixa: cada consulta é uma busca binária.
+        short_items = np.flatnonzero(~is_long)
+        counts = spans[short_items]
+        items = np.repeat(short_items, counts)
+        offsets = np.arange(items.size) - np.repeat(np.cumsum(counts) - counts, counts)
+        buckets = np.repeat(first[short_items], counts) + offsets
+        order = np.lexsort((items, buckets))
+        self._buckets = buckets[order]
+        self._items = items[order]
+
+    def query(self, t: float) -> np.ndarray:
+        """Índices (em ordem crescente) dos itens com início <= t < fim."""
+        bucket = math.floor(t / self.bucket_duration)
+        lo = np.searchsorted(self._buckets, bucket, side='left')
+        hi = np.searchsorted(self._buckets, bucket, side='right')
+        candidates = self._items[lo:hi]
+        if self.long_items.size:
+            candidates = np.sort(np.concatenate((candidates, self.long_items)))
+        return candidates[(self.starts[candidates] <= t) & (t < self.ends[candidates])]
+
+class IndexedCompositeVideoClip(CompositeVideoClip):
+    """
+    CompositeVideoClip que consulta um IntervalIndex para saber quais clipes
+    estão tocando em 't', em vez de testar todos a cada quadro. O custo por
+    quadro passa a depender dos clipes ativos, não do total da timeline.
+    """
+    def __init__(self, clips, size=None, bg_color=None, use_bgclip=False, is_mask=False):
+        super().__init__(clips, size=size, bg_color=bg_color, use_bgclip=use_bgclip, is_mask=is_mask)
+        self.index = IntervalIndex([clip.start for clip in self.clips], [clip.end for clip in self.clips])
+        # A máscara é montada pelo MoviePy com a classe base: recria indexada.
+        if type(self.mask) is CompositeVideoClip:
+            self.mask = IndexedCompositeVideoClip(self.mask.clips, self.mask.size, is_mask=True, bg_color=0.0)
+
+    def playing_clips(self, t=0):
+        if isinstance(t, np.ndarray):
+            return super().playing_clips(t)
+        clips = self.clips
+        return [clips[i] for i in self.index.query(t)]
+
+class RenderPlan:
+    """
+    Plano de composição: a pilha de camadas é dividida em segmentos de
+    clipes estáticos separados pelos clipes dinâmicos, e a timeline em
+    intervalos nos quais o conjunto de estáticos ativos não muda.
+    """
+    def __init__(self, clips: Sequence, static: Sequence[bool]):
+        # Camadas em ordem: [estáticos, dinâmico, estáticos, dinâmico, ..., estáticos]
+        self.segments: List[List] = [[]]
+        self.dynamic_clips: List = []
+        # Lugar de cada clipe: (True, segmento) para estáticos, (False, posição entre os dinâmicos).
+        self.layers: List[Tuple[bool, int]] = []
+        for clip, is_static in zip(clips, static):
+            if is_static:
+                self.layers.append((True, len(self.segments) - 1))
+                self.segments[-1].append(clip)
+            else:
+                self.layers.append((False, len(self.dynamic_clips)))
+                self.dynamic_clips.append(clip)
+                self.segments.append([])
+
+        bounds = {0.0}
+        for clip, is_static in zip(clips, static):
+            if is_static:
+                bounds.add(float(clip.start))
+                if clip.end is not None:
+                    bounds.add(float(clip.end))
+        self.boundaries = np.array(sorted(bounds))
+
+    def interval_at(self, t: float) -> int:
+        return max(int(np.searchsorted(self.boundaries, t, side='right')) - 1, 0)
+
+    def interval_start(self, interval: int) -> float:
+        return float(self.boundaries[interval])
+
+class PlannedCompositeVideoClip(IndexedCompositeVideoClip):
+    """
+    Composição que mescla uma única vez, por intervalo do RenderPlan, cada
+    segmento de clipes estáticos (imagens, retângulos e textos sem filtros
+    nem animação) em um buffer RGBA. A cada quadro, só os clipes dinâmicos
+    são compostos entre esses buffers, respeitando a ordem das camadas.
+    """
+    # Intervalos mantidos em cache; a renderização percorre a timeline em ordem.
+    CACHED_INTERVALS = 2
+
+    def __init__(self, clips, static: Sequence[bool], size=None):
+        static_ids = {id(clip) for clip, is_static in zip(clips, static) if is_static}
+        super().__init__(clips, size=size)
+        self.plan = RenderPlan(self.clips, [id(clip) in static_ids for clip in self.clips])
+        self._layer_cache: "OrderedDict[int, Tuple]" = OrderedDict()
+        # Quadros podem ser pedidos por várias threads; o cache é compartilhado.
+        self._layer_lock = threading.Lock()
+
+    def _static_layers(self, interval: int):
+        """Buffers dos segmentos estáticos no intervalo: base (fundo + 1º segmento) e os demais."""
+        with self._layer_lock:
+            cached = self._layer_cache.get(interval)
+            if cached is not None:
+                self._layer_cache.move_to_end(interval)
+                return cached
+
+            layers = self._build_static_layers(self.plan.interval_start(interval))
+            self._layer_cache[interval] = layers
+            if len(self._layer_cache) > self.CACHED_INTERVALS:
+                self._layer_cache.popitem(last=False)
+            return layers
+
+    def _playing_static(self, t: float) -> Dict[int, List]:
+        """Clipes estáticos ativos em 't' (consultados no índice), por segmento e na ordem das camadas."""
+        playing: Dict[int, List] = {}
+        for i in self.index.query(t):
+            is_static, segment = self.plan.layers[i]
+            if is_static:
+                playing.setdefault(segment, []).append(self.clips[i])
+        return playing
+
+    def _playing_dynamic(self, t: float) -> List[int]:
+        """Posições (entre os dinâmicos) dos clipes dinâmicos ativos em 't'."""
+        layers = self.plan.layers
+        return [layers[i][1] for i in self.index.query(t) if not layers[i][0]]
+
+    @staticmethod
+    def _stacking(playing: List[int], overlays: List[Tuple]) -> List[Tuple[int, int]]:
+        """
+        Ordem de composição: (k, 0) para o k-ésimo dinâmico e (k, 1) para a
+        sobreposição estática que vem logo acima dele (o segmento k + 1).
+        """
+        return sorted([(k, 0) for k in playing] + [(k, 1) for k, _ in overlays])
+
+    def _build_static_layers(self, t: float):
+        """Base (fundo + 1º segmento) e, para os segmentos seguintes com clipes ativos, pares (k, sobreposição)."""
+        playing = self._playing_static(t)
+        base = Image.fromarray(self.bg.get_frame(0).astype("uint8"))
+        for clip in playing.pop(0, []):
+            base = clip.compose_on(base, t)
+        overlays = []
+        for segment, clips in playing.items():
+            overlay = Image.new("RGBA", base.size, (0, 0, 0, 0))
+            for clip in clips:
+                overlay = clip.compose_on(overlay, t)
+            overlays.append((segment - 1, overlay))
+        return base, overlays
+
+    def frame_function(self, t):
+        if self.is_mask:
+            return super().frame_function(t)
+        base, overlays = self._static_layers(self.plan.interval_at(t))
+        overlay_at = dict(overlays)
+        # compose_on pode escrever no fundo: o buffer em cache não pode ser alterado.
+        current_img = base.copy()
+        for k, is_overlay in self._stacking(self._playing_dynamic(t), overlays):
+            if is_overlay:
+                if current_img.mode != "RGBA":
+                    current_img = current_img.convert("RGBA")
+                current_img = Image.alpha_composite(current_img, overlay_at[k])
+            else:
+                current_img = self.plan.dynamic_clips[k].compose_on(current_img, t)
+
+        frame = np.array(current_img)
+        if frame.shape[2] == 4:
+            return frame[:, :, :3]
+        return frame
@@ -0,0 +1,132 @@
+import queue
+import subprocess
+import threading
+from dataclasses import dataclass, field, replace
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from moviepy.config import FFMPEG_BINARY
+
+@dataclass(frozen=True, slots=True)
+class EncoderProfile:
+    """Parâmetros de codificação de vídeo repassados ao ffmpeg."""
+    codec: str = "libx264"
+    preset: Optional[str] = "medium"
+    crf: Optional[int] = 23
+    pixel_format: str = "yuv420p"
+    # Threads do codificador (-threads); None deixa o ffmpeg decidir.
+    threads: Optional[int] = None
+    extra_args: Tuple[str, ...] = field(default_factory=tuple)
+
+    def output_args(self) -> List[str]:
+        args = ["-c:v", self.codec]
+        if self.preset is not None:
+            args += ["-preset", self.preset]
+        if self.crf is not None:
+            args += ["-crf", str(self.crf)]
+        args += ["-pix_fmt", self.pixel_format]
+        if self.threads is not None:
+            args += ["-threads", str(self.threads)]
+        return args + list(self.extra_args)
+
+# Perfis prontos, todos com codificadores em software.
+ENCODER_PROFILES = {
+    # Equivalente ao que o write_videofile do MoviePy usava (libx264, preset medium, CRF padrão).
+    "default": EncoderProfile(),
+    # Rascunhos: codificação o mais rápida possível, arquivo maior.
+    "draft": EncoderProfile(preset="ultrafast", crf=28),
+    # Entrega: mais tempo de codificação por um arquivo menor e mais fiel.
+    "final": EncoderProfile(preset="slow", crf=18),
+    "hevc": EncoderProfile(codec="libx265", preset="medium", crf=28, extra_args=("-tag:v", "hvc1")),
+}
+
+def get_encoder_profile(profile, threads: Optional[int] = None) -> EncoderProfile:
+    """Resolve um perfil pelo nome (ou usa o EncoderProfile dado), opcionalmente trocando as threads."""
+    if isinstance(profile, str):
+        if profile not in ENCODER_PROFILES:
+            raise ValueError(f"Perfil de codificação '{profile}' desconhecido. Opções: {', '.join(ENCODER_PROFILES)}.")
+        profile = ENCODER_PROFILES[profile]
+    if threads is not None:
+        profile = replace(profile, threads=threads)
+    return profile
+
+class FFmpegPipeWriter:
+    """
+    Escreve quadros RGB crus direto na entrada de um processo ffmpeg. Os
+    quadros passam por uma fila limitada consumida por uma thread de escrita:
+    enquanto o ffmpeg codifica, quem chama write_frame já compõe os próximos,
+    e só espera quando a fila enche.
+    """
+    def __init__(self, path: str, size: Tuple[int, int], fps: float, profile: EncoderProfile = EncoderProfile(),
+                 audiofile: Optional[str] = None, queue_frames: int = 8, extra_args: Sequence[str] = ()):
+        width, height = size
+        cmd = [FFMPEG_BINARY, "-y", "-loglevel", "error",
+               "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", f"{fps}", "-i", "-"]
+        if audiofile is not None:
+            cmd += ["-i", audiofile, "-map", "0:v:0", "-map", "1:a:0", "-c:a", "copy"]
+        cmd += profile.output_args() + list(extra_args) + ["-movflags", "+faststart", path]
+
+        self.path = path
+        self.frame_shape = (height, width, 3)
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        self._queue: "queue.Queue[Optional[np.ndarray]]" = queue.Queue(maxsize=max(queue_frames, 1))
+        self._error: Optional[BaseException] = None
+        self._returncode: Optional[int] = None
+        self._stderr = ""
+        self._thread = threading.Thread(target=self._pump, name="ffmpeg-writer", daemon=True)
+        self._thread.start()
+
+    def _pump(self):
+        stdin = self._proc.stdin
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                return
+            if self._error is not None:
+                continue  # esvazia a fila para não travar quem está escrevendo
+            try:
+                stdin.write(memoryview(frame).cast("B"))
+            except BaseException as e:
+                self._error = e
+
+    def write_frame(self, frame: np.ndarray):
+        if self._error is not None:
+            self._fail()
+        frame = frame[:, :, :3]
+        if frame.shape != self.frame_shape:
+            raise ValueError(f"Quadro com formato {frame.shape}; esperado {self.frame_shape}.")
+        self._queue.put(np.ascontiguousarray(frame, dtype=np.uint8))
+
+    def _fail(self):
+        self._finish()
+        raise IOError(f"Falha ao codificar '{self.path}': {self._stderr or self._error}")
+
+    def _finish(self) -> int:
+        """Esvazia a fila, fecha a entrada do ffmpeg e espera o fim do processo."""
+        if self._returncode is None:
+            self._queue.put(None)
+            self._thread.join()
+            try:
+                self._proc.stdin.close()
+            except BrokenPipeError:
+                pass
+            self._stderr = self._proc.stderr.read().decode(errors="replace").strip()
+            self._proc.stderr.close()
+            self._returncode = self._proc.wait()
+        return self._returncode
+
+    def close(self):
+        if self._finish() != 0 or self._error is not None:
+            raise IOError(f"Falha ao codificar '{self.path}': {self._stderr or self._error}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Erro de quem escrevia: encerra o ffmpeg sem mascarar a exceção original.
+            if self._proc.poll() is None:
+                self._proc.kill()
+            self._finish()
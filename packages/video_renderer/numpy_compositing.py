@@ -0,0 +1,211 @@
+import threading
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+from moviepy.tools import compute_position
+
+from .compositing import PlannedCompositeVideoClip
+
+# Alfa de uma camada: None (opaca), um inteiro 0-255 (uniforme) ou um plano uint8 (h, w).
+Alpha = Union[None, int, np.ndarray]
+# Camada pronta para compor: cor já multiplicada pelo alfa e recortada ao quadro, alfa e canto superior esquerdo.
+Layer = Tuple[np.ndarray, Alpha, int, int]
+
+class FrameBuffers:
+    """
+    Buffers de trabalho de um quadro, alocados uma vez (por thread) e
+    reaproveitados. Os temporários são vetores planos fatiados no tamanho de
+    cada camada, para que as operações do NumPy percorram memória contígua.
+    """
+    def __init__(self, width: int, height: int):
+        self.canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        pixels = width * height
+        self._color = np.empty(pixels * 3, dtype=np.uint8)
+        self._alpha = np.empty(pixels, dtype=np.uint8)
+        self._inverse = np.empty(pixels, dtype=np.uint8)
+        self._work = np.empty(pixels * 3, dtype=np.uint16)
+        self._carry = np.empty(pixels * 3, dtype=np.uint16)
+
+    @staticmethod
+    def _view(buffer: np.ndarray, shape: Tuple[int, ...]) -> np.ndarray:
+        return buffer[:int(np.prod(shape))].reshape(shape)
+
+    def color(self, shape): return self._view(self._color, shape)
+    def alpha(self, shape): return self._view(self._alpha, shape)
+    def inverse(self, shape): return self._view(self._inverse, shape)
+    def work(self, shape): return self._view(self._work, shape), self._view(self._carry, shape)
+
+def clip_box(x: int, y: int, width: int, height: int,
+             bounds_width: int, bounds_height: int) -> Optional[Tuple[int, int, int, int]]:
+    """Interseção da camada com o quadro, como (x0, y0, x1, y1); None se ficar toda de fora."""
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + width, bounds_width), min(y + height, bounds_height)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return x0, y0, x1, y1
+
+def _scaled(values: np.ndarray, factor, buffers: FrameBuffers) -> np.ndarray:
+    """round(values * factor / 255) em um buffer uint16, com 'factor' inteiro ou plano (h, w)."""
+    work, carry = buffers.work(values.shape)
+    if isinstance(factor, np.ndarray) and values.ndim == 3:
+        factor = factor[..., None]
+    np.multiply(values, factor, out=work, dtype=np.uint16)
+    # Divisão exata por 255 com arredondamento: (v + 128 + ((v + 128) >> 8)) >> 8
+    work += 128
+    np.right_shift(work, 8, out=carry)
+    work += carry
+    work >>= 8
+    return work
+
+def premultiply(rgb: np.ndarray, alpha: Alpha, out: np.ndarray, buffers: FrameBuffers) -> np.ndarray:
+    """Escreve em 'out' a cor multiplicada pelo alfa."""
+    out[...] = rgb if alpha is None else _scaled(rgb, alpha, buffers)
+    return out
+
+def _over(dst: np.ndarray, src, inverse, buffers: FrameBuffers):
+    """dst = src + dst * (255 - alfa) / 255, no lugar."""
+    work = _scaled(dst, inverse, buffers)
+    work += src
+    dst[...] = work
+
+def blend_over(dst: np.ndarray, dst_alpha: Optional[np.ndarray], color: np.ndarray, alpha: Alpha,
+               buffers: FrameBuffers):
+    """
+    Compõe uma camada pré-multiplicada (cor, alfa) sobre 'dst', do mesmo
+    tamanho, no lugar. Com 'dst_alpha', o destino também é pré-multiplicado
+    e seu alfa é composto pela mesma fórmula.
+    """
+    if alpha is None:
+        dst[...] = color
+        if dst_alpha is not None:
+            dst_alpha[...] = 255
+        return
+    if isinstance(alpha, np.ndarray):
+        inverse = buffers.inverse(alpha.shape)
+        np.subtract(255, alpha, out=inverse)
+    else:
+        inverse = 255 - alpha
+    # cor <= alfa e dst * (255 - alfa) / 255 <= 255 - alfa: a soma cabe em uint8.
+    _over(dst, color, inverse, buffers)
+    if dst_alpha is not None:
+        _over(dst_alpha, alpha, inverse, buffers)
+
+def draw(dst: np.ndarray, layer: Optional[Layer], buffers: FrameBuffers, dst_alpha: Optional[np.ndarray] = None):
+    """Compõe uma camada já recortada sobre 'dst' na sua posição."""
+    if layer is None:
+        return
+    color, alpha, x, y = layer
+    h, w = color.shape[:2]
+    region_alpha = None if dst_alpha is None else dst_alpha[y:y + h, x:x + w]
+    blend_over(dst[y:y + h, x:x + w], region_alpha, color, alpha, buffers)
+
+class NumpyCompositeVideoClip(PlannedCompositeVideoClip):
+    """
+    Compositor em NumPy: usa o mesmo RenderPlan da PlannedCompositeVideoClip,
+    mas mescla as camadas em um canvas uint8 pré-alocado, com aritmética
+    inteira de alfa pré-multiplicado restrita à parte visível de cada camada.
+    Máscaras uniformes (with_opacity) viram um alfa escalar.
+
+    O resultado assume um fundo opaco (o canvas do projeto): onde nenhuma
+    camada opaca cobre o quadro, o fundo transparente do MoviePy vira preto.
+    """
+    def __init__(self, clips, static, size=None):
+        super().__init__(clips, static=static, size=size)
+        self._local = threading.local()
+
+    def _buffers(self) -> FrameBuffers:
+        # Um conjunto de buffers por thread: quadros podem ser pedidos em paralelo.
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = FrameBuffers(*self.size)
+        return buffers
+
+    @staticmethod
+    def _mask_alpha(mask: np.ndarray, shape: Tuple[int, int], buffers: FrameBuffers) -> Alpha:
+        """Alfa uint8 da máscara (já recortada); completada com zeros se menor que a camada."""
+        if mask.shape == shape and mask.size:
+            low, high = mask.min(), mask.max()
+            if low == high:
+                return None if low >= 1 else int(low * 255)
+        alpha = buffers.alpha(shape)
+        if mask.shape != shape:
+            alpha[...] = 0
+        # Como no MoviePy: (máscara * 255) truncada para uint8.
+        alpha[:mask.shape[0], :mask.shape[1]] = mask * 255
+        return alpha
+
+    def _clip_layer(self, clip, t: float, buffers: FrameBuffers) -> Optional[Layer]:
+        """Quadro do clipe em 't', recortado ao canvas e pré-multiplicado (nos buffers)."""
+        ct = t - clip.start
+        frame = clip.get_frame(ct)
+        if frame.dtype != np.uint8:
+            frame = frame.astype(np.uint8)
+        height, width = frame.shape[:2]
+        x, y = compute_position((width, height), self.size, clip.pos(ct), clip.relative_pos)
+        box = clip_box(x, y, width, height, *self.size)
+        if box is None:
+            return None
+        x0, y0, x1, y1 = box
+        rgb = frame[y0 - y:y1 - y, x0 - x:x1 - x, :3]
+        if clip.mask is None:
+            return rgb, None, x0, y0
+
+        # Como no MoviePy, a máscara fica presa ao canto superior esquerdo do clipe.
+        mask = clip.mask.get_frame(ct)[y0 - y:y1 - y, x0 - x:x1 - x]
+        alpha = self._mask_alpha(mask, rgb.shape[:2], buffers)
+        if alpha is None:
+            return rgb, None, x0, y0
+        return premultiply(rgb, alpha, buffers.color(rgb.shape), buffers), alpha, x0, y0
+
+    def _build_static_layers(self, t: float):
+        """
+        Base RGB (fundo + 1º segmento) e, para os segmentos seguintes com
+        clipes ativos e visíveis, pares (k, camada pré-multiplicada recortada).
+        """
+        buffers = self._buffers()
+        playing = self._playing_static(t)
+        base = np.ascontiguousarray(self.bg.get_frame(0)[:, :, :3], dtype=np.uint8)
+        for clip in playing.pop(0, []):
+            draw(base, self._clip_layer(clip, t, buffers), buffers)
+
+        overlays: List[Tuple[int, Layer]] = []
+        for segment, clips in playing.items():
+            # Cada camada é copiada logo ao ser montada: a seguinte reutiliza os mesmos buffers.
+            layers = [self._persist(layer) for clip in clips
+                      if (layer := self._clip_layer(clip, t, buffers)) is not None]
+            if not layers:
+                continue
+            x0 = min(layer[2] for layer in layers)
+            y0 = min(layer[3] for layer in layers)
+            x1 = max(x + color.shape[1] for color, _, x, _ in layers)
+            y1 = max(y + color.shape[0] for color, _, _, y in layers)
+            color = np.zeros((y1 - y0, x1 - x0, 3), dtype=np.uint8)
+            alpha = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+            for layer_color, layer_alpha, x, y in layers:
+                draw(color, (layer_color, layer_alpha, x - x0, y - y0), buffers, dst_alpha=alpha)
+            overlays.append((segment - 1, (color, alpha, x0, y0)))
+        return base, overlays
+
+    @staticmethod
+    def _persist(layer: Layer) -> Layer:
+        # Cor e alfa podem viver nos buffers do quadro: copia antes da próxima camada.
+        color, alpha, x, y = layer
+        return color.copy(), (alpha.copy() if isinstance(alpha, np.ndarray) else alpha), x, y
+
+    def frame_function(self, t):
+        if self.is_mask:
+            return super().frame_function(t)
+        buffers = self._buffers()
+        base, overlays = self._static_layers(self.plan.interval_at(t))
+        overlay_at = dict(overlays)
+        canvas = buffers.canvas
+        np.copyto(canvas, base)
+
+        # Clipes dinâmicos ativos (pelo índice) intercalados com os segmentos estáticos seguintes.
+        for k, is_overlay in self._stacking(self._playing_dynamic(t), overlays):
+            if is_overlay:
+                draw(canvas, overlay_at[k], buffers)
+            else:
+                draw(canvas, self._clip_layer(self.plan.dynamic_clips[k], t, buffers), buffers)
+        # O canvas é reaproveitado no próximo quadro: quem recebe o quadro fica com uma cópia.
+        return canvas.copy()
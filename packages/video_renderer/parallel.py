@@ -0,0 +1,138 @@
+import os
+import subprocess
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from moviepy.config import FFMPEG_BINARY
+
+from .encoding import EncoderProfile, FFmpegPipeWriter
+
+# Intervalo entre quadros-chave, em segundos. Os cortes entre segmentos caem
+# sempre em múltiplos desse intervalo, onde a codificação única também teria
+# um quadro-chave.
+KEYFRAME_INTERVAL = 2
+# Segmentos por processo: mais segmentos equilibram trechos de custo desigual.
+SEGMENTS_PER_WORKER = 4
+
+def keyframe_interval_frames(fps: int) -> int:
+    return max(int(round(KEYFRAME_INTERVAL * fps)), 1)
+
+def plan_segments(total_frames: int, segments: int, gop: int) -> List[Tuple[int, int]]:
+    """
+    Divide os quadros [0, total_frames) em até 'segments' intervalos
+    [início, fim) de tamanho parecido, com cada início múltiplo de 'gop'.
+    """
+    if total_frames <= 0:
+        return []
+    gops = -(-total_frames // gop)
+    segments = max(min(segments, gops), 1)
+    bounds = sorted({round(i * gops / segments) * gop for i in range(segments)})
+    ends = bounds[1:] + [total_frames]
+    return list(zip(bounds, ends))
+
+def _frame_at(clip, t: float) -> np.ndarray:
+    frame = clip.get_frame(t)
+    if frame.dtype != np.uint8:
+        frame = frame.astype(np.uint8)
+    return frame
+
+def iter_frames(clip, fps: int, start_frame: int, end_frame: int,
+                threads: int = 1, buffer_frames: Optional[int] = None) -> Iterator[np.ndarray]:
+    """
+    Quadros [start_frame, end_frame) do clipe, em ordem, nos instantes
+    índice / fps (os mesmos do write_videofile). Com threads > 1, um pool
+    calcula os quadros seguintes em paralelo; no máximo 'buffer_frames'
+    (padrão: 2 por thread) ficam em andamento ou esperando a sua vez.
+    """
+    if threads <= 1:
+        for index in range(start_frame, end_frame):
+            yield _frame_at(clip, index / fps)
+        return
+
+    depth = max(buffer_frames or 2 * threads, threads)
+    pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="frame")
+    pending = deque()
+    next_index = start_frame
+    try:
+        while pending or next_index < end_frame:
+            while next_index < end_frame and len(pending) < depth:
+                pending.append(pool.submit(_frame_at, clip, next_index / fps))
+                next_index += 1
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def write_frames(clip, path: str, fps: int, start_frame: int, end_frame: int,
+                 profile: EncoderProfile = EncoderProfile(), extra_args: Sequence[str] = (),
+                 threads: int = 1, buffer_frames: Optional[int] = None, audiofile: Optional[str] = None):
+    """
+    Codifica os quadros [start_frame, end_frame) do clipe (ver iter_frames)
+    com o perfil dado, multiplexando o áudio de 'audiofile' se houver.
+    """
+    with FFmpegPipeWriter(path, clip.size, fps, profile, audiofile=audiofile, extra_args=extra_args) as writer:
+        for frame in iter_frames(clip, fps, start_frame, end_frame, threads, buffer_frames):
+            writer.write_frame(frame)
+
+class SharedFrameReader:
+    """
+    Envolve o FFMPEG_VideoReader de um VideoFileClip para uso por várias
+    threads: o acesso é serializado e os últimos quadros decodificados ficam
+    guardados. Pedidos um pouco fora de ordem (quadros calculados em paralelo)
+    são atendidos pela janela, em vez de reiniciar o ffmpeg a cada recuo.
+    """
+    def __init__(self, reader, capacity: int):
+        self._reader = reader
+        self._lock = threading.Lock()
+        self._frames: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self.capacity = max(capacity, 1)
+
+    def __getattr__(self, name):
+        return getattr(self._reader, name)
+
+    def _remember(self, index: int, frame: np.ndarray):
+        self._frames[index] = frame
+        if len(self._frames) > self.capacity:
+            self._frames.popitem(last=False)
+
+    def get_frame(self, t: float) -> np.ndarray:
+        with self._lock:
+            reader = self._reader
+            index = reader.get_frame_number(t)
+            frame = self._frames.get(index)
+            if frame is not None:
+                return frame
+            # 'pos' é o índice do próximo quadro que o ffmpeg entrega.
+            if reader.proc is not None and reader.pos <= index < reader.pos + self.capacity:
+                while reader.pos <= index:
+                    position = reader.pos
+                    self._remember(position, reader.read_frame())
+                return self._frames[index]
+            frame = reader.get_frame(t)
+            self._remember(index, frame)
+            return frame
+
+def concat_segments(segment_paths: Sequence[str], output_path: str, audio_path: Optional[str] = None):
+    """
+    Junta os segmentos com o demuxer 'concat' do ffmpeg, copiando os fluxos
+    (sem recodificar), e multiplexa a trilha de áudio mixada de uma vez só.
+    """
+    list_path = f"{output_path}.segments.txt"
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    cmd = [FFMPEG_BINARY, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path]
+    if audio_path is not None:
+        cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0"]
+    cmd += ["-c", "copy", "-movflags", "+faststart", output_path]
+    try:
+        result = subprocess.run(cmd, capture_output=True)
+    finally:
+        os.remove(list_path)
+    if result.returncode != 0:
+        raise IOError(f"Falha ao concatenar os segmentos em '{output_path}': {result.stderr.decode(errors='replace')}")
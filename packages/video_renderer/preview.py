@@ -0,0 +1,97 @@
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+
+from video_model.models import Project, BaseElement
+from safe_expr_eval.vectorized import TimeFunction, compile_time_expression
+
+# Padrões da pré-visualização: metade da resolução e da taxa de quadros, perfil
+# de codificação de rascunho e áudio com bitrate reduzido.
+PREVIEW_SCALE = 0.5
+PREVIEW_FPS = 12
+PREVIEW_ENCODER = 'draft'
+PREVIEW_AUDIO_BITRATE = '64k'
+
+# Atributos em pixels dos elementos; os demais (tempo, opacidade, rotação) não mudam.
+PIXEL_ATTRIBUTES = ('x', 'y', 'width', 'height')
+# Tamanhos que precisam continuar inteiros (e ao menos 1 pixel).
+SIZE_ATTRIBUTES = ('width', 'height')
+
+# Campos em pixels das legendas, com os padrões do SubtitleGenerator.
+SUBTITLE_FONT_PIXELS = {'size': 40}
+SUBTITLE_STROKE_PIXELS = {'width': 2}
+SUBTITLE_SHADOW_PIXELS = {'offset': [0, 0]}
+WORD_BACKGROUND_PIXELS = {'padding': [8, 8], 'radius': 10}
+WORD_BACKGROUND_SHADOW_PIXELS = {'offset': [2, 2]}
+# Tamanho de fonte padrão dos textos no Renderer.
+TEXT_FONT_SIZE = 24
+
+def _scale_size(value: float, factor: float) -> int:
+    return max(1, int(round(value * factor)))
+
+def _scale_value(value: Any, factor: float, is_size: bool = False) -> Any:
+    """Escala um valor resolvido: número, lista de números ou expressão temporal."""
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, TimeFunction):
+        scaled = compile_time_expression(f"({value.expression.expression}) * {factor!r}")
+        return scaled.bind(value.context)
+    if isinstance(value, (int, float)):
+        return _scale_size(value, factor) if is_size else value * factor
+    if isinstance(value, (list, tuple)):
+        return [_scale_value(item, factor, is_size) for item in value]
+    return value
+
+def _scale_fields(options: Optional[Dict[str, Any]], defaults: Dict[str, Any], factor: float) -> Dict[str, Any]:
+    """Cópia do dicionário com os campos em pixels escalados (aplicando os padrões ausentes)."""
+    scaled = dict(options or {})
+    for key, default in defaults.items():
+        scaled[key] = _scale_value(scaled.get(key, default), factor, is_size=key in ('size', 'radius', 'width'))
+    return scaled
+
+def _scale_keyframes(keyframes: Dict[str, List[Dict[str, Any]]], factor: float) -> Dict[str, List[Dict[str, Any]]]:
+    return {
+        attr: [{**frame, 'value': _scale_value(frame['value'], factor)} for frame in frames]
+        if attr in PIXEL_ATTRIBUTES else frames
+        for attr, frames in keyframes.items()
+    }
+
+def _scale_filters(filters: List[Dict[str, Any]], factor: float) -> List[Dict[str, Any]]:
+    # O tamanho do kernel do blur é em pixels.
+    return [{**filt, 'zsize': _scale_size(filt['zsize'], factor)} if filt.get('type') == 'blur' and 'zsize' in filt else filt
+            for filt in filters]
+
+def scale_element(element: BaseElement, factor: float) -> BaseElement:
+    """Cópia do elemento com posições, tamanhos, fontes e margens multiplicados por 'factor'."""
+    changes = {attr: _scale_value(getattr(element, attr), factor, attr in SIZE_ATTRIBUTES) for attr in PIXEL_ATTRIBUTES}
+    changes['keyframes'] = _scale_keyframes(element.keyframes, factor)
+    changes['filters'] = _scale_filters(element.filters, factor)
+    if element.type == 'rectangle':
+        changes['corner_radius'] = _scale_value(element.corner_radius, factor)
+    elif element.type == 'text':
+        font = dict(element.font)
+        font['size'] = _scale_size(font.get('size', TEXT_FONT_SIZE), factor)
+        if 'stroke' in font:
+            font['stroke'] = _scale_fields(font['stroke'], {'width': 0}, factor)
+        changes['font'] = font
+    elif element.type == 'subtitles':
+        font = _scale_fields(element.font, SUBTITLE_FONT_PIXELS, factor)
+        font['stroke'] = _scale_fields(font.get('stroke'), SUBTITLE_STROKE_PIXELS, factor)
+        font['shadow'] = _scale_fields(font.get('shadow'), SUBTITLE_SHADOW_PIXELS, factor)
+        background = _scale_fields(element.word_background, WORD_BACKGROUND_PIXELS, factor)
+        background['shadow'] = _scale_fields(background.get('shadow'), WORD_BACKGROUND_SHADOW_PIXELS, factor)
+        changes.update(font=font, word_background=background,
+                       margin_v=_scale_value(element.margin_v, factor), max_width=_scale_value(element.max_width, factor))
+    return replace(element, **changes)
+
+def scale_project(project: Project, factor: float) -> Project:
+    """
+    Cópia do projeto resolvido em outra escala: o quadro e todos os atributos
+    em pixels são multiplicados por 'factor', mantendo o layout proporcional.
+    As dimensões do vídeo são arredondadas para números pares (yuv420p).
+    """
+    if factor <= 0:
+        raise ValueError(f"A escala da pré-visualização deve ser positiva: {factor}")
+    width = max(2, int(round(project.width * factor / 2)) * 2)
+    height = max(2, int(round(project.height * factor / 2)) * 2)
+    elements = [scale_element(element, factor) for element in project.elements]
+    return replace(project, width=width, height=height, elements=elements)
@@ -0,0 +1,127 @@
+import hashlib
+import logging
+import os
+import subprocess
+import tempfile
+from typing import Dict, Optional, Tuple
+
+from moviepy.config import FFMPEG_BINARY
+
+from timeline_resolver.media_cache import default_cache_dir
+
+log = logging.getLogger(__name__)
+
+# Proxies intra-quadro (cada quadro é um JPEG): decodificar e buscar qualquer
+# instante custa o mesmo, sem depender de GOPs longos como H.265 e afins.
+PROXY_VIDEO_ARGS = ("-c:v", "mjpeg", "-q:v", "3", "-pix_fmt", "yuvj420p")
+PROXY_AUDIO_ARGS = ("-c:a", "pcm_s16le")
+PROXY_EXTENSION = ".mov"
+
+def _fingerprint(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+class ProxyCache:
+    """
+    Cache em disco de proxies de vídeo: cada fonte é transcodificada uma vez
+    para MJPEG na resolução (sem ampliar) e na taxa de quadros do projeto.
+    O proxy é endereçado pelo hash do conteúdo da fonte e pelos parâmetros,
+    então cópias do mesmo arquivo compartilham o proxy, e uma fonte alterada
+    gera outro.
+    """
+    DIRNAME = "proxies"
+    # Incrementar quando o formato dos proxies mudar.
+    VERSION = 1
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = os.path.join(cache_dir or default_cache_dir(), self.DIRNAME)
+        self.hits = 0
+        self.misses = 0
+
+    def content_digest(self, path: str) -> str:
+        """
+        SHA-256 do conteúdo do arquivo. O resultado fica anotado por caminho,
+        tamanho e data de modificação, para não reler fontes grandes a cada
+        renderização.
+        """
+        size, mtime_ns = _fingerprint(path)
+        note = hashlib.sha256(f"{os.path.abspath(path)}\0{size}\0{mtime_ns}".encode('utf-8')).hexdigest()
+        note_path = os.path.join(self.cache_dir, "sources", note)
+        try:
+            with open(note_path, 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        except OSError:
+            pass
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        content_digest = digest.hexdigest()
+        try:
+            self._write_atomic(note_path, content_digest.encode('utf-8'))
+        except OSError as e:
+            log.warning(f"Não foi possível anotar o hash de '{path}': {e}")
+        return content_digest
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def proxy_path(self, source: str, size: Tuple[int, int], fps: float) -> str:
+        """Caminho do proxy da fonte para o quadro 'size' e a taxa 'fps' (exista ou não)."""
+        width, height = size
+        key = hashlib.sha256(
+            f"{self.VERSION}\0{self.content_digest(source)}\0{width}x{height}\0{fps}".encode('utf-8')
+        ).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + PROXY_EXTENSION)
+
+    def get(self, source: str, size: Tuple[int, int], fps: float) -> str:
+        """Caminho do proxy da fonte, transcodificando-a antes se ainda não houver um."""
+        path = self.proxy_path(source, size, fps)
+        if os.path.exists(path):
+            self.hits += 1
+            return path
+        self.misses += 1
+        log.info(f"Gerando proxy de '{source}'...")
+        self._transcode(source, path, size, fps)
+        return path
+
+    @staticmethod
+    def _transcode(source: str, path: str, size: Tuple[int, int], fps: float):
+        width, height = size
+        # Cabe no quadro do projeto mantendo a proporção (nunca amplia), com lados pares.
+        scale = (f"scale=w='min(iw,{width})':h='min(ih,{height})'"
+                 f":force_original_aspect_ratio=decrease:force_divisible_by=2")
+        # round=up: cada quadro do proxy é o que o MoviePy mostraria da fonte no mesmo instante.
+        resample = f"fps={fps}:round=up"
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".proxy.", suffix=PROXY_EXTENSION)
+        os.close(fd)
+        cmd = [FFMPEG_BINARY, "-y", "-loglevel", "error", "-i", source,
+               "-map", "0:v:0", "-map", "0:a:0?", "-vf", f"{scale},{resample}",
+               *PROXY_VIDEO_ARGS, *PROXY_AUDIO_ARGS, tmp_path]
+        try:
+            result = subprocess.run(cmd, capture_output=True)
+            if result.returncode != 0:
+                raise IOError(f"Falha ao gerar o proxy de '{source}': {result.stderr.decode(errors='replace')}")
+            # Outro processo pode ter gerado o mesmo proxy: a troca atômica mantém um só.
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de acertos/falhas desde a criação do objeto."""
+        return {"hits": self.hits, "misses": self.misses}
@@ -2,27 +2,151 @@ from __future__ import annotations
 from utils.color import hex_to_rgb
 from video_model.models import (
     Project, BaseElement, ImageElement, VideoElement, RectangleElement, 
-    TextElement, AudioElement, SubtitleElement
+    TextElement, AudioElement, SubtitleElement, ANIMATABLE_ATTRIBUTES
 )
+from safe_expr_eval.vectorized import TimeFunction
 from .filters import FILTER_REGISTRY
+from .animation import build_tracks, position_function, with_animated_opacity
+from .compositing import PlannedCompositeVideoClip
+from .numpy_compositing import NumpyCompositeVideoClip
+from .assets import AssetPool
+from .encoding import EncoderProfile, get_encoder_profile
+from .proxy import ProxyCache
+from .preview import PREVIEW_AUDIO_BITRATE, PREVIEW_ENCODER, PREVIEW_FPS, PREVIEW_SCALE, scale_project
+from .parallel import (
+    SEGMENTS_PER_WORKER, SharedFrameReader, concat_segments, keyframe_interval_frames, plan_segments, write_frames
+)
 import logging
+import math
+import numpy as np
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
 from moviepy import (
-    ImageClip, VideoFileClip, ColorClip, CompositeVideoClip, TextClip,
+    ImageClip, VideoFileClip, ColorClip, TextClip,
     AudioFileClip, CompositeAudioClip
 )
 from moviepy.video.VideoClip import VideoClip as BaseVideoClip # Usado para type hints
 from moviepy.video.fx import Loop as Loop_fx
 from moviepy.video.fx import Rotate
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from PIL import Image
 
 from .subtitle_generator import SubtitleGenerator
 
+DEFAULT_FPS = 24
+
+# Tipos cujo quadro não muda ao longo do tempo (se não tiverem filtros nem animação)
+STATIC_ELEMENT_TYPES = ('image', 'rectangle', 'text')
+
+# Compositores disponíveis: 'moviepy' (composição via Pillow) e 'numpy' (canvas pré-alocado)
+COMPOSITORS = ('moviepy', 'numpy')
+
 class Renderer:
     def __init__(self, resolved_project: Project):
         self.project = resolved_project
+        # Taxa usada para pré-calcular as trilhas de atributos animados.
+        self.fps = DEFAULT_FPS
+        # Quadros calculados em paralelo por threads e quantos podem ficar adiante do escritor.
+        self.threads = 1
+        self.buffer_frames = None
+        self.encoder = EncoderProfile()
+        # Bitrate do áudio AAC; None usa o padrão do ffmpeg.
+        self.audio_bitrate = None
+        # Com um ProxyCache, os vídeos são lidos de proxies intra-quadro na resolução do projeto.
+        self.proxies: "ProxyCache | None" = None
+        # Imagens e vídeos abertos, compartilhados entre elementos do mesmo arquivo.
+        self.assets = AssetPool()
+
+    def render_video(self, output_path: str, fps: int = DEFAULT_FPS, compositor: str = 'moviepy', workers: int = 1,
+                     threads: int = 1, buffer_frames: int = None,
+                     encoder: "str | EncoderProfile" = 'default', encoder_threads: int = None):
+        """
+        Renderiza o projeto resolvido, compondo todos os elementos. Com
+        workers > 1, a timeline é dividida em segmentos codificados em paralelo
+        por processos; com threads > 1, cada processo calcula vários quadros ao
+        mesmo tempo, e até 'buffer_frames' aguardam em ordem pelo escritor.
+        Os quadros são enviados a um ffmpeg configurado pelo perfil 'encoder'
+        (nome em ENCODER_PROFILES ou um EncoderProfile).
+        """
+        if compositor not in COMPOSITORS:
+            raise ValueError(f"Compositor '{compositor}' desconhecido. Opções: {', '.join(COMPOSITORS)}.")
+        self.encoder = get_encoder_profile(encoder, encoder_threads)
+        self.threads = threads
+        self.buffer_frames = buffer_frames
+        final_video = self.compose_video(fps, compositor)
+        if workers > 1:
+            self._render_segments(final_video, output_path, fps, compositor, workers)
+        else:
+            self._render_single(final_video, output_path, fps)
+
+    def render_preview(self, output_path: str, scale: float = PREVIEW_SCALE, fps: int = PREVIEW_FPS, **options):
+        """
+        Renderização rápida para revisão: o projeto é reduzido por 'scale'
+        (posições, tamanhos, fontes e margens juntos, com o mesmo layout), com
+        menos quadros por segundo, perfil de rascunho e áudio mais leve.
+        Aceita as demais opções de render_video.
+        """
+        options.setdefault('encoder', PREVIEW_ENCODER)
+        preview = Renderer(scale_project(self.project, scale))
+        preview.audio_bitrate = PREVIEW_AUDIO_BITRATE
+        preview.proxies = self.proxies
+        logging.info(f"Pré-visualização em {preview.project.width}x{preview.project.height} a {fps} fps...")
+        preview.render_video(output_path, fps=fps, **options)
 
-    def render_video(self, output_path: str, fps: int = 24):
-        """Renderiza o projeto resolvido, compondo todos os elementos."""
+    def render_frame(self, t: float, output_path: str = None, compositor: str = 'moviepy') -> np.ndarray:
+        """
+        Quadro do projeto no instante 't' (RGB uint8), salvo como PNG em
+        'output_path' se dado. Só os elementos presentes em 't' são criados, e
+        os vídeos buscam direto o quadro pedido (sem decodificar desde o início).
+        """
+        if not 0 <= t < self.project.duration:
+            raise ValueError(f"Instante {t} fora do projeto (0 a {self.project.duration}s).")
+        final_video = self.compose_video(self.fps, compositor, window=(t, t))
+        frame = final_video.get_frame(t)[:, :, :3].astype(np.uint8)
+        if output_path is not None:
+            Image.fromarray(frame).save(output_path, format='PNG')
+        return frame
+
+    def render_range(self, t0: float, t1: float, output_path: str, fps: int = DEFAULT_FPS,
+                     compositor: str = 'moviepy', threads: int = 1, buffer_frames: int = None,
+                     encoder: "str | EncoderProfile" = 'default', encoder_threads: int = None):
+        """
+        Renderiza só o trecho [t0, t1) do projeto, com os mesmos quadros (e o
+        mesmo áudio) da renderização completa nesse intervalo. Apenas os
+        elementos que tocam o trecho são criados.
+        """
+        if compositor not in COMPOSITORS:
+            raise ValueError(f"Compositor '{compositor}' desconhecido. Opções: {', '.join(COMPOSITORS)}.")
+        t1 = min(t1, self.project.duration)
+        if not 0 <= t0 < t1:
+            raise ValueError(f"Intervalo [{t0}, {t1}) inválido para o projeto de {self.project.duration}s.")
+        self.encoder = get_encoder_profile(encoder, encoder_threads)
+        self.threads = threads
+        self.buffer_frames = buffer_frames
+        final_video = self.compose_video(fps, compositor, window=(t0, t1))
+        # Mesmos índices de quadro da renderização completa: índice / fps cai em [t0, t1).
+        self._render_single(final_video, output_path, fps, math.ceil(t0 * fps), math.ceil(t1 * fps))
+
+    @staticmethod
+    def _in_window(element: BaseElement, window: "tuple[float, float] | None") -> bool:
+        """Indica se o elemento pode aparecer em [t0, t1] (sem 'end', vale até o fim do projeto)."""
+        if window is None:
+            return True
+        t0, t1 = window
+        return element.start <= t1 and (element.end is None or element.end > t0)
+
+    def compose_video(self, fps: int = DEFAULT_FPS, compositor: str = 'moviepy',
+                      window: "tuple[float, float] | None" = None) -> "BaseVideoClip":
+        """
+        Monta o clipe de vídeo final (camadas e legendas), sem o áudio. Com
+        'window' = (t0, t1), só os elementos que tocam esse intervalo são criados.
+        """
+        self.fps = fps
+        # Uma composição nova substitui a anterior: os vídeos abertos ficam livres para reúso.
+        self.assets.release_windows()
         rgb_background = hex_to_rgb(self.project.background_color)
         canvas = ColorClip(
             size=(int(self.project.width), int(self.project.height)),
@@ -31,30 +155,25 @@ class Renderer:
         )
         
         video_clips = []
-        audio_clips = []
+        static_flags = [True]
         
         for element in self.project.elements:
             # Ignoramos os tipos 'audio' e 'subtitles' neste laço,
             # pois eles são tratados de forma especial mais tarde.
-            if element.type in ['audio', 'subtitles']:
+            if element.type in ['audio', 'subtitles'] or not self._in_window(element, window):
                 continue            
             clip = self._create_clip_for_element(element)
             video_clips.append(clip)
+            static_flags.append(self._is_static(element))
             
-        final_video = CompositeVideoClip([canvas] + video_clips, size=canvas.size)        
-        
-        # Pega todos os elementos de áudio para compor
-        audio_elements = [el for el in self.project.elements if el.type == 'audio']
-        for element in audio_elements:
-            clip = self._create_clip_for_element(element)
-            audio_clips.append(clip)
-
-        if audio_clips:
-            final_audio = CompositeAudioClip(audio_clips)
-            final_video.audio = final_audio.with_duration(final_video.duration)
+        # Camadas estáticas são pré-mescladas uma vez por intervalo; a cada quadro
+        # só os clipes dinâmicos ativos (consultados no índice) são compostos.
+        composite_class = NumpyCompositeVideoClip if compositor == 'numpy' else PlannedCompositeVideoClip
+        final_video = composite_class([canvas] + video_clips, static=static_flags, size=canvas.size)        
         
         # Após compor o vídeo, procuramos por elementos de legenda para aplicar
-        subtitle_elements = [el for el in self.project.elements if el.type == 'subtitles']
+        subtitle_elements = [el for el in self.project.elements
+                             if el.type == 'subtitles' and self._in_window(el, window)]
         if subtitle_elements:
             logging.info(f"Aplicando legenda do elemento '{subtitle_elements[0].name}'...")
             subtitle_gen = SubtitleGenerator(
@@ -63,8 +182,92 @@ class Renderer:
                 int(self.project.height)
             )
             final_video = subtitle_gen.apply_to_clip(final_video)
+        return final_video
+
+    def compose_audio(self, duration: float,
+                      window: "tuple[float, float] | None" = None) -> "CompositeAudioClip | None":
+        """Mixa os elementos de áudio (os que tocam 'window', se dado) em uma única trilha, ou None se não houver."""
+        audio_clips = []
+        # Pega todos os elementos de áudio para compor
+        audio_elements = [el for el in self.project.elements if el.type == 'audio' and self._in_window(el, window)]
+        for element in audio_elements:
+            clip = self._create_clip_for_element(element)
+            audio_clips.append(clip)
+
+        if not audio_clips:
+            return None
+        return CompositeAudioClip(audio_clips).with_duration(duration)
+
+    def _write_audio(self, final_video: "BaseVideoClip", directory: str,
+                     t0: float = 0, t1: float = None) -> "str | None":
+        """
+        Grava a trilha final (elementos de áudio ou, sem eles, o áudio dos
+        clipes), recortada a [t0, t1) se dado, e retorna o caminho.
+        """
+        window = None if t1 is None else (t0, t1)
+        final_audio = self.compose_audio(final_video.duration, window) or final_video.audio
+        if final_audio is None:
+            return None
+        if window is not None:
+            final_audio = final_audio.subclipped(t0, t1)
+        audio_path = os.path.join(directory, "audio.m4a")
+        final_audio.write_audiofile(audio_path, fps=44100, codec='aac', bitrate=self.audio_bitrate)
+        return audio_path
+
+    def _render_single(self, final_video: "BaseVideoClip", output_path: str, fps: int,
+                       start_frame: int = 0, end_frame: int = None):
+        """
+        Renderização em um processo: os quadros [start_frame, end_frame)
+        (calculados por um pool de threads se threads > 1) vão, em ordem, para
+        o ffmpeg, que codifica em paralelo.
+        """
+        # Mesma contagem de quadros do write_videofile.
+        total_frames = int(final_video.duration * fps)
+        end_frame = total_frames if end_frame is None else min(end_frame, total_frames)
+        logging.info(f"Renderizando {end_frame - start_frame} quadros com {self.threads} thread(s)...")
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        with tempfile.TemporaryDirectory(prefix=".render-", dir=output_dir) as tmp_dir:
+            if start_frame == 0 and end_frame == total_frames:
+                audio_path = self._write_audio(final_video, tmp_dir)
+            else:
+                audio_path = self._write_audio(final_video, tmp_dir, start_frame / fps, end_frame / fps)
+            write_frames(final_video, output_path, fps, start_frame, end_frame, profile=self.encoder,
+                         threads=self.threads, buffer_frames=self.buffer_frames, audiofile=audio_path)
+
+    def _render_segments(self, final_video: "BaseVideoClip", output_path: str, fps: int, compositor: str, workers: int):
+        """
+        Renderização paralela: os quadros são divididos em segmentos que começam
+        em quadros-chave, codificados por um pool de processos e concatenados sem
+        recodificação. O áudio é mixado uma vez para o vídeo inteiro (sem emendas).
+        """
+        # Mesma contagem de quadros do write_videofile.
+        total_frames = int(final_video.duration * fps)
+        gop = keyframe_interval_frames(fps)
+        segments = plan_segments(total_frames, workers * SEGMENTS_PER_WORKER, gop)
+        logging.info(f"Renderizando {total_frames} quadros em {len(segments)} segmentos com {workers} processos...")
 
-        final_video.write_videofile(output_path, fps=fps, codec='libx264', temp_audiofile_path='tmp/')
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        with tempfile.TemporaryDirectory(prefix=".render-", dir=output_dir) as tmp_dir:
+            segment_paths = [os.path.join(tmp_dir, f"segment_{i:04d}.mp4") for i in range(len(segments))]
+            # 'spawn': os processos não herdam threads nem leitores de mídia abertos no pai.
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_segment_worker,
+                                     initargs=(self.project, fps, compositor, self.threads, self.buffer_frames,
+                                               self.encoder, self.proxies)) as pool:
+                futures = [pool.submit(_render_segment, path, start, end, gop)
+                           for path, (start, end) in zip(segment_paths, segments)]
+                # O áudio é escrito enquanto os segmentos são codificados.
+                audio_path = self._write_audio(final_video, tmp_dir)
+                for future in futures:
+                    future.result()
+            concat_segments(segment_paths, output_path, audio_path)
+
+    @staticmethod
+    def _is_static(element: BaseElement) -> bool:
+        """Indica se o quadro do elemento é o mesmo durante toda a sua exibição."""
+        if element.type not in STATIC_ELEMENT_TYPES or element.filters or element.keyframes:
+            return False
+        return not any(isinstance(getattr(element, attr), TimeFunction) for attr in ANIMATABLE_ATTRIBUTES)
 
     # CORREÇÃO: A anotação de tipo usa a união das classes reais
     def _create_clip_for_element(self, element: BaseElement) -> "BaseVideoClip | AudioFileClip":
@@ -116,10 +319,17 @@ class Renderer:
 
         # Propriedades visuais não se aplicam ao áudio
         if isinstance(clip, BaseVideoClip):
-             clip = clip.with_position((element.x, element.y))
-             if element.opacity < 1.0:
+             # Atributos 'expr(t):' são amostrados uma vez para todos os quadros
+             track_duration = final_duration if final_duration is not None else self.project.duration - element.start
+             tracks = build_tracks(element, track_duration, self.fps)
+             clip = clip.with_position(position_function(tracks.get('x', element.x), tracks.get('y', element.y)))
+             if 'opacity' in tracks:
+                 clip = with_animated_opacity(clip, tracks['opacity'])
+             elif element.opacity < 1.0:
                  clip = clip.with_opacity(element.opacity)
-             if element.rotation != 0:
+             if 'rotation' in tracks:
+                 clip = Rotate(tracks['rotation']).apply(clip)
+             elif element.rotation != 0:
                  clip = Rotate(element.rotation).apply(clip)
         
         for filt in element.filters:
@@ -132,6 +342,11 @@ class Renderer:
         return clip
 
     def _create_image_clip(self, element: ImageElement) -> "ImageClip":
+        # Mesmo arquivo no mesmo tamanho: um único quadro decodificado, somente leitura.
+        key = (element.path, element.width, element.height)
+        return self.assets.image(key, lambda: self._load_image_clip(element))
+
+    def _load_image_clip(self, element: ImageElement) -> "ImageClip":
         clip = ImageClip(element.path)        
         if element.width is not None and element.height is not None:
             clip = clip.resized((int(element.width), int(element.height)))        
@@ -141,16 +356,53 @@ class Renderer:
             clip = clip.resized(height=int(element.height))
         return clip
 
+    def _decode_size(self, element: VideoElement) -> "tuple[int, int] | None":
+        """
+        Tamanho final do vídeo (o mesmo que o resized daria), ou None se o
+        elemento não define largura nem altura. Com uma só dimensão, a outra
+        segue a proporção do arquivo (media_width/media_height da hidratação,
+        ou o cabeçalho, se ausentes). Com proxies (menores que a fonte), o
+        tamanho original é sempre pedido, para o layout não mudar.
+        """
+        if element.width is not None and element.height is not None:
+            return int(element.width), int(element.height)
+        if element.width is None and element.height is None and self.proxies is None:
+            return None
+        width, height = element.media_width, element.media_height
+        if width is None or height is None:
+            # Sem hidratação: lê o cabeçalho. O ffmpeg aplica a rotação dos metadados ao decodificar.
+            infos = ffmpeg_parse_infos(element.path)
+            width, height = infos["video_size"]
+            if abs(infos.get("video_rotation", 0)) in (90, 270):
+                width, height = height, width
+        if element.width is not None:
+            return int(element.width), int(height * element.width / width)
+        if element.height is not None:
+            return int(width * element.height / height), int(element.height)
+        return width, height
+
     def _create_video_clip(self, element: VideoElement) -> "VideoFileClip":
-        clip = VideoFileClip(element.path)
+        # Elementos do mesmo arquivo que não tocam na timeline compartilham os leitores.
+        size = self._decode_size(element)
+        window = (element.start, element.end if element.end is not None else self.project.duration)
+        # A chave inclui o que muda a abertura entre renderizações: taxa do proxy e acesso por threads.
+        key = (element.path, size, self.fps if self.proxies is not None else None, self.threads > 1)
+        clip = self.assets.video(key, window, lambda: self._open_video_clip(element.path, size))
         if element.volume != 1.0:
             clip = clip.with_volume_scaled(element.volume)
-        if element.width is not None and element.height is not None:
-            clip = clip.resized((int(element.width), int(element.height)))
-        elif element.width is not None:
-            clip = clip.resized(width=int(element.width))
-        elif element.height is not None:
-            clip = clip.resized(height=int(element.height))
+        return clip
+
+    def _open_video_clip(self, path: str, size: "tuple[int, int] | None") -> "VideoFileClip":
+        # O próprio ffmpeg escala os quadros ao decodificar (filtro 'scale'),
+        # em vez de decodificar na resolução original e redimensionar no Python.
+        if self.proxies is not None:
+            path = self.proxies.get(path, (int(self.project.width), int(self.project.height)), self.fps)
+        clip = VideoFileClip(path, target_resolution=size)
+        if self.threads > 1:
+            # Quadros vizinhos são pedidos fora de ordem pelas threads: a janela do
+            # leitor cobre todos os quadros em andamento, na taxa do arquivo.
+            depth = self.buffer_frames or 2 * self.threads
+            clip.reader = SharedFrameReader(clip.reader, depth * max(1, math.ceil(clip.reader.fps / self.fps)) + 1)
         return clip
 
     def _create_rectangle_clip(self, element: RectangleElement) -> "ColorClip":
@@ -183,4 +435,27 @@ class Renderer:
         clip = AudioFileClip(element.path)
         if element.volume != 1.0:
             clip = clip.with_volume_scaled(element.volume)
-        return clip
\ No newline at end of file
+        return clip
+
+# Estado de cada processo da renderização paralela: o clipe é montado uma vez
+# por processo e reaproveitado por todos os segmentos que ele codificar.
+_segment_worker = {}
+
+def _init_segment_worker(project: Project, fps: int, compositor: str, threads: int, buffer_frames: int,
+                         encoder: EncoderProfile, proxies: "ProxyCache | None"):
+    # Os proxies já foram gerados pelo processo principal ao montar o seu clipe.
+    renderer = Renderer(project)
+    renderer.proxies = proxies
+    renderer.threads = threads
+    renderer.buffer_frames = buffer_frames
+    renderer.encoder = encoder
+    _segment_worker['clip'] = renderer.compose_video(fps, compositor)
+    _segment_worker['renderer'] = renderer
+
+def _render_segment(path: str, start_frame: int, end_frame: int, gop: int):
+    # Quadros-chave só em intervalos fixos (sem os extras por corte de cena):
+    # cada segmento começa em um, e a emenda mantém o mesmo espaçamento.
+    renderer = _segment_worker['renderer']
+    write_frames(_segment_worker['clip'], path, renderer.fps, start_frame, end_frame, profile=renderer.encoder,
+                 extra_args=["-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0"],
+                 threads=renderer.threads, buffer_frames=renderer.buffer_frames)
@@ -0,0 +1,28 @@
+from unittest.mock import patch
+
+import pytest
+
+from application.main import run_pipeline
+
+YAML = b"video:\n  width: 64\n  height: 48\n  duration: 1\n  elements: []\n"
+
+@pytest.fixture
+def yaml_path(tmp_path):
+    path = tmp_path / "projeto.yaml"
+    path.write_bytes(YAML)
+    return str(path)
+
+class TestRunPipeline:
+
+    @pytest.mark.parametrize("encoder, expected", [(None, None), ("final", "final")])
+    def test_preview_forwards_only_an_explicit_encoder(self, yaml_path, encoder, expected):
+        with patch('application.main.Renderer') as renderer:
+            run_pipeline(yaml_path, "out.mp4", False, use_cache=False, preview=0.5, encoder=encoder)
+        options = renderer.return_value.render_preview.call_args.kwargs
+        assert options.get('encoder') == expected
+        assert options['scale'] == 0.5
+
+    def test_full_render_uses_the_chosen_encoder(self, yaml_path):
+        with patch('application.main.Renderer') as renderer:
+            run_pipeline(yaml_path, "out.mp4", False, use_cache=False, encoder="draft")
+        assert renderer.return_value.render_video.call_args.kwargs['encoder'] == "draft"
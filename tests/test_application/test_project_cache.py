@@ -0,0 +1,109 @@
+import os
+from unittest.mock import patch
+
+import pytest
+import yaml
+from PIL import Image
+
+from application.project_cache import ProjectCache, YAML_LOADER, load_yaml, project_assets
+from application.main import run_pipeline
+from video_model.models import Project, ImageElement, TextElement
+from timeline_resolver.resolver import Resolver
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "logo.png"
+    Image.new("RGB", (64, 32)).save(path)
+    return str(path)
+
+def make_yaml(image_path, x="expr: video.width - self.width"):
+    return (f"video:\n  width: 640\n  height: 360\n  duration: 2\n  elements:\n"
+            f"    - {{type: image, name: logo, start: 0, path: '{image_path}', x: '{x}'}}\n").encode('utf-8')
+
+def resolve(content):
+    return Resolver(Project.from_dict(load_yaml(content)['video'])).resolve()
+
+class TestYamlLoading:
+
+    def test_uses_libyaml_when_available(self):
+        if yaml.__with_libyaml__:
+            assert YAML_LOADER is yaml.CSafeLoader
+        assert load_yaml(b"a: [1, 2]\nb: {c: texto}") == {"a": [1, 2], "b": {"c": "texto"}}
+
+    def test_rejects_python_tags(self):
+        with pytest.raises(yaml.YAMLError):
+            load_yaml(b"a: !!python/object/apply:os.system ['true']")
+
+class TestProjectCache:
+
+    def test_roundtrip_returns_resolved_project(self, tmp_path, image_path):
+        content = make_yaml(image_path)
+        cache = ProjectCache(str(tmp_path / "cache"))
+        assert cache.load(content) is None
+        cache.store(content, resolve(content))
+
+        cached = ProjectCache(str(tmp_path / "cache")).load(content)
+        assert cached == resolve(content)
+        assert cached.elements[0].x == 576
+
+    def test_changed_yaml_is_a_miss(self, tmp_path, image_path):
+        cache = ProjectCache(str(tmp_path / "cache"))
+        content = make_yaml(image_path)
+        cache.store(content, resolve(content))
+        assert cache.load(make_yaml(image_path, x="expr: 10")) is None
+        assert cache.stats() == {"hits": 0, "misses": 1}
+
+    def test_modified_asset_is_a_miss(self, tmp_path, image_path):
+        cache = ProjectCache(str(tmp_path / "cache"))
+        content = make_yaml(image_path)
+        cache.store(content, resolve(content))
+        Image.new("RGB", (10, 10)).save(image_path)
+        os.utime(image_path, ns=(0, 0))
+        assert cache.load(content) is None
+
+    def test_unreadable_entry_is_a_miss(self, tmp_path, image_path, caplog):
+        cache = ProjectCache(str(tmp_path / "cache"))
+        content = make_yaml(image_path)
+        os.makedirs(cache.cache_dir)
+        with open(os.path.join(cache.cache_dir, f"{cache.key(content)}.pickle"), 'wb') as f:
+            f.write(b"corrompido")
+        assert cache.load(content) is None
+        assert "ilegível" in caplog.text
+
+    def test_code_change_is_a_miss(self, tmp_path, image_path):
+        cache = ProjectCache(str(tmp_path / "cache"))
+        content = make_yaml(image_path)
+        cache.store(content, resolve(content))
+        with patch('application.project_cache.code_fingerprint', return_value="outra versão"):
+            assert cache.load(content) is None
+
+    def test_unpicklable_entry_is_a_miss(self, tmp_path, image_path, caplog):
+        cache = ProjectCache(str(tmp_path / "cache"))
+        content = make_yaml(image_path)
+        os.makedirs(cache.cache_dir)
+        with open(os.path.join(cache.cache_dir, f"{cache.key(content)}.pickle"), 'wb') as f:
+            # Referência a uma classe que não existe mais no modelo.
+            f.write(b"cvideo_model.models\nRemovedElement\n.")
+        assert cache.load(content) is None
+        assert cache.stats() == {"hits": 0, "misses": 1}
+        assert "ilegível" in caplog.text
+
+    def test_project_assets_include_fonts(self):
+        project = Project(width=10, height=10, duration=1, elements=[
+            ImageElement(name="a", start=0, path="b.png"),
+            TextElement(name="t", start=0, text="Oi", font={"path": "fonte.ttf"}),
+        ])
+        assert project_assets(project) == ["b.png", "fonte.ttf"]
+
+    def test_pipeline_skips_parsing_and_resolution_on_unchanged_project(self, tmp_path, image_path):
+        yaml_path = tmp_path / "projeto.yaml"
+        yaml_path.write_bytes(make_yaml(image_path))
+        cache_dir = str(tmp_path / "cache")
+
+        with patch('application.main.Renderer') as renderer:
+            run_pipeline(str(yaml_path), "out.mp4", False, cache_dir=cache_dir)
+            with patch('application.main.Resolver', side_effect=AssertionError("resolvido de novo")), \
+                 patch('application.main.load_yaml', side_effect=AssertionError("YAML lido de novo")):
+                run_pipeline(str(yaml_path), "out.mp4", False, cache_dir=cache_dir)
+        assert renderer.call_count == 2
+        assert renderer.call_args_list[0].args[0] == renderer.call_args_list[1].args[0]
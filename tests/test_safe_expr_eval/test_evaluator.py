@@ -1,5 +1,9 @@
 import pytest
-from safe_expr_eval.evaluator import evaluate, InvalidExpressionError
+from safe_expr_eval.evaluator import (
+    evaluate, InvalidExpressionError, cache_info, clear_cache,
+    _compile_expression, _evaluate_with_asteval
+)
+from safe_expr_eval.arithmetic import compile_arithmetic
 
 # --- Testes de Operações Válidas ---
 
@@ -104,4 +108,101 @@ class TestInvalidAndUnsafeExpressions:
     def test_disallowed_builtin_functions(self):
         """Testa se funções built-in não permitidas explicitamente são bloqueadas."""
         with pytest.raises(InvalidExpressionError, match="name 'sum' is not defined"):
-            evaluate("sum([1, 2, 3])")
\ No newline at end of file
+            evaluate("sum([1, 2, 3])")
+
+# --- Testes do Cache de Expressões e do Interpretador Reutilizável ---
+
+class TestExpressionCache:
+    """Grupo de testes para o cache de expressões compiladas."""
+
+    def setup_method(self):
+        clear_cache()
+
+    def test_repeated_expression_hits_cache(self):
+        """Testa se a mesma expressão é analisada uma única vez."""
+        for value in range(5):
+            assert evaluate("a * 2", {"a": value}) == value * 2
+        info = cache_info()
+        assert info.misses == 1
+        assert info.hits == 4
+
+    def test_invalid_expression_is_not_cached(self):
+        """Testa se expressões inválidas continuam falhando em chamadas repetidas."""
+        for _ in range(2):
+            with pytest.raises(InvalidExpressionError):
+                evaluate("5 +")
+        assert cache_info().currsize == 0
+
+    def test_non_string_expression_raises_error(self):
+        """Testa se valores não textuais (ex: listas vindas do YAML) não chegam ao cache."""
+        for expression in (["a", "+", 1], {"a": 1}, 5):
+            with pytest.raises(InvalidExpressionError, match="esperado texto"):
+                evaluate(expression)
+        assert cache_info().currsize == 0
+
+    def test_context_does_not_leak_between_calls(self):
+        """Testa se a tabela de símbolos é reiniciada entre avaliações."""
+        assert evaluate("leaked + 1", {"leaked": 1}) == 2
+        with pytest.raises(InvalidExpressionError, match="name 'leaked' is not defined"):
+            evaluate("leaked + 1")
+
+    def test_context_cannot_override_safe_functions(self):
+        """Testa se o contexto não substitui as funções seguras."""
+        assert evaluate("max(1, 2)", {"max": min}) == 2
+
+    def test_error_state_is_reset_after_failure(self):
+        """Testa se um erro anterior não contamina a próxima avaliação."""
+        with pytest.raises(InvalidExpressionError):
+            evaluate("1 / 0")
+        assert evaluate("1 + 1") == 2
+
+
+# --- Testes do Caminho Rápido Aritmético ---
+
+ARITHMETIC_CASES = [
+    ("5 + 3", {}),
+    ("10 / 4", {}),
+    ("-5 + 2", {}),
+    ("((100 - 25) / 5 + 5) * 2", {}),
+    ("(price * quantity) - discount", {"price": 19.99, "quantity": 3, "discount": 5.00}),
+    ("max(a, b, c)", {"a": 1, "b": 100, "c": 10}),
+    ("min(base_value * multiplier + 50, cap)", {"base_value": 100, "multiplier": 2, "cap": 250}),
+    ("intro_end + 0.5", {"intro_end": 10}),
+    ("video_width - self_width - 40", {"video_width": 1920, "self_width": 200}),
+]
+
+class TestArithmeticFastPath:
+    """Grupo de testes para o compilador de expressões aritméticas puras."""
+
+    @pytest.mark.parametrize("expr, context", ARITHMETIC_CASES)
+    def test_fast_path_matches_asteval(self, expr, context):
+        """Testa se o caminho rápido é usado e produz o mesmo resultado do asteval."""
+        fast = compile_arithmetic(expr)
+        assert fast is not None and fast.accepts(context)
+        compiled = _compile_expression(expr)
+        assert evaluate(expr, context) == _evaluate_with_asteval(compiled, expr, context)
+
+    @pytest.mark.parametrize("expr", [
+        "2 ** 3",
+        "a.__class__",
+        "sum([1, 2, 3])",
+        "max(*a)",
+        "max(a, key=b)",
+        "'a' * 3",
+        "__import__('os')",
+        "a if b else c",
+    ])
+    def test_non_whitelisted_constructs_are_rejected(self, expr):
+        """Testa se construções fora da lista permitida não são compiladas."""
+        assert compile_arithmetic(expr) is None
+
+    def test_non_numeric_context_falls_back_to_asteval(self):
+        """Testa se variáveis não numéricas desviam a avaliação para o asteval."""
+        fast = compile_arithmetic("a * 3")
+        assert not fast.accepts({"a": "ab"})
+        assert evaluate("a * 3", {"a": "ab"}) == "ababab"
+
+    def test_fast_path_division_by_zero_raises_error(self):
+        """Testa se erros do caminho rápido viram InvalidExpressionError."""
+        with pytest.raises(InvalidExpressionError, match="division by zero"):
+            evaluate("a / b", {"a": 1, "b": 0})
@@ -0,0 +1,73 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from safe_expr_eval.evaluator import InvalidExpressionError
+from safe_expr_eval.vectorized import compile_time_expression, TimeFunction
+
+class TestTimeExpressions:
+    """Grupo de testes para expressões 'expr(t):' avaliadas sobre arrays."""
+
+    def test_evaluates_whole_time_array_at_once(self):
+        """Testa se a expressão devolve um valor por instante."""
+        times = np.arange(0, 1, 0.25)
+        result = compile_time_expression("100 + 50 * sin(t)").bind({})(times)
+        np.testing.assert_allclose(result, 100 + 50 * np.sin(times))
+
+    def test_constant_expression_is_broadcast(self):
+        """Testa se expressões sem 't' também devolvem um array completo."""
+        result = compile_time_expression("self_width / 2").bind({"self_width": 200})(np.zeros(3))
+        np.testing.assert_array_equal(result, [100, 100, 100])
+
+    def test_max_and_min_are_elementwise(self):
+        """Testa se max/min operam elemento a elemento e aceitam N argumentos."""
+        function = compile_time_expression("min(max(t, 0.5), 0.75, limit)").bind({"limit": 1})
+        np.testing.assert_array_equal(function(np.array([0.0, 0.6, 0.9])), [0.5, 0.6, 0.75])
+
+    def test_undefined_name_raises_error_on_bind(self):
+        """Testa se variáveis ausentes são detectadas antes da renderização."""
+        with pytest.raises(InvalidExpressionError, match="name 'speed' is not defined"):
+            compile_time_expression("t * speed").bind({})
+
+    @pytest.mark.parametrize("unsafe_expr", [
+        "__import__('os')",
+        "t.__class__",
+        "open('x')",
+        "[t for t in range(3)]",
+        "'a' * 3",
+        "lambda: 1",
+    ])
+    def test_unsafe_constructs_are_blocked(self, unsafe_expr):
+        """Testa se construções fora da lista permitida são rejeitadas."""
+        with pytest.raises(InvalidExpressionError):
+            compile_time_expression(unsafe_expr)
+
+    def test_overflow_raises_error_instead_of_hanging(self):
+        """Testa se potências gigantes estouram em vez de travar o processo."""
+        with pytest.raises(InvalidExpressionError):
+            compile_time_expression("10 ** 10 ** 10").bind({})(np.zeros(1))
+
+    def test_overflow_with_referenced_ints_raises_error_instead_of_hanging(self):
+        """Testa se inteiros vindos do contexto também estouram, como as constantes."""
+        function = compile_time_expression("x ** y ** x + t").bind({"x": 10, "y": 9})
+        with pytest.raises(InvalidExpressionError):
+            function(np.zeros(1))
+
+    def test_complex_result_raises_error(self):
+        """Testa se raízes de negativos falham com InvalidExpressionError, e não TypeError."""
+        with pytest.raises(InvalidExpressionError):
+            compile_time_expression("(a - 1) ** 0.5").bind({"a": 0})(np.zeros(3))
+        with pytest.raises(InvalidExpressionError):
+            compile_time_expression("(t - 1) ** 0.5").bind({})(np.array([0.0, 0.5]))
+
+    def test_non_string_expression_raises_error(self):
+        with pytest.raises(InvalidExpressionError):
+            compile_time_expression(["t", "*", 2])
+
+    def test_bound_function_survives_pickle(self):
+        """Testa se a função pode ser enviada a outros processos."""
+        function = compile_time_expression("t * k").bind({"k": 3})
+        restored = pickle.loads(pickle.dumps(function))
+        assert isinstance(restored, TimeFunction)
+        np.testing.assert_array_equal(restored(np.array([1.0, 2.0])), [3.0, 6.0])
@@ -0,0 +1,55 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from video_model.models import Project, ImageElement
+from timeline_resolver.resolver import Resolver
+from timeline_resolver.media_cache import MediaMetadataCache
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "logo.png"
+    Image.new("RGB", (64, 32)).save(path)
+    return str(path)
+
+def make_project(path):
+    return Project(width=1280, height=720, duration=5,
+                   elements=[ImageElement(name="logo", start=0, path=path)])
+
+class TestMediaMetadataCache:
+
+    def test_warm_run_hydrates_without_opening_media(self, tmp_path, image_path):
+        """Testa se a segunda execução usa o índice em disco e não abre o arquivo."""
+        cold_cache = MediaMetadataCache(str(tmp_path / "cache"))
+        Resolver(make_project(image_path), media_cache=cold_cache).resolve()
+        assert cold_cache.stats()["misses"] == 1
+
+        warm_cache = MediaMetadataCache(str(tmp_path / "cache"))
+        with patch('timeline_resolver.resolver.probe_media', side_effect=AssertionError("arquivo aberto")):
+            resolved = Resolver(make_project(image_path), media_cache=warm_cache).resolve()
+        assert (resolved.elements[0].width, resolved.elements[0].height) == (64, 32)
+        assert warm_cache.stats() == {"hits": 1, "misses": 0, "entries": 1}
+
+    def test_modified_file_is_a_miss(self, tmp_path, image_path):
+        """Testa se alterar o arquivo invalida a entrada correspondente."""
+        cache = MediaMetadataCache(str(tmp_path / "cache"))
+        cache.put(image_path, "image", {"width": 64, "height": 32, "duration": None})
+        Image.new("RGB", (10, 10)).save(image_path)
+        os.utime(image_path, ns=(0, 0))
+        assert cache.get(image_path, "image") is None
+
+    def test_invalidate_removes_entries(self, tmp_path, image_path):
+        cache = MediaMetadataCache(str(tmp_path / "cache"))
+        cache.put(image_path, "image", {"width": 64, "height": 32, "duration": None})
+        cache.save()
+        cache.invalidate(image_path)
+        assert MediaMetadataCache(str(tmp_path / "cache")).get(image_path, "image") is None
+
+    def test_corrupted_index_is_ignored(self, tmp_path, image_path):
+        cache_dir = tmp_path / "cache"
+        cache_dir.mkdir()
+        (cache_dir / MediaMetadataCache.INDEX_FILENAME).write_text("{nao é json")
+        cache = MediaMetadataCache(str(cache_dir))
+        assert cache.get(image_path, "image") is None
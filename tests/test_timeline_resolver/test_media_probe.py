@@ -0,0 +1,52 @@
+import subprocess
+
+import pytest
+from PIL import Image
+
+from moviepy import AudioFileClip, ImageClip, VideoFileClip
+from moviepy.config import FFMPEG_BINARY
+
+from timeline_resolver.media_probe import probe_media
+
+def _ffmpeg(*args):
+    subprocess.run([FFMPEG_BINARY, "-loglevel", "error", "-y", *args], check=True)
+
+@pytest.fixture(scope="module")
+def media_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("media")
+    Image.new("RGB", (320, 180)).save(directory / "still.png")
+    _ffmpeg("-f", "lavfi", "-i", "testsrc=size=96x64:rate=24:duration=1",
+            "-f", "lavfi", "-i", "sine=frequency=440:duration=1",
+            "-pix_fmt", "yuv420p", "-shortest", str(directory / "clip.mp4"))
+    _ffmpeg("-f", "lavfi", "-i", "sine=frequency=440:duration=1.5", str(directory / "tone.wav"))
+    return directory
+
+class TestMediaProbe:
+    """A sonda deve reportar os mesmos valores que os clipes do MoviePy."""
+
+    def test_image_probe_matches_image_clip(self, media_dir):
+        path = str(media_dir / "still.png")
+        clip = ImageClip(path)
+        assert probe_media(path, "image") == {"width": clip.size[0], "height": clip.size[1], "duration": None}
+
+    def test_video_probe_matches_video_file_clip(self, media_dir):
+        path = str(media_dir / "clip.mp4")
+        clip = VideoFileClip(path)
+        info = probe_media(path, "video")
+        clip.close()
+        assert (info["width"], info["height"]) == tuple(clip.size)
+        assert info["duration"] == clip.duration
+
+    def test_audio_probe_matches_audio_file_clip(self, media_dir):
+        path = str(media_dir / "tone.wav")
+        clip = AudioFileClip(path)
+        info = probe_media(path, "audio")
+        clip.close()
+        assert info == {"width": None, "height": None, "duration": clip.duration}
+
+    def test_unknown_type_returns_none(self, media_dir):
+        assert probe_media(str(media_dir / "still.png"), "subtitles") is None
+
+    def test_missing_file_raises(self, tmp_path):
+        with pytest.raises(Exception):
+            probe_media(str(tmp_path / "missing.mp4"), "video")
@@ -1,8 +1,12 @@
 import pytest
 import copy
+import numpy as np
+from unittest.mock import patch
 
-from video_model.models import Project, VideoElement, ImageElement
-from timeline_resolver.resolver import Resolver, CircularDependencyError, AttributeReferenceError, ResolverError
+from video_model.models import Project, VideoElement, ImageElement, TextElement
+from timeline_resolver.resolver import Resolver, CircularDependencyError, AttributeReferenceError, ResolverError, find_references
+from safe_expr_eval.vectorized import TimeFunction
+from safe_expr_eval.evaluator import evaluate, InvalidExpressionError
 
 class TestTimelineResolver:
     def test_resolve_project_with_no_expressions(self):
@@ -124,4 +128,252 @@ class TestTimelineResolver:
         # CORREÇÃO: O teste agora espera o erro correto (AttributeReferenceError)
         # com a mensagem correta.
         with pytest.raises(AttributeReferenceError, match="Atributo 'A.end' referenciado na expressão 'A.end' não foi definido ou não tem valor."):
-            resolver.resolve()
\ No newline at end of file
+            resolver.resolve()
+    def test_time_expression_is_compiled_not_evaluated(self):
+        """Testa se 'expr(t):' vira uma função vetorizada com as dependências fixadas."""
+        elements = [ImageElement(name="logo", start=0, path="l.png", width=200, end=10,
+                                 x="expr(t): video.width - self.width - 100 * t")]
+        project = Project(width=1920, height=1080, duration=10, elements=elements)
+        resolved_project = Resolver(project).resolve()
+        x = resolved_project.elements[0].x
+        assert isinstance(x, TimeFunction)
+        assert list(x(np.array([0.0, 1.0]))) == [1720.0, 1620.0]
+
+    def test_references_come_from_the_syntax_tree(self):
+        """Referências fora de textos, com posições em caracteres (mesmo após acentos)."""
+        expression = "'clips/' + params.lang + '/intro.mp4' + 'é' + a.b.upper()"
+        assert [ref for _, _, ref in find_references(expression)] == ["params.lang", "a.b"]
+        for start, end, ref in find_references(expression):
+            assert expression[start:end] == ref
+        assert find_references("a.b +") == []
+
+    def test_time_expression_with_huge_power_of_referenced_ints_does_not_hang(self):
+        """Inteiros referenciados viram float: a potência estoura na amostragem em vez de travar."""
+        elements = [ImageElement(name="a", start=0, path="a.png", x=10, y=9),
+                    ImageElement(name="b", start=0, path="b.png", x="expr(t): a.x ** a.y ** a.x + t")]
+        project = Project(width=1920, height=1080, duration=10, elements=elements)
+        x = Resolver(project).resolve().elements[1].x
+        with pytest.raises(InvalidExpressionError):
+            x(np.array([0.0, 1.0]))
+
+    def test_time_expression_on_non_animatable_attribute_raises_error(self):
+        elements = [VideoElement(name="A", start="expr(t): t", path="a.mp4")]
+        project = Project(width=1280, height=720, duration=10, elements=elements)
+        with pytest.raises(ResolverError, match="não pode ser animado"):
+            Resolver(project).resolve()
+
+    def test_reference_to_animated_attribute_raises_error(self):
+        elements = [
+            ImageElement(name="A", start=0, path="a.png", x="expr(t): 10 * t"),
+            ImageElement(name="B", start=0, path="b.png", x="expr: A.x + 5"),
+        ]
+        project = Project(width=1280, height=720, duration=10, elements=elements)
+        with pytest.raises(AttributeReferenceError, match="varia com o tempo"):
+            Resolver(project).resolve()
+
+    def test_reference_names_are_not_mangled(self):
+        """Testa nomes que contêm 'self' ou terminam com o nome de outro elemento."""
+        elements = [
+            VideoElement(name="A", start=0, path="a.mp4", end=3),
+            VideoElement(name="BA", start=0, path="ba.mp4", end=10),
+            VideoElement(name="myself", start=0, path="m.mp4", end=7),
+            VideoElement(name="C", start="expr: BA.end + A.end + myself.end", path="c.mp4"),
+        ]
+        project = Project(width=1280, height=720, duration=30, elements=elements)
+        resolved_project = Resolver(project).resolve()
+        assert resolved_project.elements[3].start == 20
+
+    def test_reference_to_attribute_outside_graph(self):
+        """Testa referências a atributos não dinâmicos, como 'volume'."""
+        elements = [
+            VideoElement(name="A", start=0, path="a.mp4", end=10, volume=0.5),
+            VideoElement(name="B", start="expr: A.volume * 4", path="b.mp4"),
+        ]
+        project = Project(width=1280, height=720, duration=30, elements=elements)
+        assert Resolver(project).resolve().elements[1].start == 2
+
+    def test_reference_to_missing_attribute_raises_error(self):
+        elements = [
+            VideoElement(name="A", start=0, path="a.mp4"),
+            VideoElement(name="B", start="expr: A.nope", path="b.mp4"),
+        ]
+        project = Project(width=1280, height=720, duration=30, elements=elements)
+        with pytest.raises(AttributeReferenceError, match="'A.nope'"):
+            Resolver(project).resolve()
+
+    def test_resolved_project_shares_unchanged_elements(self):
+        """Testa o compartilhamento estrutural: só elementos alterados são copiados."""
+        font = {"path": "a.ttf", "size": 40}
+        static = TextElement(name="static", start=0, end=5, text="Oi", font=font)
+        dynamic = TextElement(name="dynamic", start="expr: static.end", text="Tchau", font=font)
+        project = Project(width=1280, height=720, duration=10, elements=[static, dynamic])
+        resolved_project = Resolver(project).resolve()
+
+        assert resolved_project is not project
+        assert resolved_project.elements is not project.elements
+        assert resolved_project.elements[0] is static
+        assert resolved_project.elements[1] is not dynamic
+        assert resolved_project.elements[1].font is font
+        assert dynamic.start == "expr: static.end"
+
+
+class TestConcurrentHydration:
+
+    def _project(self):
+        elements = [ImageElement(name=f"img{i}", start=0, path=f"img{i % 3}.png") for i in range(9)]
+        elements.append(VideoElement(name="broken", start=0, path="broken.mp4"))
+        elements.append(VideoElement(name="broken_again", start=0, path="broken.mp4"))
+        return Project(width=1280, height=720, duration=10, elements=elements)
+
+    @staticmethod
+    def _fake_probe(path, media_type):
+        if path == "broken.mp4":
+            raise IOError("arquivo corrompido")
+        index = int(path[3])
+        return {"width": 100 + index, "height": 50 + index, "duration": None}
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_each_path_is_probed_once_and_results_are_deterministic(self, workers, caplog):
+        with patch('timeline_resolver.resolver.probe_media', side_effect=self._fake_probe) as probe:
+            resolved = Resolver(self._project(), hydration_workers=workers).resolve()
+        assert probe.call_count == 4
+        assert [el.width for el in resolved.elements[:9]] == [100, 101, 102] * 3
+        # Um aviso por elemento, na ordem do projeto
+        warnings = [r.message for r in caplog.records if r.levelname == "WARNING"]
+        assert warnings == ["Não foi possível ler metadados do arquivo broken.mp4: arquivo corrompido"] * 2
+
+
+class TestIncrementalUpdate:
+
+    def _resolver(self):
+        elements = [
+            VideoElement(name="intro", start=0, path="i.mp4", end=10),
+            VideoElement(name="main", start="expr: intro.end + 2", path="m.mp4", end="expr: self.start + 20"),
+            ImageElement(name="logo", start=0, path="l.png", end=5, width=200, x="expr: video.width - self.width"),
+        ]
+        project = Project(width=1920, height=1080, duration="expr: main.end", elements=elements)
+        resolver = Resolver(project)
+        resolver.resolve()
+        return resolver
+
+    def test_update_recomputes_only_downstream_nodes(self):
+        resolver = self._resolver()
+        with patch('timeline_resolver.resolver.evaluate', wraps=evaluate) as spy:
+            changed = resolver.update("intro.end", 15)
+        assert changed == {"intro", "main", "video"}
+        assert spy.call_count == 3 # main.start, main.end, video.duration
+        project = resolver.resolved_project
+        assert (project.elements[1].start, project.elements[1].end, project.duration) == (17, 37, 37)
+
+    def test_update_reports_only_elements_whose_values_changed(self):
+        resolver = self._resolver()
+        assert resolver.update("logo.end", 5) == set()
+        assert resolver.update("video.width", 1280) == {"video", "logo"}
+        assert resolver.resolved_project.elements[2].x == 1080
+
+    def test_update_with_new_expression_rewires_the_graph(self):
+        resolver = self._resolver()
+        resolver.update("logo.start", "expr: main.start")
+        assert resolver.resolved_project.elements[2].start == 12
+        assert resolver.update("intro.end", 20) == {"intro", "main", "logo", "video"}
+        assert resolver.resolved_project.elements[2].start == 22
+
+    def test_update_introducing_a_cycle_is_rolled_back(self):
+        resolver = self._resolver()
+        with pytest.raises(CircularDependencyError):
+            resolver.update("intro.end", "expr: main.end")
+        assert resolver.resolved_project.elements[0].end == 10
+        assert resolver.update("intro.end", 11) == {"intro", "main", "video"}
+
+    def test_failed_downstream_evaluation_is_rolled_back(self):
+        resolver = self._resolver()
+        resolver.update("logo.x", "expr: 100 / (intro.end - 10 + 1)")
+        with pytest.raises(ResolverError, match="division by zero"):
+            resolver.update("intro.end", 9)
+        assert resolver.resolved_values["intro.end"] == 10
+        assert resolver.resolved_project.elements[1].start == 12
+        assert resolver.resolved_project.elements[2].x == 100
+
+    def test_update_before_resolve_raises_error(self):
+        project = Project(width=1920, height=1080, duration=10)
+        with pytest.raises(ResolverError):
+            Resolver(project).update("video.duration", 5)
+
+    def test_update_unknown_node_raises_error(self):
+        with pytest.raises(AttributeReferenceError):
+            self._resolver().update("ghost.start", 1)
+
+
+class TestRepeatGroups:
+
+    def _data(self, count=10):
+        return {"width": 1000, "height": 1000, "duration": 10, "elements": [
+            {"name": "title", "type": "text", "text": "T", "start": 0, "x": "expr: cell_5.x + 1"},
+            {"name": "cell", "type": "rectangle", "repeat": {"count": count, "index": "k"}, "width": 100, "height": 100,
+             "start": "expr: k * 0.5", "end": "expr: self.start + 1",
+             "x": "expr: (k % 5) * self.width + title.y", "y": "expr: (k // 5) * 100",
+             "color": 'expr: "#ff0000" if k % 2 else "#00ff00"'},
+        ]}
+
+    def test_repeat_family_is_one_node_per_attribute(self):
+        resolver = Resolver(Project.from_dict(self._data()))
+        resolved = resolver.resolve()
+        cells = resolved.elements[1:]
+        assert [el.x for el in cells] == [0, 100, 200, 300, 400] * 2
+        assert [el.y for el in cells] == [0] * 5 + [100] * 5
+        assert [el.end for el in cells[:3]] == [1.0, 1.5, 2.0]
+        assert [el.color for el in cells[:2]] == ["#00ff00", "#ff0000"]
+        assert resolved.elements[0].x == 1
+        assert not any(node.startswith("cell_") and node != "cell_5.x" for node in resolver.order)
+        assert resolver.dependencies["cell_5.x"] == {"cell.x"}
+
+    def test_repeat_matches_explicit_elements(self):
+        data = self._data(count=4)
+        explicit = copy.deepcopy(data)
+        template = explicit["elements"].pop()
+        del template["repeat"]
+        explicit["elements"][0]["x"] = "expr: cell_3.x + 1"
+        data["elements"][0]["x"] = "expr: cell_3.x + 1"
+        for k in range(4):
+            member = {attr: value.replace("k", str(k)) if isinstance(value, str) and value.startswith("expr") else value
+                      for attr, value in template.items()}
+            explicit["elements"].append({**member, "name": f"cell_{k}"})
+
+        from_repeat = Resolver(Project.from_dict(data)).resolve()
+        from_explicit = Resolver(Project.from_dict(explicit)).resolve()
+        assert from_repeat.elements == from_explicit.elements
+
+    def test_update_reevaluates_family_and_members(self):
+        resolver = Resolver(Project.from_dict(self._data()))
+        resolved = resolver.resolve()
+        assert resolver.update("title.y", 7) == {"title"} | {f"cell_{k}" for k in range(10)}
+        assert resolved.elements[4].x == 307
+        assert resolved.elements[0].x == 8
+        # A largura muda em todos os membros; 'title' não, pois cell_5.x (k % 5 == 0) não depende dela.
+        assert resolver.update("cell.width", 50) == {f"cell_{k}" for k in range(10)}
+        assert resolver.update("cell.y", "expr: (k // 5) * 100 + (k == 2)") == {"cell_2"}
+        assert [el.x for el in resolved.elements[1:4]] == [7, 57, 107]
+
+    def test_large_integers_match_scalar_evaluation(self):
+        """O int64 do NumPy estouraria em silêncio; o lote deve dar o mesmo resultado do evaluate()."""
+        data = self._data(count=3)
+        data["elements"][0]["x"] = "expr: cell_2.y"
+        data["elements"][1]["x"] = "expr: (k + 1099511627776) * (k + 1099511627776)"
+        data["elements"][1]["y"] = "expr: (k + 1000) * 3"
+        resolver = Resolver(Project.from_dict(data))
+        cells = resolver.resolve().elements[1:]
+        assert [el.x for el in cells] == [evaluate("(k + 2**40) * (k + 2**40)", {"k": k}) for k in range(3)]
+        assert [el.y for el in cells] == [3000, 3003, 3006]
+        assert resolver.repeat_columns["cell.y"].dtype.kind == 'i'
+
+    def test_error_names_failing_member(self):
+        data = self._data()
+        data["elements"][1]["opacity"] = "expr: 1 / (k - 3)"
+        with pytest.raises(ResolverError, match="cell_3"):
+            Resolver(Project.from_dict(data)).resolve()
+
+    def test_family_node_cannot_be_referenced_directly(self):
+        data = self._data()
+        data["elements"][0]["x"] = "expr: cell.x"
+        with pytest.raises(AttributeReferenceError, match="cell_0.x"):
+            Resolver(Project.from_dict(data)).resolve()
@@ -0,0 +1,105 @@
+import pytest
+from dataclasses import fields
+from unittest.mock import patch
+
+from video_model.models import Project, ImageElement, TextElement, RectangleElement
+from timeline_resolver.resolver import Resolver, ResolverError, AttributeReferenceError
+from timeline_resolver.template import ProjectTemplate
+from safe_expr_eval.vectorized import TimeFunction
+
+DEFAULTS = {"name": "Ana", "price": 9.5, "img": "a.png"}
+
+def _fake_probe(path, media_type):
+    return {"a.png": {"width": 64, "height": 32, "duration": None},
+            "b.png": {"width": 100, "height": 50, "duration": None}}[path]
+
+def _project(params=None):
+    elements = [
+        RectangleElement(name="bg", start=0, end="expr: video.duration", width=100, height=100, color="#fff"),
+        TextElement(name="title", start=0, text='expr: "Olá, " + params.name',
+                    x="expr: params.price * 10 + bg.width", y="expr(t): t * params.price"),
+        ImageElement(name="photo", start=0, path="expr: params.img",
+                     x="expr: video.width - self.width", y="expr: max(title.x, 3)"),
+    ]
+    return Project(width=1920, height=1080, duration=10, elements=elements, params=dict(params or DEFAULTS))
+
+class TestProjectTemplate:
+
+    @patch('timeline_resolver.resolver.probe_media', side_effect=_fake_probe)
+    def test_bind_matches_resolving_each_variant(self, probe):
+        param_sets = [{"name": "Bo", "price": 2}, {"img": "b.png"}, {}]
+        projects = ProjectTemplate(_project()).bind(param_sets)
+
+        for param_set, bound in zip(param_sets, projects):
+            expected = Resolver(_project({**DEFAULTS, **param_set})).resolve()
+            assert bound.params == expected.params
+            for bound_el, expected_el in zip(bound.elements, expected.elements):
+                for attr in (field.name for field in fields(expected_el)):
+                    value = getattr(expected_el, attr)
+                    if isinstance(value, TimeFunction):
+                        assert getattr(bound_el, attr)(1.0) == value(1.0)
+                    else:
+                        assert getattr(bound_el, attr) == value, f"{expected_el.name}.{attr}"
+
+    @patch('timeline_resolver.resolver.probe_media', side_effect=_fake_probe)
+    def test_invariant_elements_are_shared_and_files_read_once(self, probe):
+        template = ProjectTemplate(_project())
+        projects = template.bind([{"img": "a.png"}, {"img": "b.png"}, {"img": "b.png"}])
+        assert probe.call_count == 2
+        assert projects[0].elements[0] is projects[1].elements[0] is template.base_project.elements[0]
+        assert projects[0].elements[0].end == 10
+        assert "bg.end" not in template.variant_order
+
+    @patch('timeline_resolver.resolver.probe_media', side_effect=_fake_probe)
+    def test_bind_table_is_columnar_and_vectorized(self, probe):
+        template = ProjectTemplate(_project())
+        table = template.bind_table([{"price": 1}, {"price": 2.5}, {"name": "Bo"}])
+        assert table["title.x"].tolist() == [110.0, 125.0, 195.0]
+        assert table["title.x"].dtype.kind == 'f'
+        assert table["title.text"].tolist() == ["Olá, Ana", "Olá, Ana", "Olá, Bo"]
+        assert table["photo.width"].tolist() == [64, 64, 64]
+        assert template.vectorized["title.x"] is not None
+        assert template.vectorized["title.text"] is None
+
+    @patch('timeline_resolver.resolver.probe_media', side_effect=_fake_probe)
+    def test_bind_table_matches_scalar_evaluation_for_large_integers(self, probe):
+        project = _project({**DEFAULTS, "count": 3})
+        project.elements[0].x = "expr: params.count * params.count"
+        table = ProjectTemplate(project).bind_table([{"count": 2**40}, {"count": 3}])
+        assert table["bg.x"].tolist() == [2**80, 9]
+
+    @patch('timeline_resolver.resolver.probe_media', side_effect=_fake_probe)
+    def test_unknown_parameter_raises_error(self, probe):
+        template = ProjectTemplate(_project())
+        with pytest.raises(ResolverError, match="preco"):
+            template.bind([{"preco": 3}])
+
+    def test_reference_to_undeclared_parameter_raises_error(self):
+        project = Project(width=10, height=10, duration="expr: params.missing")
+        with pytest.raises(AttributeReferenceError):
+            ProjectTemplate(project)
+
+    @patch('timeline_resolver.resolver.probe_media', side_effect=_fake_probe)
+    def test_error_points_to_failing_variant(self, probe):
+        project = _project()
+        project.elements[0].x = "expr: 100 / params.price"
+        template = ProjectTemplate(project)
+        with pytest.raises(ResolverError, match=r"'bg.x' \(variante 1\)"):
+            template.bind_table([{"price": 2}, {"price": 0}])
+
+    def test_path_may_only_depend_on_parameters(self):
+        project = _project()
+        project.elements[2].path = "expr: title.text"
+        with pytest.raises(ResolverError, match="só pode depender de parâmetros"):
+            ProjectTemplate(project)
+
+    @patch('timeline_resolver.resolver.probe_media', side_effect=_fake_probe)
+    def test_dotted_text_inside_string_literals_is_not_a_reference(self, probe):
+        """Extensões de arquivo e domínios entre aspas não viram dependências."""
+        project = _project({**DEFAULTS, "lang": "a"})
+        project.elements[2].path = "expr: params.lang + '.png'"
+        project.elements[1].text = "expr: 'Acesse www.site.com, ' + params.name + ' (logo.png)'"
+        template = ProjectTemplate(project)
+        table = template.bind_table([{}, {"lang": "b", "name": "Bo"}])
+        assert table["photo.path"].tolist() == ["a.png", "b.png"]
+        assert table["title.text"].tolist() == ["Acesse www.site.com, Ana (logo.png)", "Acesse www.site.com, Bo (logo.png)"]
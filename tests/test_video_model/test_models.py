@@ -1,6 +1,7 @@
+import copy
 import pytest
 from video_model.models import (
-    Project, BaseElement, ImageElement, VideoElement, TextElement, RectangleElement,
+    Project, BaseElement, ImageElement, VideoElement, TextElement, RectangleElement, RepeatGroup,
     KW_ONLY
 )
 
@@ -147,4 +148,59 @@ class TestProjectFromDictFactory:
         ]}
 
         with pytest.raises(TypeError):
-            Project.from_dict(test_data)
\ No newline at end of file
+            Project.from_dict(test_data)
+
+    def test_from_dict_loads_keyframes(self):
+        """Testa se o bloco 'keyframes' é repassado ao elemento sem alterações."""
+        keyframes = {"x": [{"t": 0, "value": 0}, {"t": 1, "value": 300, "easing": "ease"}]}
+        test_data = {"width": 10, "height": 10, "duration": 1, "elements": [
+            {"name": "title", "start": 0, "type": "text", "text": "Oi", "keyframes": keyframes}
+        ]}
+        project = Project.from_dict(test_data)
+        assert project.elements[0].keyframes == keyframes
+
+    def test_from_dict_loads_params(self):
+        """Testa se o bloco 'params' do template é carregado no projeto."""
+        test_data = {"width": 10, "height": 10, "duration": 1, "params": {"nome": "Ana", "preco": 9.5},
+                     "elements": [{"name": "title", "start": 0, "type": "text", "text": "expr: params.nome"}]}
+        project = Project.from_dict(test_data)
+        assert project.params == {"nome": "Ana", "preco": 9.5}
+        assert Project(width=10, height=10, duration=1).params == {}
+
+    def test_from_dict_expands_repeat(self):
+        """Testa se 'repeat' gera membros consecutivos e registra a família."""
+        test_data = {"width": 10, "height": 10, "duration": 1, "elements": [
+            {"name": "title", "start": 0, "type": "text", "text": "Oi"},
+            {"name": "cell", "start": 0, "type": "rectangle", "x": "expr: i * 10", "repeat": 3},
+            {"name": "dot", "start": 0, "type": "rectangle", "repeat": {"count": 2, "index": "k"}},
+        ]}
+        project = Project.from_dict(test_data)
+        assert [el.name for el in project.elements] == ["title", "cell_0", "cell_1", "cell_2", "dot_0", "dot_1"]
+        assert all(el.x == "expr: i * 10" for el in project.elements[1:4])
+        assert project.repeats == [RepeatGroup(name="cell", count=3, first=1), RepeatGroup(name="dot", count=2, first=4, index="k")]
+
+    @pytest.mark.parametrize("repeat", [-1, "3", 2.5, {"count": 3, "idx": "j"}, {"index": "j"}])
+    def test_from_dict_with_invalid_repeat_raises_value_error(self, repeat):
+        test_data = {"width": 10, "height": 10, "duration": 1, "elements": [
+            {"name": "cell", "start": 0, "type": "rectangle", "repeat": repeat}
+        ]}
+        with pytest.raises(ValueError):
+            Project.from_dict(test_data)
+
+    def test_from_dict_does_not_mutate_input(self):
+        """O dicionário do YAML pode ser reaproveitado: 'type' e 'repeat' não são removidos."""
+        test_data = {"width": 10, "height": 10, "duration": 1, "elements": [
+            {"name": "title", "start": 0, "type": "text", "text": "Oi"},
+            {"name": "cell", "start": 0, "type": "rectangle", "repeat": 2},
+        ]}
+        snapshot = copy.deepcopy(test_data)
+        first = Project.from_dict(test_data)
+        assert test_data == snapshot
+        assert Project.from_dict(test_data) == first
+
+    def test_elements_use_slots(self):
+        element = TextElement(name="title", start=0, text="Oi")
+        assert not hasattr(element, "__dict__")
+        with pytest.raises(AttributeError):
+            element.undeclared = 1
+        assert copy.copy(element) == element
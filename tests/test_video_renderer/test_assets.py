@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from video_model.models import Project, ImageElement, VideoElement
+from video_renderer.assets import AssetPool
+from video_renderer.encoding import EncoderProfile, FFmpegPipeWriter
+from video_renderer.renderer import Renderer
+
+@pytest.fixture
+def source(tmp_path):
+    """Vídeo de 2s a 10 fps em que o quadro i tem o valor i * 10."""
+    path = str(tmp_path / "source.mp4")
+    with FFmpegPipeWriter(path, (16, 16), 10, EncoderProfile(preset="ultrafast", crf=0, pixel_format="yuv444p")) as writer:
+        for index in range(20):
+            writer.write_frame(np.full((16, 16, 3), index * 10, dtype=np.uint8))
+    return path
+
+class TestAssetPool:
+    def test_image_is_loaded_once_and_read_only(self):
+        pool = AssetPool()
+        loads = []
+
+        class FakeClip:
+            def __init__(self):
+                self.img = np.zeros((2, 2, 3), dtype=np.uint8)
+                loads.append(self)
+
+        first = pool.image(("logo.png", 10, None), FakeClip)
+        assert pool.image(("logo.png", 10, None), FakeClip) is first
+        assert pool.image(("logo.png", 20, None), FakeClip) is not first
+        assert len(loads) == 2
+        with pytest.raises(ValueError):
+            first.img[0, 0, 0] = 1
+
+    def test_video_is_shared_only_by_disjoint_windows(self):
+        pool = AssetPool()
+        open_clip = lambda: object()
+
+        first = pool.video("broll.mp4", (0, 5), open_clip)
+        assert pool.video("broll.mp4", (5, 10), open_clip) is first
+        overlapping = pool.video("broll.mp4", (4, 6), open_clip)
+        assert overlapping is not first
+        # Terceiro uso: cabe no segundo leitor, livre nessa janela.
+        assert pool.video("broll.mp4", (8, 9), open_clip) is overlapping
+        assert pool.stats() == {"opened": 2, "reused": 2}
+
+        pool.release_windows()
+        assert pool.video("broll.mp4", (0, 10), open_clip) is first
+
+class TestRendererAssets:
+    def test_repeated_image_is_decoded_once(self, tmp_path):
+        path = str(tmp_path / "logo.png")
+        Image.fromarray(np.full((4, 4, 3), 200, dtype=np.uint8)).save(path)
+        elements = [ImageElement(name=f"logo{i}", start=0, path=path, x=4 * i) for i in range(3)]
+        renderer = Renderer(Project(width=16, height=4, duration=1, background_color="#000000", elements=elements))
+
+        frame = renderer.compose_video().get_frame(0)
+
+        assert renderer.assets.stats() == {"opened": 1, "reused": 2}
+        assert (frame[:, :12] == 200).all() and (frame[:, 12:] == 0).all()
+
+    def test_sequential_video_elements_share_one_reader(self, source):
+        elements = [VideoElement(name="a", start=0, end=1, path=source),
+                    VideoElement(name="b", start=1, end=2, path=source),
+                    VideoElement(name="c", start=1.5, end=2, path=source, x=8)]
+        renderer = Renderer(Project(width=16, height=16, duration=2, background_color="#000000", elements=elements))
+
+        video = renderer.compose_video(fps=10)
+
+        a, b, c = video.clips[1:]
+        assert a.reader is b.reader and c.reader is not a.reader
+        # 'b' recomeça a fonte do início, depois de 'a' ter lido até 1s.
+        assert abs(int(video.get_frame(0.5)[0, 0, 0]) - 50) <= 2
+        assert abs(int(video.get_frame(1.2)[0, 0, 0]) - 20) <= 2
+        assert abs(int(video.get_frame(1.7)[0, 12, 0]) - 20) <= 2
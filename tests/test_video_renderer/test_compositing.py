@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from moviepy import ColorClip, CompositeVideoClip
+
+from video_renderer.compositing import IntervalIndex, IndexedCompositeVideoClip, PlannedCompositeVideoClip
+from video_renderer.numpy_compositing import NumpyCompositeVideoClip
+
+class TestIntervalIndex:
+
+    def _brute_force(self, starts, ends, t):
+        return [i for i, (s, e) in enumerate(zip(starts, ends)) if s <= t and (e is None or t < e)]
+
+    def test_query_matches_linear_scan(self):
+        rng = np.random.default_rng(0)
+        starts = rng.uniform(0, 100, 500).round(2).tolist()
+        ends = [s + d for s, d in zip(starts, rng.uniform(0, 3, 500).round(2))]
+        ends[::50] = [None] * len(ends[::50])  # sem fim
+        ends[7] = starts[7] + 90                # longo demais para as faixas
+        index = IntervalIndex(starts, ends)
+        for t in np.concatenate([rng.uniform(-1, 110, 300), starts[:50], [e for e in ends[:50] if e]]):
+            assert index.query(t).tolist() == self._brute_force(starts, ends, t)
+
+    def test_empty_index(self):
+        assert IntervalIndex([], []).query(1.0).tolist() == []
+
+class TestIndexedCompositeVideoClip:
+
+    def _clips(self):
+        clips = []
+        for i in range(30):
+            color = (i * 8, 255 - i * 8, 100)
+            clip = ColorClip(size=(8, 6), color=color).with_duration(0.5).with_start(i * 0.25).with_position((i % 4, i % 3))
+            clips.append(clip)
+        return clips
+
+    def test_playing_clips_keep_layer_order(self):
+        clips = self._clips()
+        composite = IndexedCompositeVideoClip(clips, size=(16, 12))
+        reference = CompositeVideoClip(clips, size=(16, 12))
+        for t in [0, 0.25, 0.3, 3.1, 7.4, 10]:
+            assert [id(c) for c in composite.playing_clips(t)] == [id(c) for c in reference.playing_clips(t)]
+            # As máscaras são objetos distintos em cada composição: compara os intervalos
+            assert ([(c.start, c.end, c.pos(t)) for c in composite.mask.playing_clips(t)]
+                    == [(c.start, c.end, c.pos(t)) for c in reference.mask.playing_clips(t)])
+
+    def test_frames_match_moviepy_composite(self):
+        clips = self._clips()
+        composite = IndexedCompositeVideoClip(clips, size=(16, 12))
+        reference = CompositeVideoClip(clips, size=(16, 12))
+        assert isinstance(composite.mask, IndexedCompositeVideoClip)
+        for t in [0.1, 1.3, 5.0, 7.4]:
+            np.testing.assert_array_equal(composite.get_frame(t), reference.get_frame(t))
+            np.testing.assert_array_equal(composite.mask.get_frame(t), reference.mask.get_frame(t))
+
+class TestPlannedCompositeVideoClip:
+
+    def _layers(self):
+        """Fundo, estáticos abaixo e acima de um clipe em movimento, com opacidade."""
+        background = ColorClip(size=(32, 24), color=(10, 20, 30)).with_duration(4)
+        below = ColorClip(size=(20, 10), color=(200, 0, 0)).with_duration(2).with_start(1).with_position((2, 3))
+        moving = (ColorClip(size=(6, 6), color=(0, 255, 0)).with_duration(4)
+                  .with_position(lambda t: (int(t * 5), 4)))
+        above = ColorClip(size=(10, 10), color=(0, 0, 255)).with_duration(3).with_position((12, 8)).with_opacity(0.5)
+        return [background, below, moving, above], [True, True, False, True]
+
+    def test_frames_match_moviepy_composite(self):
+        clips, static = self._layers()
+        planned = PlannedCompositeVideoClip(clips, static=static, size=(32, 24))
+        reference = CompositeVideoClip(clips, size=(32, 24))
+        for t in [0, 0.5, 1.0, 1.7, 2.5, 3.2, 3.9]:
+            np.testing.assert_allclose(planned.get_frame(t), reference.get_frame(t), atol=2)
+
+    def test_static_layers_are_blended_once_per_interval(self):
+        clips, static = self._layers()
+        planned = PlannedCompositeVideoClip(clips, static=static, size=(32, 24))
+        assert planned.plan.boundaries.tolist() == [0.0, 1.0, 3.0, 4.0]
+        assert [len(segment) for segment in planned.plan.segments] == [2, 1]
+
+        calls = []
+        original = clips[1].frame_function
+        clips[1].frame_function = lambda t: calls.append(t) or original(t)
+        for frame in range(24):
+            planned.get_frame(1 + frame / 12)
+        assert len(calls) == 1
+
+    @pytest.mark.parametrize("composite_class", [PlannedCompositeVideoClip, NumpyCompositeVideoClip])
+    @pytest.mark.parametrize("static", [True, False])
+    def test_frames_do_not_scan_the_timeline(self, composite_class, static):
+        """Com milhares de clipes curtos, os ativos vêm do índice: nenhum clipe é testado com is_playing."""
+        background = ColorClip(size=(32, 24), color=(10, 20, 30)).with_duration(200)
+        clips = [ColorClip(size=(4, 4), color=(255, i % 256, 0)).with_duration(0.5).with_start(i * 0.1)
+                 .with_position((i % 28, i % 20)) for i in range(2000)]
+        reference = CompositeVideoClip([background] + clips, size=(32, 24))
+        composite = composite_class([background] + clips, static=[True] + [static] * len(clips), size=(32, 24))
+        checked = []
+        for clip in clips:
+            clip.is_playing = lambda t, original=clip.is_playing: checked.append(t) or original(t)
+
+        frames = {t: composite.get_frame(t) for t in [12.34, 12.35, 150.05, 199.9]}
+
+        assert checked == []
+        for t, frame in frames.items():
+            np.testing.assert_allclose(frame, reference.get_frame(t), atol=2)
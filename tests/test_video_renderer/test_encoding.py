@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from moviepy import VideoFileClip
+
+from video_renderer.encoding import ENCODER_PROFILES, EncoderProfile, FFmpegPipeWriter, get_encoder_profile
+
+class TestEncoderProfile:
+
+    def test_output_args(self):
+        assert EncoderProfile().output_args() == ["-c:v", "libx264", "-preset", "medium", "-crf", "23", "-pix_fmt", "yuv420p"]
+        args = EncoderProfile(preset=None, crf=None, threads=4, extra_args=("-tune", "film")).output_args()
+        assert args == ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-threads", "4", "-tune", "film"]
+
+    def test_get_encoder_profile(self):
+        assert get_encoder_profile("draft") is ENCODER_PROFILES["draft"]
+        assert get_encoder_profile("final", threads=3).threads == 3
+        assert ENCODER_PROFILES["final"].threads is None
+        custom = EncoderProfile(crf=10)
+        assert get_encoder_profile(custom) is custom
+        with pytest.raises(ValueError, match="'turbo'"):
+            get_encoder_profile("turbo")
+
+class TestFFmpegPipeWriter:
+
+    def test_frames_are_encoded_in_order(self, tmp_path):
+        path = str(tmp_path / "out.mp4")
+        with FFmpegPipeWriter(path, (32, 16), 10, ENCODER_PROFILES["draft"], queue_frames=2) as writer:
+            for i in range(12):
+                writer.write_frame(np.full((16, 32, 3), i * 20, np.uint8))
+
+        clip = VideoFileClip(path)
+        frames = list(clip.iter_frames())
+        clip.close()
+        assert len(frames) == 12
+        assert [int(round(frame.mean() / 20)) for frame in frames] == list(range(12))
+
+    def test_wrong_frame_size_raises_value_error(self, tmp_path):
+        with pytest.raises(ValueError, match="esperado"):
+            with FFmpegPipeWriter(str(tmp_path / "out.mp4"), (32, 16), 10) as writer:
+                writer.write_frame(np.zeros((8, 8, 3), np.uint8))
+
+    def test_encoder_failure_raises_io_error(self, tmp_path):
+        profile = EncoderProfile(codec="codec-inexistente")
+        with pytest.raises(IOError, match="Falha ao codificar"):
+            with FFmpegPipeWriter(str(tmp_path / "out.mp4"), (32, 16), 10, profile) as writer:
+                for _ in range(50):
+                    writer.write_frame(np.zeros((16, 32, 3), np.uint8))
@@ -0,0 +1,93 @@
+import numpy as np
+from moviepy import ColorClip, CompositeVideoClip, ImageClip
+
+from video_renderer.compositing import PlannedCompositeVideoClip
+from video_renderer.numpy_compositing import FrameBuffers, NumpyCompositeVideoClip, blend_over, clip_box, premultiply
+
+SIZE = (64, 48)
+
+def _scene():
+    """Fundo opaco, camadas estáticas e dinâmicas, parcialmente fora do quadro e semitransparentes."""
+    clips = [ColorClip(size=SIZE, color=(20, 30, 40)).with_duration(4)]
+    static = [True]
+    for i in range(6):
+        clip = (ColorClip(size=(30, 20), color=(i * 40, 200 - i * 20, 90)).with_duration(2 + i * 0.3)
+                .with_start(i * 0.2).with_position((i * 9 - 10, i * 7 - 5)))
+        if i % 2:
+            clip = clip.with_opacity(0.3 + i * 0.1)
+        clips.append(clip)
+        static.append(i % 3 != 0)
+    clips.append(ColorClip(size=(80, 10), color=(255, 255, 0)).with_duration(3)
+                 .with_position(lambda t: (int(t * 10) - 20, 20)).with_opacity(0.5))
+    static.append(False)
+    return clips, static
+
+class TestBlending:
+
+    def test_blend_over_matches_float_reference(self):
+        rng = np.random.default_rng(0)
+        dst = rng.integers(0, 256, (10, 12, 3), dtype=np.uint8)
+        rgb = rng.integers(0, 256, (10, 12, 3), dtype=np.uint8)
+        alpha = rng.integers(0, 256, (10, 12), dtype=np.uint8)
+        buffers = FrameBuffers(12, 10)
+        expected = (rgb * (alpha[..., None] / 255) + dst * (1 - alpha[..., None] / 255))
+
+        color = premultiply(rgb, alpha, np.empty((10, 12, 3), np.uint8), buffers)
+        blend_over(dst, None, color, alpha, buffers)
+        assert np.abs(dst - expected).max() <= 1
+
+    def test_uniform_alpha_and_premultiplied_destination(self):
+        buffers = FrameBuffers(2, 2)
+        dst = np.zeros((2, 2, 3), np.uint8)
+        dst_alpha = np.zeros((2, 2), np.uint8)
+        color = premultiply(np.full((2, 2, 3), 200, np.uint8), 128, np.empty((2, 2, 3), np.uint8), buffers)
+        blend_over(dst, dst_alpha, color, 128, buffers)
+        assert dst.tolist() == [[[100] * 3] * 2] * 2 and dst_alpha.tolist() == [[128] * 2] * 2
+        blend_over(dst, dst_alpha, np.full((2, 2, 3), 7, np.uint8), None, buffers)
+        assert dst.tolist() == [[[7] * 3] * 2] * 2 and dst_alpha.tolist() == [[255] * 2] * 2
+
+    def test_clip_box(self):
+        assert clip_box(-5, 3, 10, 10, 20, 8) == (0, 3, 5, 8)
+        assert clip_box(25, 0, 10, 10, 20, 8) is None
+
+class TestNumpyCompositeVideoClip:
+
+    def test_frames_match_moviepy_composition(self):
+        clips, static = _scene()
+        reference = PlannedCompositeVideoClip(clips, static=static, size=SIZE)
+        composite = NumpyCompositeVideoClip(clips, static=static, size=SIZE)
+        for t in np.linspace(0, 3.9, 14):
+            frame = composite.get_frame(t)
+            assert frame.dtype == np.uint8 and frame.shape == (48, 64, 3)
+            assert np.abs(frame.astype(int) - reference.get_frame(t)).max() <= 1
+
+    def test_translucent_static_layers_above_a_dynamic_clip_keep_their_own_pixels(self):
+        """Duas camadas estáticas semitransparentes no mesmo segmento, acima de um clipe dinâmico."""
+        clips = [
+            ColorClip(size=SIZE, color=(0, 0, 0)).with_duration(2),
+            ColorClip(size=(10, 10), color=(0, 0, 255)).with_duration(2).with_position(lambda t: (int(t * 10), 30)),
+            ColorClip(size=(20, 20), color=(0, 255, 0)).with_duration(2).with_position((0, 0)).with_opacity(0.5),
+            ColorClip(size=(20, 20), color=(255, 0, 0)).with_duration(2).with_position((30, 0)).with_opacity(0.5),
+        ]
+        reference = CompositeVideoClip(clips, size=SIZE)
+        composite = NumpyCompositeVideoClip(clips, static=[True, False, True, True], size=SIZE)
+        for t in (0, 0.5, 1.5):
+            frame = composite.get_frame(t)
+            assert np.abs(frame[5, 5].astype(int) - [0, 127, 0]).max() <= 1
+            assert np.abs(frame.astype(int) - reference.get_frame(t)).max() <= 1
+
+    def test_mask_smaller_than_clip_is_padded_with_zeros(self):
+        image = ImageClip(np.full((4, 6, 3), 200, np.uint8)).with_duration(1)
+        image.mask = ImageClip(np.ones((2, 3)), is_mask=True).with_duration(1)
+        clips = [ColorClip(size=(8, 8), color=(0, 0, 0)).with_duration(1), image.with_position((1, 1))]
+        frame = NumpyCompositeVideoClip(clips, static=[True, False], size=(8, 8)).get_frame(0.5)
+        assert frame[1:3, 1:4].min() == 200
+        assert frame[3:5, 1:7].max() == 0 and frame[1:3, 4:7].max() == 0
+
+    def test_returned_frames_do_not_share_the_canvas(self):
+        clips, static = _scene()
+        composite = NumpyCompositeVideoClip(clips, static=static, size=SIZE)
+        first = composite.get_frame(0)
+        copy = first.copy()
+        composite.get_frame(2.5)
+        assert np.array_equal(first, copy)
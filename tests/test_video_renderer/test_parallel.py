@@ -0,0 +1,100 @@
+import time
+
+import numpy as np
+import pytest
+from moviepy import ColorClip, VideoFileClip
+
+from video_renderer.parallel import (
+    SharedFrameReader, concat_segments, iter_frames, keyframe_interval_frames, plan_segments, write_frames
+)
+
+class TestPlanSegments:
+
+    def test_segments_cover_all_frames_and_start_on_keyframes(self):
+        segments = plan_segments(1000, 8, 48)
+        assert segments[0][0] == 0 and segments[-1][1] == 1000
+        assert all(end == next_start for (_, end), (next_start, _) in zip(segments, segments[1:]))
+        assert all(start % 48 == 0 for start, _ in segments)
+        assert len(segments) == 8
+
+    def test_short_timeline_gets_fewer_segments(self):
+        assert plan_segments(100, 8, 48) == [(0, 48), (48, 96), (96, 100)]
+        assert plan_segments(10, 4, 48) == [(0, 10)]
+        assert plan_segments(0, 4, 48) == []
+
+    def test_keyframe_interval_frames(self):
+        assert keyframe_interval_frames(24) == 48
+        assert keyframe_interval_frames(0.25) == 1
+
+class TestConcatSegments:
+
+    def test_segments_are_joined_without_gaps(self, tmp_path):
+        clip = ColorClip(size=(32, 16), color=(0, 0, 0)).with_duration(2)
+        clip = clip.with_updated_frame_function(lambda t: np.full((16, 32, 3), int(t * 100), np.uint8))
+        paths = []
+        for i, (start, end) in enumerate(plan_segments(20, 3, 5)):
+            paths.append(str(tmp_path / f"segment_{i}.mp4"))
+            write_frames(clip, paths[-1], 10, start, end, extra_args=["-g", "5"])
+        output = str(tmp_path / "out.mp4")
+
+        concat_segments(paths, output)
+
+        result = VideoFileClip(output)
+        frames = list(result.iter_frames())
+        result.close()
+        assert len(frames) == 20
+        assert [int(round(frame.mean() / 10)) for frame in frames] == list(range(20))
+
+    def test_failure_raises_io_error(self, tmp_path):
+        with pytest.raises(IOError, match="concatenar"):
+            concat_segments([str(tmp_path / "missing.mp4")], str(tmp_path / "out.mp4"))
+
+class TestThreadedFrames:
+
+    def _clip(self, delays=None, fail_at=None):
+        computed = []
+        def frame_function(t):
+            index = int(round(t * 10))
+            if fail_at == index:
+                raise ValueError("quadro inválido")
+            if delays is not None:
+                time.sleep(delays[index])
+            computed.append(index)
+            return np.full((4, 4, 3), index, np.uint8)
+        clip = ColorClip(size=(4, 4), color=(0, 0, 0)).with_duration(4)
+        return clip.with_updated_frame_function(frame_function), computed
+
+    def test_frames_come_out_in_order_and_buffer_is_bounded(self):
+        delays = np.random.default_rng(0).uniform(0, 0.004, 40)
+        clip, computed = self._clip(delays)
+        received = []
+        for frame in iter_frames(clip, 10, 0, 40, threads=4, buffer_frames=6):
+            # Nenhum quadro é calculado além da janela do buffer.
+            assert max(computed) < len(received) + 6 + 1
+            received.append(int(frame[0, 0, 0]))
+        assert received == list(range(40))
+
+    def test_error_in_a_frame_is_raised_to_the_writer(self):
+        clip, _ = self._clip(fail_at=7)
+        with pytest.raises(ValueError, match="quadro inválido"):
+            list(iter_frames(clip, 10, 0, 20, threads=3))
+
+class TestSharedFrameReader:
+
+    def test_out_of_order_requests_inside_window_do_not_restart_decoder(self, tmp_path):
+        path = str(tmp_path / "source.mp4")
+        source = ColorClip(size=(16, 16), color=(0, 0, 0)).with_duration(3)
+        source = source.with_updated_frame_function(lambda t: np.full((16, 16, 3), int(t * 10) * 8, np.uint8))
+        write_frames(source, path, 10, 0, 30)
+        video = VideoFileClip(path)
+        reader = SharedFrameReader(video.reader, capacity=8)
+        restarts = []
+        original_initialize = video.reader.initialize
+        video.reader.initialize = lambda *args: (restarts.append(args), original_initialize(*args))
+
+        order = [0, 2, 1, 3, 5, 4, 4, 7, 6, 9, 8]
+        frames = [reader.get_frame(i / 10) for i in order]
+        video.close()
+
+        assert [int(round(frame.mean() / 8)) for frame in frames] == order
+        assert restarts == []
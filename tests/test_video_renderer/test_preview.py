@@ -0,0 +1,74 @@
+import cv2
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from video_model.models import Project, RectangleElement, TextElement, SubtitleElement
+from safe_expr_eval.vectorized import compile_time_expression
+from video_renderer.preview import scale_project, PREVIEW_AUDIO_BITRATE, PREVIEW_FPS
+from video_renderer.renderer import Renderer
+
+def _project():
+    elements = [
+        RectangleElement(name="bg", start=0, end=2, width=400, height=300, color=(10, 20, 30)),
+        RectangleElement(name="box", start=0, end=2, width=80, height=40, color=(255, 0, 0), y=100,
+                         x=compile_time_expression("50 + 100 * t").bind({}), corner_radius=8,
+                         keyframes={"opacity": [{"t": 0, "value": 0.5}]}, filters=[{"type": "blur", "zsize": 5}]),
+        RectangleElement(name="bar", start=0, end=2, width=120, height=20, color=(0, 255, 0), opacity=0.6,
+                         keyframes={"y": [{"t": 0, "value": 200}, {"t": 2, "value": 260}]}),
+        TextElement(name="title", start=0, end=2, text="Oi", font={"stroke": {"width": 3}}),
+        SubtitleElement(name="subs", start=0, path="subs.json", margin_v=40, font={"size": 30},
+                        word_background={"enabled": True, "padding": [10, 6]}),
+    ]
+    return Project(width=400, height=300, duration=2, elements=elements)
+
+class TestScaleProject:
+
+    def test_pixel_attributes_are_scaled(self):
+        project = _project()
+        preview = scale_project(project, 0.5)
+        bg, box, bar, title, subs = preview.elements
+        assert (preview.width, preview.height) == (200, 150)
+        assert (box.width, box.height, box.y, box.corner_radius) == (40, 20, 50.0, 4.0)
+        assert box.x(1.0) == 75.0
+        assert box.keyframes == {"opacity": [{"t": 0, "value": 0.5}]}
+        assert box.filters == [{"type": "blur", "zsize": 2}]
+        assert [frame["value"] for frame in bar.keyframes["y"]] == [100.0, 130.0]
+        assert bar.opacity == 0.6 and bar.type == "rectangle"
+        assert title.font == {"size": 12, "stroke": {"width": 2}}
+        assert subs.margin_v == 20 and subs.font["size"] == 15 and subs.font["stroke"]["width"] == 1
+        assert subs.word_background["padding"] == [5.0, 3.0] and subs.word_background["radius"] == 5
+        assert subs.word_background["enabled"] is True
+
+    def test_original_project_is_not_modified(self):
+        project = _project()
+        scale_project(project, 0.25)
+        assert project.width == 400 and project.elements[1].width == 80
+        assert project.elements[3].font == {"stroke": {"width": 3}}
+
+    def test_dimensions_stay_even_and_factor_must_be_positive(self):
+        project = Project(width=1920, height=1080, duration=1)
+        assert (scale_project(project, 1 / 3).width, scale_project(project, 1 / 3).height) == (640, 360)
+        assert scale_project(Project(width=101, height=75, duration=1), 0.5).height == 38
+        with pytest.raises(ValueError, match="positiva"):
+            scale_project(project, 0)
+
+    def test_preview_layout_matches_full_render(self):
+        project = _project()
+        project.elements = project.elements[:3]
+        full = Renderer(project).compose_video(compositor='numpy')
+        preview = Renderer(scale_project(project, 0.5)).compose_video(compositor='numpy')
+        for t in (0.0, 0.5, 1.5):
+            expected = cv2.resize(full.get_frame(t), (200, 150), interpolation=cv2.INTER_AREA)
+            assert np.abs(preview.get_frame(t).astype(int) - expected).mean() < 3
+
+class TestRenderPreview:
+
+    @patch('video_renderer.renderer.Renderer.render_video', autospec=True)
+    def test_render_preview_uses_scaled_project_and_draft_settings(self, mock_render_video):
+        Renderer(_project()).render_preview("preview.mp4", scale=0.25, workers=2)
+
+        preview, path = mock_render_video.call_args.args
+        assert (preview.project.width, preview.project.height) == (100, 76)
+        assert preview.audio_bitrate == PREVIEW_AUDIO_BITRATE
+        assert mock_render_video.call_args.kwargs == {"fps": PREVIEW_FPS, "encoder": "draft", "workers": 2}
@@ -0,0 +1,75 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from video_model.models import Project, VideoElement
+from video_renderer.encoding import EncoderProfile, FFmpegPipeWriter
+from video_renderer.proxy import ProxyCache
+from video_renderer.renderer import Renderer
+
+@pytest.fixture
+def source(tmp_path):
+    path = str(tmp_path / "source.mp4")
+    with FFmpegPipeWriter(path, (128, 64), 30, EncoderProfile(preset="ultrafast")) as writer:
+        for index in range(30):
+            writer.write_frame(np.full((64, 128, 3), index * 8, dtype=np.uint8))
+    return path
+
+class TestProxyCache:
+    def test_proxy_is_intra_frame_at_project_size_and_fps(self, tmp_path, source):
+        cache = ProxyCache(str(tmp_path / "cache"))
+        proxy = cache.get(source, (64, 64), 10)
+
+        infos = ffmpeg_parse_infos(proxy)
+        assert infos["video_codec_name"] == "mjpeg"
+        # Cabe no quadro sem distorcer: 128x64 -> 64x32.
+        assert infos["video_size"] == [64, 32]
+        assert infos["video_fps"] == 10
+
+    def test_proxy_is_generated_once(self, tmp_path, source):
+        cache = ProxyCache(str(tmp_path / "cache"))
+        first = cache.get(source, (64, 64), 10)
+        with patch("video_renderer.proxy.subprocess.run") as run:
+            assert cache.get(source, (64, 64), 10) == first
+            # Uma cópia do mesmo arquivo usa o mesmo proxy.
+            copy = str(tmp_path / "copy.mp4")
+            shutil.copyfile(source, copy)
+            assert cache.get(copy, (64, 64), 10) == first
+        run.assert_not_called()
+        assert cache.stats() == {"hits": 2, "misses": 1}
+
+    def test_proxy_key_depends_on_content_and_parameters(self, tmp_path, source):
+        cache = ProxyCache(str(tmp_path / "cache"))
+        path = cache.proxy_path(source, (64, 64), 10)
+        assert cache.proxy_path(source, (64, 64), 12) != path
+        assert cache.proxy_path(source, (32, 32), 10) != path
+        with open(source, "ab") as f:
+            f.write(b"\0")
+        assert cache.proxy_path(source, (64, 64), 10) != path
+
+    def test_transcoding_failure_raises_io_error(self, tmp_path):
+        broken = tmp_path / "broken.mp4"
+        broken.write_bytes(b"not a video")
+        cache = ProxyCache(str(tmp_path / "cache"))
+        with pytest.raises(IOError, match="Falha ao gerar o proxy"):
+            cache.get(str(broken), (64, 64), 10)
+        leftovers = [name for _, _, files in os.walk(cache.cache_dir) for name in files if name.startswith(".proxy.")]
+        assert leftovers == []
+
+    def test_renderer_reads_proxy_at_original_size(self, tmp_path, source):
+        """Com proxies, o clipe aponta para o proxy, mas mantém o tamanho que o elemento teria."""
+        project = Project(width=64, height=64, duration=1, elements=[VideoElement(name="v", start=0, path=source)])
+        renderer = Renderer(project)
+        renderer.proxies = ProxyCache(str(tmp_path / "cache"))
+        renderer.fps = 10
+
+        clip = renderer._create_video_clip(project.elements[0])
+
+        assert clip.filename == renderer.proxies.proxy_path(source, (64, 64), 10)
+        assert tuple(clip.size) == (128, 64)
+        assert abs(int(clip.get_frame(0.5)[32, 64, 0]) - 15 * 8) <= 3
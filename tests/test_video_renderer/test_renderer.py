@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from unittest.mock import MagicMock, patch
 
 from utils.color import hex_to_rgb
@@ -7,8 +8,12 @@ from video_model.models import (
     Project, ImageElement, VideoElement, RectangleElement, TextElement, AudioElement
 )
 from video_renderer.renderer import Renderer
+from video_renderer.encoding import EncoderProfile, FFmpegPipeWriter
+from PIL import Image
 
 from video_renderer.renderer import Loop_fx
+from safe_expr_eval.vectorized import compile_time_expression
+from video_renderer.animation import build_tracks, sample_keyframes
 
 # Importamos a classe base do MoviePy para usar no 'spec' do mock
 try:
@@ -73,9 +78,30 @@ class TestRenderer:
         mock_clip.return_value = mock_instance
         renderer = Renderer(project_with_video)
         renderer._create_video_clip(project_with_video.elements[0])
-        mock_clip.assert_called_once_with("trailer.mp4")
+        mock_clip.assert_called_once_with("trailer.mp4", target_resolution=(1280, 720))
         mock_instance.with_volume_scaled.assert_called_once_with(0.7)
-        mock_instance.resized.assert_called_once_with((1280, 720))
+        mock_instance.resized.assert_not_called()
+
+    @patch('video_renderer.renderer.ffmpeg_parse_infos')
+    @patch('video_renderer.renderer.VideoFileClip')
+    def test_create_video_clip_keeps_aspect_ratio(self, mock_clip, mock_parse_infos):
+        """Com uma só dimensão, o tamanho pedido ao ffmpeg segue a proporção (como o resized)."""
+        mock_parse_infos.return_value = {"video_size": [3840, 2160], "video_rotation": 0}
+        renderer = Renderer(Project(width=1920, height=1080, duration=10))
+
+        renderer._create_video_clip(VideoElement(name="pip", start=0, path="4k.mp4", width=641))
+        renderer._create_video_clip(VideoElement(name="pip", start=0, path="4k.mp4", height=360))
+        renderer._create_video_clip(VideoElement(name="full", start=0, path="4k.mp4"))
+
+        sizes = [call.kwargs["target_resolution"] for call in mock_clip.call_args_list]
+        assert sizes == [(641, 360), (640, 360), None]
+        assert mock_parse_infos.call_count == 2
+
+        # Hidratado pelo Resolver: usa media_width/media_height sem abrir o arquivo.
+        renderer._create_video_clip(VideoElement(name="pip", start=0, path="hd.mp4", width=641,
+                                                 media_width=1280, media_height=720))
+        assert mock_clip.call_args.kwargs["target_resolution"] == (641, 360)
+        assert mock_parse_infos.call_count == 2
 
     @patch('video_renderer.renderer.ColorClip')
     def test_create_rectangle_clip(self, mock_clip, project_with_rectangle):
@@ -102,16 +128,17 @@ class TestRenderer:
         mock_instance.with_volume_scaled.assert_called_once_with(0.5)
 
     # MUDANÇA: Removemos o patch de BaseVideoClip e o argumento do teste
-    @patch('video_renderer.renderer.CompositeVideoClip')
+    @patch('video_renderer.renderer.write_frames')
+    @patch('video_renderer.renderer.PlannedCompositeVideoClip')
     @patch('video_renderer.renderer.ColorClip')
-    def test_render_video_orchestration(self, mock_color_clip, mock_composite_clip, project_with_video):
+    def test_render_video_orchestration(self, mock_color_clip, mock_composite_clip, mock_write_frames, project_with_video):
         """
         Testa se render_video orquestra a criação do canvas, elementos e composição final.
         """
         mock_canvas = MagicMock()
         mock_color_clip.return_value = mock_canvas
         mock_canvas.size = (project_with_video.width, project_with_video.height)
-        mock_final_clip = MagicMock()
+        mock_final_clip = MagicMock(duration=2, audio=None)
         mock_composite_clip.return_value = mock_final_clip
         
         renderer = Renderer(project_with_video)
@@ -140,12 +167,14 @@ class TestRenderer:
         # 3. Verifica se a composição final foi criada com os clipes corretos
         mock_composite_clip.assert_called_once_with(
             [mock_canvas, mock_element_clip],
+            static=[True, False],
             size=mock_canvas.size
         )
 
-        # 4. Verifica se o arquivo final foi escrito
-        mock_final_clip.write_videofile.assert_called_once_with(
-            "output.mp4", fps=30, codec='libx264', temp_audiofile_path='tmp/'
+        # 4. Verifica se os quadros foram enviados ao codificador com o perfil padrão
+        mock_write_frames.assert_called_once_with(
+            mock_final_clip, "output.mp4", 30, 0, 60, profile=EncoderProfile(),
+            threads=1, buffer_frames=None, audiofile=None
         )
     
     @patch('video_renderer.renderer.Loop_fx')
@@ -211,3 +240,176 @@ class TestRenderer:
         # 5. Verificamos o resultado
         mock_filter_registry.get.assert_called_once_with("fade")
         mock_fade_func.assert_called_once_with(mock_clip_instance, duration_in=2.0)
+
+    @patch('video_renderer.renderer.ColorClip')
+    def test_animated_position_is_sampled_once_per_frame(self, mock_color_clip):
+        """Testa se 'expr(t):' vira uma tabela por quadro consultada por índice."""
+        element = RectangleElement(name="box", start=0, end=2, width=10, height=10,
+                                   x=compile_time_expression("100 * t").bind({}), y=5)
+        project = Project(width=1920, height=1080, duration=2, elements=[element])
+        mock_clip = MagicMock(spec=BaseVideoClip, duration=None)
+        mock_clip.with_duration.return_value = mock_clip
+        mock_clip.with_start.return_value = mock_clip
+        mock_clip.with_position.return_value = mock_clip
+        mock_color_clip.return_value = mock_clip
+
+        renderer = Renderer(project)
+        renderer.fps = 10
+        renderer._create_clip_for_element(element)
+
+        position = mock_clip.with_position.call_args.args[0]
+        assert position(0) == (0.0, 5)
+        assert position(0.5) == (50.0, 5)
+        assert position(5) == (190.0, 5) # além do fim: último quadro
+
+    @patch('video_renderer.renderer.write_frames')
+    @patch('video_renderer.renderer.NumpyCompositeVideoClip')
+    @patch('video_renderer.renderer.ColorClip')
+    def test_render_video_with_numpy_compositor(self, mock_color_clip, mock_composite_clip, mock_write_frames, project_with_video):
+        """Testa se o compositor em NumPy pode ser escolhido em render_video."""
+        mock_canvas = MagicMock(size=(project_with_video.width, project_with_video.height))
+        mock_color_clip.return_value = mock_canvas
+        renderer = Renderer(project_with_video)
+        mock_element_clip = MagicMock(spec=BaseVideoClip)
+        renderer._create_clip_for_element = MagicMock(return_value=mock_element_clip)
+
+        renderer.render_video("output.mp4", compositor='numpy')
+
+        mock_composite_clip.assert_called_once_with([mock_canvas, mock_element_clip], static=[True, False], size=mock_canvas.size)
+        assert mock_write_frames.call_args.args[0] is mock_composite_clip.return_value
+
+    @patch('video_renderer.renderer.PlannedCompositeVideoClip')
+    @patch('video_renderer.renderer.ColorClip')
+    def test_render_video_with_workers_renders_segments(self, mock_color_clip, mock_composite_clip, project_with_video):
+        """Com workers > 1, o vídeo é codificado em segmentos paralelos em vez de um write_videofile."""
+        mock_color_clip.return_value = MagicMock(size=(1920, 1080))
+        renderer = Renderer(project_with_video)
+        renderer._create_clip_for_element = MagicMock(return_value=MagicMock(spec=BaseVideoClip))
+        renderer._render_segments = MagicMock()
+
+        renderer.render_video("output.mp4", fps=30, workers=4)
+
+        renderer._render_segments.assert_called_once_with(mock_composite_clip.return_value, "output.mp4", 30, 'moviepy', 4)
+
+    @patch('video_renderer.renderer.write_frames')
+    @patch('video_renderer.renderer.PlannedCompositeVideoClip')
+    @patch('video_renderer.renderer.ColorClip')
+    def test_render_video_with_encoder_profile(self, mock_color_clip, mock_composite_clip, mock_write_frames, project_with_video):
+        mock_color_clip.return_value = MagicMock(size=(1920, 1080))
+        mock_composite_clip.return_value = MagicMock(duration=1, audio=None)
+        renderer = Renderer(project_with_video)
+        renderer._create_clip_for_element = MagicMock(return_value=MagicMock(spec=BaseVideoClip))
+
+        renderer.render_video("output.mp4", encoder='draft', encoder_threads=2)
+
+        profile = mock_write_frames.call_args.kwargs['profile']
+        assert profile == EncoderProfile(preset='ultrafast', crf=28, threads=2)
+        with pytest.raises(ValueError, match="Perfil de codificação 'lossless'"):
+            renderer.render_video("output.mp4", encoder='lossless')
+
+    def test_unknown_compositor_raises_value_error(self, project_with_video):
+        with pytest.raises(ValueError, match="opengl"):
+            Renderer(project_with_video).render_video("output.mp4", compositor='opengl')
+
+    def test_render_frame_only_creates_elements_at_t(self, tmp_path):
+        """render_frame cria só os elementos presentes em 't', com o mesmo quadro da composição completa."""
+        elements = [
+            RectangleElement(name="before", start=0, end=1, width=8, height=8, color=(255, 0, 0)),
+            RectangleElement(name="now", start=1, end=3, x=4, y=4, width=8, height=8, color=(0, 255, 0)),
+            RectangleElement(name="after", start=3, width=8, height=8, color=(0, 0, 255)),
+        ]
+        project = Project(width=16, height=16, duration=4, background_color="#000000", elements=elements)
+        renderer = Renderer(project)
+        expected = renderer.compose_video().get_frame(1.5)
+
+        with patch.object(renderer, '_create_clip_for_element', wraps=renderer._create_clip_for_element) as create:
+            frame = renderer.render_frame(1.5, str(tmp_path / "thumb.png"))
+
+        assert [call.args[0].name for call in create.call_args_list] == ["now"]
+        np.testing.assert_array_equal(frame, expected)
+        np.testing.assert_array_equal(np.asarray(Image.open(tmp_path / "thumb.png")), frame)
+        with pytest.raises(ValueError, match="fora do projeto"):
+            renderer.render_frame(4)
+
+    def test_render_frame_seeks_into_video(self, tmp_path):
+        """O quadro de um vídeo no meio do projeto é o do instante pedido."""
+        source = str(tmp_path / "source.mp4")
+        with FFmpegPipeWriter(source, (16, 16), 10, EncoderProfile(preset='ultrafast', crf=0, pixel_format='yuv444p')) as writer:
+            for index in range(50):
+                writer.write_frame(np.full((16, 16, 3), index * 5, dtype=np.uint8))
+        project = Project(width=16, height=16, duration=6,
+                          elements=[VideoElement(name="clip", start=1, path=source)])
+
+        frame = Renderer(project).render_frame(4.2)
+
+        assert abs(int(frame[8, 8, 0]) - 32 * 5) <= 2
+
+    @patch('video_renderer.renderer.write_frames')
+    @patch('video_renderer.renderer.PlannedCompositeVideoClip')
+    @patch('video_renderer.renderer.ColorClip')
+    def test_render_range_renders_only_the_window(self, mock_color_clip, mock_composite_clip, mock_write_frames):
+        mock_color_clip.return_value = MagicMock(size=(1920, 1080))
+        mock_composite_clip.return_value = MagicMock(duration=30, audio=None)
+        elements = [VideoElement(name="intro", start=0, end=5, path="intro.mp4"),
+                    VideoElement(name="main", start=5, path="main.mp4")]
+        renderer = Renderer(Project(width=1920, height=1080, duration=30, elements=elements))
+        renderer._create_clip_for_element = MagicMock(return_value=MagicMock(spec=BaseVideoClip))
+
+        renderer.render_range(10, 12.5, "range.mp4", fps=30)
+
+        assert [call.args[0].name for call in renderer._create_clip_for_element.call_args_list] == ["main"]
+        mock_write_frames.assert_called_once_with(mock_composite_clip.return_value, "range.mp4", 30, 300, 375,
+                                                  profile=EncoderProfile(), threads=1, buffer_frames=None,
+                                                  audiofile=None)
+        with pytest.raises(ValueError, match="inválido"):
+            renderer.render_range(12, 10, "range.mp4")
+
+    def test_static_classification(self):
+        """Só imagens, retângulos e textos sem filtros nem animação são pré-mesclados."""
+        assert Renderer._is_static(RectangleElement(name="bg", start=0, width=10, height=10))
+        assert Renderer._is_static(TextElement(name="t", start=0, text="Oi", opacity=0.5))
+        assert not Renderer._is_static(VideoElement(name="v", start=0, path="v.mp4"))
+        assert not Renderer._is_static(ImageElement(name="i", start=0, path="i.png", filters=[{"type": "fade"}]))
+        assert not Renderer._is_static(RectangleElement(name="r", start=0, keyframes={"x": [{"t": 0, "value": 1}]}))
+        assert not Renderer._is_static(RectangleElement(name="r", start=0, y=compile_time_expression("t").bind({})))
+
+
+# --- Testes das Trilhas de Keyframes ---
+
+class TestKeyframeTracks:
+
+    @pytest.mark.parametrize("easing, expected_midpoint", [
+        ("linear", 50.0),
+        ("ease", 50.0),
+        ("step", 0.0),
+    ])
+    def test_sample_keyframes_easings(self, easing, expected_midpoint):
+        keyframes = [{"t": 0, "value": 0}, {"t": 2, "value": 100, "easing": easing}]
+        values = sample_keyframes(keyframes, np.array([-1.0, 0.0, 1.0, 2.0, 3.0]))
+        np.testing.assert_allclose(values, [0, 0, expected_midpoint, 100, 100])
+
+    def test_ease_is_slower_than_linear_near_the_ends(self):
+        keyframes = [{"t": 0, "value": 0}, {"t": 1, "value": 100, "easing": "ease"}]
+        assert sample_keyframes(keyframes, np.array([0.1]))[0] < 10
+
+    def test_invalid_keyframes_raise_value_error(self):
+        with pytest.raises(ValueError, match="estritamente crescentes"):
+            sample_keyframes([{"t": 1, "value": 0}, {"t": 1, "value": 5}], np.zeros(1))
+        with pytest.raises(ValueError, match="Easing de keyframe desconhecido"):
+            sample_keyframes([{"t": 0, "value": 0}, {"t": 1, "value": 5, "easing": "bounce"}], np.zeros(1))
+
+    def test_build_tracks_precomputes_one_value_per_frame(self):
+        element = RectangleElement(name="box", start=0, width=10, height=10, keyframes={
+            "opacity": [{"t": 0, "value": 0}, {"t": 1, "value": 1}],
+        })
+        tracks = build_tracks(element, duration=2, fps=4)
+        assert tracks["opacity"].values.dtype == np.float32
+        assert len(tracks["opacity"].values) == 8
+        assert tracks["opacity"](0.5) == 0.5
+        assert tracks["opacity"](1.75) == 1.0
+
+    def test_build_tracks_rejects_non_animatable_attribute(self):
+        element = RectangleElement(name="box", start=0, keyframes={"width": [{"t": 0, "value": 1}]})
+        with pytest.raises(ValueError, match="não aceita keyframes"):
+            build_tracks(element, duration=1, fps=24)
+